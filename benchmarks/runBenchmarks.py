@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import numpy as np
+from typing import Any, Callable, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.syntheticData import (generate_audio_corpus,  # noqa: E402
+                                      generate_image_tree)
+from src.batchLoader import BatchLoader  # noqa: E402
+from src.centerCrop import CenterCrop  # noqa: E402
+from src.collate import Collator  # noqa: E402
+from src.dataset import Dataset  # noqa: E402
+from src.joinedDataset import JoinedDataset  # noqa: E402
+from src.pipeline import PreprocessingPipeline  # noqa: E402
+from src.randomAudioCrop import RandomAudioCrop  # noqa: E402
+from src.randomCrop import RandomCrop  # noqa: E402
+from src.resampling import AudioResampling  # noqa: E402
+from src.treeDataset import TreeDataset  # noqa: E402
+
+
+def _percentiles(seconds: List[float]) -> Dict[str, float]:
+    times = np.array(seconds) * 1000
+    return {"p50_ms": float(np.percentile(times, 50)),
+            "p90_ms": float(np.percentile(times, 90)),
+            "p99_ms": float(np.percentile(times, 99)),
+            "mean_ms": float(times.mean())}
+
+
+def _time_calls(fn: Callable[[], Any], repeats: int) -> List[float]:
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def bench_construction(name: str, build: Callable[[], Dataset],
+                       repeats: int) -> Dict[str, Any]:
+    seconds = _time_calls(build, repeats)
+    return {"benchmark": "construction", "name": name,
+            "seconds": float(np.median(seconds))}
+
+
+def bench_getitem(name: str, dataset: Dataset,
+                  num_samples: int) -> Dict[str, Any]:
+    rng = np.random.default_rng(0)
+    indices = rng.integers(0, len(dataset), size=num_samples)
+    seconds = [_time_calls(lambda: dataset[int(idx)], 1)[0]
+               for idx in indices]
+    return {"benchmark": "getitem", "name": name, **_percentiles(seconds)}
+
+
+def bench_batch_loader(name: str, dataset: Dataset, batch_size: int,
+                       num_workers: int) -> Dict[str, Any]:
+    loader = BatchLoader(dataset, batch_size, num_workers=num_workers)
+    start = time.perf_counter()
+    for _ in loader:
+        pass
+    seconds = time.perf_counter() - start
+    return {"benchmark": "batch_loader", "name": name,
+            "num_workers": num_workers,
+            "samples_per_second": len(dataset) / seconds}
+
+
+def bench_preprocessing(name: str, step: Callable, samples: List[Any],
+                        repeats: int) -> Dict[str, Any]:
+    seconds = []
+    for sample in samples:
+        seconds.extend(_time_calls(lambda: step(sample), repeats))
+    return {"benchmark": "preprocessing", "name": name,
+            **_percentiles(seconds)}
+
+
+def bench_batched_resampling(name: str, step: AudioResampling,
+                             clips: List[Any],
+                             repeats: int) -> Dict[str, Any]:
+    batch = Collator()(clips)
+    # Batches are collated by BatchLoader, outside of the timed transform
+    batch = tuple(array.copy() for array in batch)
+    per_clip = float(np.median(_time_calls(
+        lambda: [step(clip) for clip in clips], repeats)))
+    batched = float(np.median(_time_calls(lambda: step(batch), repeats)))
+    return {"benchmark": "batched_resampling", "name": name,
+            "clips": len(clips), "per_clip_seconds": per_clip,
+            "seconds": batched, "speedup": per_clip / batched}
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Generates the synthetic datasets and runs every benchmark.
+
+    Args:
+        args (argparse.Namespace): The command line arguments.
+
+    Returns:
+        dict: The run metadata and the list of results.
+    """
+    workdir = args.data_dir or tempfile.mkdtemp(prefix="dm_bench_")
+    image_root = os.path.join(workdir, "images")
+    audio_parent = os.path.join(workdir, "audio")
+    if not os.path.isdir(image_root):
+        generate_image_tree(image_root, args.images,
+                            size=(args.height, args.width), seed=args.seed)
+    audio_root = os.path.join(audio_parent, "audio")
+    if not os.path.isdir(audio_root):
+        generate_audio_corpus(audio_parent, args.clips,
+                              duration=(args.min_duration,
+                                        args.max_duration),
+                              seed=args.seed)
+
+    results = []
+    workers = [0] + ([args.workers] if args.workers > 0 else [])
+
+    for data_type, build in [
+        ("image", lambda method: TreeDataset(image_root, "image", method)),
+        ("audio", lambda method: JoinedDataset(audio_root, "audio", method,
+                                               load_labels=True)),
+    ]:
+        for method in ["lazy", "eager"]:
+            name = f"{data_type}/{method}"
+            results.append(bench_construction(
+                name, lambda: build(method), args.repeats))
+            dataset = build(method)
+            results.append(bench_getitem(name, dataset, args.samples))
+            for num_workers in workers:
+                results.append(bench_batch_loader(name, dataset,
+                                                  args.batch_size,
+                                                  num_workers))
+
+    images = [TreeDataset(image_root, "image", "lazy")[i][0]
+              for i in range(min(16, args.images))]
+    image_steps = {
+        "CenterCrop": CenterCrop(args.width // 2, args.height // 2),
+        "RandomCrop": RandomCrop(args.width // 2, args.height // 2),
+        "Pipeline(CenterCrop, RandomCrop)": PreprocessingPipeline(
+            CenterCrop(args.width * 3 // 4, args.height * 3 // 4),
+            RandomCrop(args.width // 2, args.height // 2)),
+    }
+    for name, step in image_steps.items():
+        results.append(bench_preprocessing(name, step, images,
+                                           args.repeats))
+
+    clips = [JoinedDataset(audio_root, "audio", "lazy")[i]
+             for i in range(min(8, args.clips))]
+    audio_steps = {
+        "RandomAudioCrop": RandomAudioCrop(1.0),
+        "AudioResampling(librosa)": AudioResampling(8000),
+        "AudioResampling(fast)": AudioResampling(8000, mode="fast"),
+        "AudioResampling(high)": AudioResampling(8000, mode="high"),
+    }
+    for name, step in audio_steps.items():
+        results.append(bench_preprocessing(name, step, clips, args.repeats))
+
+    batch_clips = [JoinedDataset(audio_root, "audio", "lazy")[i]
+                   for i in range(min(args.batch_size, args.clips))]
+    for mode in ["librosa", "fast", "high"]:
+        results.append(bench_batched_resampling(
+            f"AudioResampling({mode})", AudioResampling(8000, mode=mode),
+            batch_clips, args.repeats))
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "cpu_count": os.cpu_count(),
+            "config": vars(args),
+        },
+        "results": results,
+    }
+
+
+def _result_key(result: Dict[str, Any]) -> str:
+    return "|".join(str(result.get(field)) for field in
+                    ["benchmark", "name", "num_workers"])
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            tolerance: float) -> List[str]:
+    """
+    Compares two runs and lists the results that got slower than the
+    tolerance allows.
+
+    Args:
+        current (dict): The results of this run.
+
+        baseline (dict): The results of a previous run.
+
+        tolerance (float): The allowed relative slowdown, e.g. 0.2.
+
+    Returns:
+        List[str]: A description of every regression.
+    """
+    previous = {_result_key(result): result
+                for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = previous.get(_result_key(result))
+        if old is None:
+            continue
+        for metric in ["seconds", "p50_ms", "samples_per_second"]:
+            if metric not in result or metric not in old:
+                continue
+            # For throughput, higher is better
+            ratio = (old[metric] / result[metric]
+                     if metric == "samples_per_second"
+                     else result[metric] / old[metric])
+            if ratio > 1 + tolerance:
+                regressions.append(f"{_result_key(result)} {metric}: "
+                                   f"{old[metric]:.4g} -> "
+                                   f"{result[metric]:.4g}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark datasets, BatchLoader and preprocessing on "
+                    "synthetic data.")
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--data-dir", default=None,
+                        help="Where to generate the data, reused if present")
+    parser.add_argument("--images", type=int, default=300)
+    parser.add_argument("--height", type=int, default=150)
+    parser.add_argument("--width", type=int, default=150)
+    parser.add_argument("--clips", type=int, default=60)
+    parser.add_argument("--min-duration", type=float, default=2.0)
+    parser.add_argument("--max-duration", type=float, default=10.0)
+    parser.add_argument("--samples", type=int, default=200,
+                        help="Random accesses timed per dataset")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", default=None,
+                        help="A previous results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    report = run(args)
+    with open(args.out, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Wrote {len(report['results'])} results to {args.out}")
+
+    if args.compare is not None:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import os
+import csv
+import wave
+import numpy as np
+from PIL import Image
+from typing import Tuple
+
+
+def _make_image(rng: np.random.Generator, height: int,
+                width: int) -> Image.Image:
+    """
+    Creates an image made of a random color gradient plus noise, which
+    compresses and decodes like a photograph more than pure noise does.
+
+    Args:
+        rng (np.random.Generator): The random generator.
+
+        height (int): The height of the image.
+
+        width (int): The width of the image.
+
+    Returns:
+        PIL.Image.Image: The RGB image.
+    """
+    y = np.linspace(0, 1, height)[:, None, None]
+    x = np.linspace(0, 1, width)[None, :, None]
+    start, dy, dx = rng.uniform(0, 255, size=(3, 3))
+    pixels = start + dy * y + dx * x - (dy + dx) / 2
+    pixels = pixels + rng.normal(0, 12, size=(height, width, 3))
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+def _write_wav(path: str, rng: np.random.Generator, duration: float,
+               sr: int) -> None:
+    """
+    Writes a mono 16-bit WAV file holding a few random tones plus noise.
+
+    Args:
+        path (str): The path of the file.
+
+        rng (np.random.Generator): The random generator.
+
+        duration (float): The duration in seconds.
+
+        sr (int): The sampling rate.
+
+    Returns:
+        None
+    """
+    t = np.arange(int(duration * sr)) / sr
+    signal = sum(np.sin(2 * np.pi * freq * t)
+                 for freq in rng.uniform(100, 2000, size=3)) / 3
+    signal = 0.5 * signal + rng.normal(0, 0.05, size=len(t))
+    samples = (np.clip(signal, -1, 1) * 32767).astype("<i2")
+    with wave.open(path, "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(sr)
+        file.writeframes(samples.tobytes())
+
+
+def generate_image_tree(root: str, num_images: int, num_classes: int = 3,
+                        size: Tuple[int, int] = (150, 150),
+                        seed: int = 0) -> str:
+    """
+    Generates a TreeDataset image layout: one folder per class, holding
+    "image_<i>.jpg" files.
+
+    Args:
+        root (str): The root folder of the dataset.
+
+        num_images (int): The total number of images.
+
+        num_classes (int): The number of class folders.
+
+        size (Tuple[int, int]): The (height, width) of the images.
+
+        seed (int): The seed of the generator.
+
+    Returns:
+        str: The root folder.
+    """
+    rng = np.random.default_rng(seed)
+    for i in range(num_images):
+        class_dir = os.path.join(root, f"class_{i % num_classes}")
+        os.makedirs(class_dir, exist_ok=True)
+        _make_image(rng, *size).save(os.path.join(class_dir,
+                                                  f"image_{i + 1}.jpg"))
+    return root
+
+
+def generate_audio_corpus(root: str, num_clips: int,
+                          duration: Tuple[float, float] = (2.0, 10.0),
+                          sr: int = 16000, seed: int = 0) -> str:
+    """
+    Generates a JoinedDataset audio layout: "audio_<i>.wav" files in
+    root/audio, and a regression label for each of them in root/labels.csv.
+
+    Args:
+        root (str): The folder holding the audio folder and the labels.
+
+        num_clips (int): The number of clips.
+
+        duration (Tuple[float, float]): The range the duration of each clip
+        is drawn from, in seconds.
+
+        sr (int): The sampling rate.
+
+        seed (int): The seed of the generator.
+
+    Returns:
+        str: The folder holding the clips, to be used as dataset root.
+    """
+    rng = np.random.default_rng(seed)
+    audio_dir = os.path.join(root, "audio")
+    os.makedirs(audio_dir, exist_ok=True)
+
+    with open(os.path.join(root, "labels.csv"), "w", newline="") as file:
+        writer = csv.writer(file)
+        for i in range(num_clips):
+            name = f"audio_{i + 1}.wav"
+            _write_wav(os.path.join(audio_dir, name), rng,
+                       rng.uniform(*duration), sr)
+            writer.writerow([name, f"{rng.uniform(0, 10):.3f}"])
+    return audio_dir
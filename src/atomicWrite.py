@@ -0,0 +1,41 @@
+import os
+import uuid
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = "w",
+                 encoding: Optional[str] = None) -> Iterator[IO]:
+    """
+    Opens a temporary file next to path, then moves it onto path once the
+    block exits without error, so readers, including other processes, see
+    either the old file or the complete new one. The temporary file is
+    removed if the block raises.
+
+    Args:
+        path (str): The path of the file to write.
+
+        mode (str): The mode the temporary file is opened with, "w" or
+        "wb".
+
+        encoding (str): The encoding of a text file.
+
+    Returns:
+        iterator: The open temporary file.
+    """
+    if mode not in ["w", "wb"]:
+        raise ValueError("mode must be 'w' or 'wb'")
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with open(tmp_path, mode, encoding=encoding) as file:
+            yield file
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
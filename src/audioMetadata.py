@@ -0,0 +1,135 @@
+import os
+import json
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+from src.atomicWrite import atomic_write
+
+AudioInfo = namedtuple("AudioInfo", ["frames", "sample_rate", "channels"])
+
+
+class AudioMetadataIndex:
+    """
+    A cache of the number of frames, sampling rate and number of channels
+    of audio files, read from the file headers without decoding the audio.
+
+    The index can be saved to a JSON file. Entries read from that file are
+    checked against the size and modification time of the audio file the
+    first time they are used; entries read during the current session are
+    trusted as is.
+
+    Attributes:
+        _index_path (str): The JSON file the index is saved to, or None.
+        _entries (dict): The validated entries, keyed by file path.
+        _persisted (dict): The entries read from the index file that were
+        not validated yet.
+    """
+    def __init__(self, index_path: Optional[str] = None) -> None:
+        if index_path is not None and not isinstance(index_path, str):
+            raise ValueError("index_path must be a string or None")
+        self._index_path = index_path
+        self._entries: Dict[str, list] = {}
+        self._persisted: Dict[str, list] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+        if index_path is not None and os.path.isfile(index_path):
+            try:
+                with open(index_path, encoding="utf-8") as file:
+                    self._persisted = json.load(file)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable audio index {index_path}: {e}")
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def index_path(self) -> Optional[str]:
+        return self._index_path
+
+    def get(self, filepath: str) -> AudioInfo:
+        """
+        Returns the metadata of an audio file, reading its header if the
+        file is not in the index yet.
+
+        Args:
+            filepath (str): The path of the audio file.
+
+        Returns:
+            AudioInfo: The number of frames, sampling rate and number of
+            channels of the file.
+        """
+        entry = self._entries.get(filepath)
+        if entry is not None:
+            return AudioInfo(*entry[2:])
+
+        stat = os.stat(filepath)
+        entry = self._persisted.get(filepath)
+        if entry is None or entry[:2] != [stat.st_size, stat.st_mtime_ns]:
+            import soundfile
+            info = soundfile.info(filepath)
+            entry = [stat.st_size, stat.st_mtime_ns, info.frames,
+                     info.samplerate, info.channels]
+            self._dirty = True
+
+        with self._lock:
+            self._entries[filepath] = entry
+        return AudioInfo(*entry[2:])
+
+    def duration(self, filepath: str) -> float:
+        """
+        Args:
+            filepath (str): The path of the audio file.
+
+        Returns:
+            float: The duration of the file in seconds.
+        """
+        info = self.get(filepath)
+        return info.frames / info.sample_rate
+
+    def prefetch(self, filepaths: Iterable[str],
+                 num_workers: Optional[int] = None) -> None:
+        """
+        Reads the metadata of many files with parallel threads, then saves
+        the index if it has a path.
+
+        Args:
+            filepaths (Iterable[str]): The paths of the audio files.
+
+            num_workers (int): The number of threads.
+
+        Returns:
+            None
+        """
+        with ThreadPoolExecutor(max_workers=num_workers) as pool:
+            for _ in pool.map(self.get, filepaths):
+                pass
+        self.save()
+
+    def save(self) -> None:
+        """
+        Writes the index to its JSON file, if it has a path and changed.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if self.index_path is None or not self._dirty:
+            return
+        with self._lock:
+            entries = {**self._persisted, **self._entries}
+            self._dirty = False
+        with atomic_write(self.index_path, encoding="utf-8") as file:
+            json.dump(entries, file, separators=(",", ":"))
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,38 +1,155 @@
+import time
+import asyncio
 import numpy as np
+from collections import deque
+from concurrent.futures import Executor, Future
 from src.dataset import Dataset
-from typing import Iterator
+from src.streamingDataset import StreamingDataset
+from src.shardedDataset import ShardedDataset
+from src.executors import make_executor
+from src.instrumentation import get_profiler, timed
+from typing import (Any, AsyncIterator, Callable, Deque, Iterable, Iterator,
+                    List, Optional)
+
+# Dataset held by each worker process of the "process" backend. It is set
+# once by the pool initializer so the dataset is pickled per worker instead
+# of once per batch.
+_worker_dataset: Optional[Dataset | StreamingDataset] = None
+
+
+def _init_worker(dataset: Dataset | StreamingDataset) -> None:
+    """
+    Stores the dataset in a worker process of the "process" backend.
+
+    Args:
+        dataset (Dataset): The dataset the worker loads samples from.
+
+    Returns:
+        None
+    """
+    global _worker_dataset
+    _worker_dataset = dataset
+
+
+def _load_samples(dataset: Dataset | StreamingDataset,
+                  indices: np.ndarray | List[Any]) -> List[Any]:
+    """
+    Loads the samples at the given indices from a dataset.
+
+    Args:
+        dataset (Dataset or StreamingDataset): The dataset to load the
+        samples from.
+
+        indices (np.ndarray or List): The indices of the samples to load,
+        or a list of the items yielded by the items method of a
+        StreamingDataset or a ShardedDataset.
+
+    Returns:
+        List: The loaded samples, in the order of indices.
+    """
+    with timed("batch.assembly"):
+        if isinstance(indices, list):
+            return [dataset.load(item) for item in indices]
+        return [dataset[idx] for idx in indices]
+
+
+def _load_worker_samples(indices: np.ndarray | List[Any]) -> List[Any]:
+    """
+    Loads the samples at the given indices from the dataset of the current
+    worker process.
+
+    Args:
+        indices (np.ndarray or List): The indices of the samples to load.
+
+    Returns:
+        List: The loaded samples, in the order of indices.
+    """
+    return _load_samples(_worker_dataset, indices)
 
 
 class BatchLoader:
     """
     A class for loading batches of data from a dataset.
 
+    A StreamingDataset is loaded in discovery order, batch_size files at a
+    time, as its files are found; shuffle and the samplers do not apply to
+    it, and the loader has no length.
+
+    A ShardedDataset without a sampler or a batch_sampler is read
+    sequentially through its items method, on the iterating thread, while
+    the records are decoded by the workers. shuffle then shuffles the
+    shards and the records within bounded runs of every shard.
+
     Attributes:
-        _dataset (Dataset): The dataset from which to load data.
+        _dataset (Dataset or StreamingDataset): The dataset from which to
+        load data.
         _batch_size (int): The size of each batch.
         _shuffle (bool): Whether to shuffle the dataset before loading batches.
         _include_last_batch (bool): Whether to include the last batch if it's
         smaller than batch_size.
+        _num_workers (int): The number of workers loading batches in the
+        background. With 0, batches are loaded on the calling thread.
+        _prefetch (int): The number of batches kept in flight per worker.
+        _backend (str): The kind of workers, either "thread" or "process".
+        _collate_fn (Callable): Applied to every batch before it is yielded,
+        e.g. a Collator to stack the samples into arrays. If None, batches
+        are lists of samples.
+        _sampler (Iterable[int]): If set, yields the indices to load, in
+        order, e.g. a DistributedSampler. shuffle is then ignored.
+        _batch_sampler (Iterable[List[int]]): If set, yields the indices of
+        every batch, e.g. a BucketBatchSampler. batch_size, shuffle,
+        include_last_batch and sampler are then ignored.
     """
-    def __init__(self, dataset: Dataset, batch_size: int, shuffle: bool = True,
-                 include_last_batch: bool = True) -> None:
-        if not isinstance(dataset, Dataset):
+    def __init__(self, dataset: Dataset | StreamingDataset, batch_size: int,
+                 shuffle: bool = True,
+                 include_last_batch: bool = True, num_workers: int = 0,
+                 prefetch: int = 2, backend: str = "thread",
+                 collate_fn: Optional[Callable] = None,
+                 sampler: Optional[Iterable[int]] = None,
+                 batch_sampler: Optional[Iterable[List[int]]] = None
+                 ) -> None:
+        if not isinstance(dataset, (Dataset, StreamingDataset)):
             raise TypeError("dataset must be an instance of Dataset or its"
-                            "subclass")
+                            "subclass, or a StreamingDataset")
         if not isinstance(batch_size, int) or batch_size <= 0:
             raise ValueError("batch_size must be a positive integer")
         if not isinstance(shuffle, bool):
             raise ValueError("shuffle must be a boolean")
         if not isinstance(include_last_batch, bool):
             raise ValueError("include_last_batch must be a boolean")
+        if not isinstance(num_workers, int) or num_workers < 0:
+            raise ValueError("num_workers must be a non-negative integer")
+        if not isinstance(prefetch, int) or prefetch <= 0:
+            raise ValueError("prefetch must be a positive integer")
+        if backend not in ["thread", "process"]:
+            raise ValueError("backend must be 'thread' or 'process'")
+        if collate_fn is not None and not callable(collate_fn):
+            raise TypeError("collate_fn must be callable")
+        self._check_sampler(sampler)
+        self._check_sampler(batch_sampler)
+        if isinstance(dataset, StreamingDataset) and (
+                sampler is not None or batch_sampler is not None):
+            raise ValueError("samplers require a Dataset with random access")
 
         self._dataset = dataset
         self._batch_size = batch_size
         self._shuffle = shuffle
         self._include_last_batch = include_last_batch
+        self._num_workers = num_workers
+        self._prefetch = prefetch
+        self._backend = backend
+        self._collate_fn = collate_fn
+        self._sampler = sampler
+        self._batch_sampler = batch_sampler
+
+    @staticmethod
+    def _check_sampler(sampler: Optional[Iterable[int]]) -> None:
+        if sampler is not None and not (hasattr(sampler, "__iter__")
+                                        and hasattr(sampler, "__len__")):
+            raise TypeError("samplers must be iterables with a length")
 
     @property
-    def dataset(self) -> Dataset:
+    def dataset(self) -> Dataset | StreamingDataset:
         return self._dataset
 
     @property
@@ -65,32 +182,337 @@ class BatchLoader:
             raise ValueError("include_last_batch must be a boolean")
         self._include_last_batch = value
 
-    def __iter__(self) -> Iterator:
+    @property
+    def num_workers(self) -> int:
+        return self._num_workers
+
+    @num_workers.setter
+    def num_workers(self, value: int) -> None:
+        if not isinstance(value, int) or value < 0:
+            raise ValueError("num_workers must be a non-negative integer")
+        self._num_workers = value
+
+    @property
+    def prefetch(self) -> int:
+        return self._prefetch
+
+    @prefetch.setter
+    def prefetch(self, value: int) -> None:
+        if not isinstance(value, int) or value <= 0:
+            raise ValueError("prefetch must be a positive integer")
+        self._prefetch = value
+
+    @property
+    def backend(self) -> str:
+        return self._backend
+
+    @backend.setter
+    def backend(self, value: str) -> None:
+        if value not in ["thread", "process"]:
+            raise ValueError("backend must be 'thread' or 'process'")
+        self._backend = value
+
+    @property
+    def collate_fn(self) -> Optional[Callable]:
+        return self._collate_fn
+
+    @collate_fn.setter
+    def collate_fn(self, value: Optional[Callable]) -> None:
+        if value is not None and not callable(value):
+            raise TypeError("collate_fn must be callable")
+        self._collate_fn = value
+
+    @property
+    def sampler(self) -> Optional[Iterable[int]]:
+        return self._sampler
+
+    @sampler.setter
+    def sampler(self, value: Optional[Iterable[int]]) -> None:
+        self._check_sampler(value)
+        self._sampler = value
+
+    @property
+    def batch_sampler(self) -> Optional[Iterable[List[int]]]:
+        return self._batch_sampler
+
+    @batch_sampler.setter
+    def batch_sampler(self, value: Optional[Iterable[List[int]]]) -> None:
+        self._check_sampler(value)
+        self._batch_sampler = value
+
+    def _indices(self) -> np.ndarray:
         """
-        Returns an iterator to iterate over batches of data.
+        Returns the indices of the samples to load in this epoch, in order.
+
         Args:
             None
+
         Returns:
-            iterator: An iterator over batches of data.
+            np.ndarray: The indices, from the sampler if there is one.
         """
+        if self.sampler is not None:
+            return np.fromiter(iter(self.sampler), dtype=np.int64,
+                               count=len(self.sampler))
 
-        dataset_size = len(self.dataset)
-        indices = np.arange(dataset_size)
-
+        indices = np.arange(len(self.dataset))
         if self.shuffle:
             np.random.shuffle(indices)
+        return indices
+
+    def _num_samples(self) -> int:
+        if self.sampler is not None:
+            return len(self.sampler)
+        return len(self.dataset)
+
+    def _streams(self) -> bool:
+        """
+        Returns:
+            bool: Whether the dataset is read through its items method
+            rather than by index.
+        """
+        return isinstance(self.dataset, StreamingDataset) or (
+            isinstance(self.dataset, ShardedDataset)
+            and self.sampler is None and self.batch_sampler is None)
+
+    def _stream_batches(self) -> Iterator[List[Any]]:
+        """
+        Groups the items of a StreamingDataset or a ShardedDataset into
+        batches as they are read.
+
+        Args:
+            None
+
+        Returns:
+            iterator: An iterator over the lists of items of the batches.
+        """
+        if isinstance(self.dataset, ShardedDataset):
+            # Seeded from the global generator, like the shuffled indices
+            seed = int(np.random.randint(2**31)) if self.shuffle else None
+            items = self.dataset.items(self.shuffle, seed)
+        else:
+            items = self.dataset.items()
+
+        batch: List[Any] = []
+        for item in items:
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch and self.include_last_batch:
+            yield batch
+
+    def _batch_indices(self) -> Iterator[np.ndarray]:
+        """
+        Generates the indices of the samples of every batch.
+
+        Args:
+            None
+
+        Returns:
+            iterator: An iterator over the index arrays of the batches.
+        """
+        if self._streams():
+            yield from self._stream_batches()
+            return
+
+        if self.batch_sampler is not None:
+            for batch in self.batch_sampler:
+                yield np.asarray(batch, dtype=np.int64)
+            return
+
+        indices = self._indices()
+        dataset_size = len(indices)
 
         num_full_batches = dataset_size // self.batch_size
 
         # Full batches
         for i in range(num_full_batches):
-            yield [self.dataset[idx] for idx in indices[i*self.batch_size:
-                                                        (i+1)*self.batch_size]]
+            yield indices[i*self.batch_size:(i+1)*self.batch_size]
 
         # Handle the last batch
         if self.include_last_batch and dataset_size % self.batch_size != 0:
-            yield [self.dataset[idx] for idx in indices[num_full_batches *
-                                                        self.batch_size:]]
+            yield indices[num_full_batches*self.batch_size:]
+
+    def _make_executor(self) -> Executor:
+        """
+        Creates the pool of workers used to load batches in the background.
+
+        Args:
+            None
+
+        Returns:
+            Executor: A thread or process pool, depending on the backend.
+        """
+        if self.backend == "process":
+            return make_executor("process", self.num_workers,
+                                 initializer=_init_worker,
+                                 initargs=(self.dataset,))
+        return make_executor("thread", self.num_workers)
+
+    def _submit(self, executor: Executor,
+                indices: np.ndarray | List[Any]) -> Future:
+        """
+        Schedules the loading of a batch on the pool of workers.
+
+        Args:
+            executor (Executor): The pool of workers.
+
+            indices (np.ndarray): The indices of the samples of the batch.
+
+        Returns:
+            Future: The future holding the loaded batch.
+        """
+        if self.backend == "process":
+            return executor.submit(_load_worker_samples, indices)
+        return executor.submit(_load_samples, self.dataset, indices)
+
+    def _iter_prefetch(self) -> Iterator:
+        """
+        Iterates over batches loaded by a pool of workers, keeping
+        num_workers * prefetch batches in flight. Batches are yielded in the
+        order of the indices, and an exception raised while loading a batch
+        is raised again when that batch is reached.
+
+        Args:
+            None
+
+        Returns:
+            iterator: An iterator over batches of data.
+        """
+        max_in_flight = self.num_workers * self.prefetch
+        batch_indices = self._batch_indices()
+        pending: Deque[Future] = deque()
+
+        executor = self._make_executor()
+        try:
+            for indices in batch_indices:
+                pending.append(self._submit(executor, indices))
+                if len(pending) >= max_in_flight:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def _collate(self, batch: List[Any]) -> Any:
+        """
+        Applies collate_fn to a batch, if there is one.
+
+        Args:
+            batch (List): The loaded samples.
+
+        Returns:
+            The collated batch.
+        """
+        if self.collate_fn is None:
+            return batch
+        with timed("batch.collate"):
+            return self.collate_fn(batch)
+
+    async def __aiter__(self) -> AsyncIterator:
+        """
+        Iterates over batches of data without blocking the event loop.
+
+        Batches are loaded on the default executor of the running loop, or
+        on a process pool for the "process" backend with workers. At most
+        max(num_workers, 1) * prefetch batches are in flight, and no more
+        are scheduled until the consumer takes one, so a slow consumer holds
+        back loading. The indices are drawn on the default executor as well,
+        so a streaming dataset waiting for its files never blocks the loop.
+        Batches arrive in the order of the indices, and an exception raised
+        while loading a batch is raised again when that batch is reached.
+
+        Args:
+            None
+
+        Returns:
+            async iterator: An asynchronous iterator over batches of data.
+        """
+        loop = asyncio.get_running_loop()
+        max_in_flight = max(self.num_workers, 1) * self.prefetch
+        executor = (self._make_executor()
+                    if self.backend == "process" and self.num_workers > 0
+                    else None)
+        pending: Deque[asyncio.Future] = deque()
+
+        def schedule(indices: np.ndarray) -> asyncio.Future:
+            if executor is not None:
+                return asyncio.wrap_future(self._submit(executor, indices))
+            return loop.run_in_executor(None, _load_samples, self.dataset,
+                                        indices)
+
+        batch_indices = self._batch_indices()
+        try:
+            while True:
+                # Drawing the next indices can block, e.g. while a streaming
+                # dataset waits for its files to be listed, so it runs off
+                # the loop too
+                indices = await loop.run_in_executor(None, next,
+                                                     batch_indices, None)
+                if indices is None:
+                    break
+                pending.append(schedule(indices))
+                if len(pending) >= max_in_flight:
+                    yield await self._next_batch(loop, pending.popleft())
+            while pending:
+                yield await self._next_batch(loop, pending.popleft())
+        finally:
+            for future in pending:
+                future.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _next_batch(self, loop: asyncio.AbstractEventLoop,
+                          future: asyncio.Future) -> Any:
+        """
+        Waits for a batch and collates it on the default executor, recording
+        the wait in the profiler if it is on. Batches are collated one at a
+        time, in order, since collate_fn may reuse its output buffers.
+
+        Args:
+            loop (asyncio.AbstractEventLoop): The running event loop.
+
+            future (asyncio.Future): The future holding the loaded batch.
+
+        Returns:
+            The collated batch.
+        """
+        start = time.perf_counter()
+        batch = await future
+        batch = await loop.run_in_executor(None, self._collate, batch)
+        profiler = get_profiler()
+        if profiler is not None:
+            profiler.record_wait(time.perf_counter() - start)
+        return batch
+
+    def __iter__(self) -> Iterator:
+        """
+        Returns an iterator to iterate over batches of data.
+        Args:
+            None
+        Returns:
+            iterator: An iterator over batches of data.
+        """
+        if self.num_workers > 0:
+            batches = self._iter_prefetch()
+        else:
+            batches = (_load_samples(self.dataset, indices)
+                       for indices in self._batch_indices())
+
+        while True:
+            # Time the consumer spends waiting for the next batch
+            start = time.perf_counter()
+            batch = next(batches, None)
+            if batch is None:
+                return
+            batch = self._collate(batch)
+
+            profiler = get_profiler()
+            if profiler is not None:
+                profiler.record_wait(time.perf_counter() - start)
+            yield batch
 
     def __len__(self) -> int:
         """
@@ -102,7 +524,12 @@ class BatchLoader:
         Returns:
             int: The number of batches that will be produced by the iterator.
         """
-        dataset_size = len(self.dataset)
+        if isinstance(self.dataset, StreamingDataset):
+            raise TypeError("A BatchLoader over a StreamingDataset has no "
+                            "length")
+        if self.batch_sampler is not None:
+            return len(self.batch_sampler)
+        dataset_size = self._num_samples()
         if self.include_last_batch and dataset_size % self.batch_size != 0:
             return dataset_size // self.batch_size + 1
         return dataset_size // self.batch_size
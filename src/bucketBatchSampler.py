@@ -0,0 +1,161 @@
+import numpy as np
+from src.dataset import Dataset
+from typing import Iterator, List, Optional
+from src.epochMixin import EpochMixin
+
+
+class BucketBatchSampler(EpochMixin):
+    """
+    Groups audio samples of similar duration into batches, so that padding
+    a batch to its longest clip wastes little memory and compute.
+
+    The samples are sorted by duration and cut into num_buckets buckets of
+    equal count. Every bucket is shuffled and cut into batches, then the
+    batches of all the buckets are shuffled together, so consecutive
+    batches come from different buckets. Durations are read once, through
+    the audio metadata index of the dataset, without decoding the audio.
+
+    A batch holds at most batch_size samples and, if max_seconds is set, at
+    most max_seconds of audio once padded to the longest clip of its
+    bucket. Clips longer than max_seconds get a batch of their own.
+
+    Call set_epoch at the start of every epoch to get a new shuffle.
+
+    Attributes:
+        _durations (np.ndarray): The duration of every sample in seconds.
+        _batch_size (int): The maximum number of samples per batch.
+        _max_seconds (float): The maximum padded duration of a batch, or
+        None.
+        _num_buckets (int): The number of duration buckets.
+        _shuffle (bool): Whether to shuffle within and across buckets.
+        _seed (int): The seed of the shuffle.
+        _drop_last (bool): Whether to drop the incomplete last batch of
+        every bucket.
+        _epoch (int): The current epoch.
+    """
+    def __init__(self, dataset: Dataset, batch_size: int,
+                 max_seconds: Optional[float] = None, num_buckets: int = 10,
+                 shuffle: bool = True, seed: int = 0,
+                 drop_last: bool = False,
+                 durations: Optional[np.ndarray] = None) -> None:
+        if not isinstance(dataset, Dataset):
+            raise TypeError("dataset must be an instance of Dataset or its"
+                            "subclass")
+        if not isinstance(batch_size, int) or batch_size <= 0:
+            raise ValueError("batch_size must be a positive integer")
+        if max_seconds is not None and (
+                not isinstance(max_seconds, (int, float)) or max_seconds <= 0):
+            raise ValueError("max_seconds must be a positive number or None")
+        if not isinstance(num_buckets, int) or num_buckets <= 0:
+            raise ValueError("num_buckets must be a positive integer")
+        if not isinstance(shuffle, bool):
+            raise ValueError("shuffle must be a boolean")
+        if not isinstance(seed, int):
+            raise ValueError("seed must be an integer")
+        if not isinstance(drop_last, bool):
+            raise ValueError("drop_last must be a boolean")
+
+        if durations is None:
+            durations = dataset.durations()
+        durations = np.asarray(durations, dtype=np.float64)
+        if durations.shape != (len(dataset),):
+            raise ValueError("durations must hold one value per sample")
+
+        self._durations = durations
+        self._batch_size = batch_size
+        self._max_seconds = max_seconds
+        self._num_buckets = num_buckets
+        self._shuffle = shuffle
+        self._seed = seed
+        self._drop_last = drop_last
+        self._epoch = 0
+
+        # Buckets only depend on the durations, so they are built once
+        order = np.argsort(durations, kind="stable")
+        self._buckets = [bucket for bucket in
+                         np.array_split(order, min(num_buckets,
+                                                   max(len(order), 1)))
+                         if len(bucket) > 0]
+        self._bucket_batch_sizes = [self._bucket_batch_size(bucket)
+                                    for bucket in self._buckets]
+
+    @property
+    def durations(self) -> np.ndarray:
+        return self._durations
+
+    @property
+    def batch_size(self) -> int:
+        return self._batch_size
+
+    @property
+    def max_seconds(self) -> Optional[float]:
+        return self._max_seconds
+
+    @property
+    def num_buckets(self) -> int:
+        return self._num_buckets
+
+    @property
+    def shuffle(self) -> bool:
+        return self._shuffle
+
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+    @property
+    def drop_last(self) -> bool:
+        return self._drop_last
+
+    def _bucket_batch_size(self, bucket: np.ndarray) -> int:
+        """
+        Computes the number of samples per batch of a bucket.
+
+        Args:
+            bucket (np.ndarray): The indices of the samples of the bucket.
+
+        Returns:
+            int: batch_size, lowered so that batches padded to the longest
+            clip of the bucket stay within max_seconds.
+        """
+        if self.max_seconds is None:
+            return self.batch_size
+        longest = self._durations[bucket].max()
+        if longest <= 0:
+            return self.batch_size
+        return int(min(self.batch_size,
+                       max(1, self.max_seconds // longest)))
+
+    def _num_batches(self, bucket_size: int, batch_size: int) -> int:
+        if self.drop_last:
+            return bucket_size // batch_size
+        return -(-bucket_size // batch_size)
+
+    def __iter__(self) -> Iterator[List[int]]:
+        """
+        Returns:
+            iterator: The indices of the samples of every batch.
+        """
+        rng = np.random.default_rng([self.seed, self.epoch])
+        batches = []
+        for bucket, batch_size in zip(self._buckets,
+                                      self._bucket_batch_sizes):
+            if self.shuffle:
+                bucket = rng.permutation(bucket)
+            num_batches = self._num_batches(len(bucket), batch_size)
+            for i in range(num_batches):
+                batches.append(bucket[i * batch_size:(i + 1) * batch_size])
+
+        order = (rng.permutation(len(batches)) if self.shuffle
+                 else range(len(batches)))
+        for i in order:
+            yield batches[i].tolist()
+
+    def __len__(self) -> int:
+        """
+        Returns:
+            int: The number of batches per epoch.
+        """
+        return sum(self._num_batches(len(bucket), batch_size)
+                   for bucket, batch_size in zip(self._buckets,
+                                                 self._bucket_batch_sizes))
@@ -1,8 +1,12 @@
 from src.preprocessingABC import PreprocessingTechniqueABC
 from PIL import Image
+import numpy as np
+from typing import Tuple
 
 
 class CenterCrop(PreprocessingTechniqueABC):
+    deterministic = True
+
     def __init__(self, width: int, height: int) -> None:
         if not isinstance(width, int) or not isinstance(height, int):
             raise TypeError("Width and height must be integers")
@@ -20,24 +24,48 @@ class CenterCrop(PreprocessingTechniqueABC):
     def width(self):
         return self._width
 
-    def __call__(self, image: Image) -> Image:
+    def crop_box(self, w: int, h: int) -> Tuple[int, int, int, int]:
         """
-        Performs center cropping on the input image.
+        Computes the crop box for an image of the given size.
 
         Args:
-            image (PIL.Image.Image): The input image.
+            w (int): The width of the image.
+
+            h (int): The height of the image.
 
         Returns:
-            PIL.Image.Image: The center-cropped image.
+            tuple (int, int, int, int): The left, top, right and bottom
+            coordinates of the crop.
         """
-        if not isinstance(image, Image.Image):
-            raise TypeError("The input must be a PIL.Image.Image")
-
-        w, h = image.size
-
         top = max(0, (h - self.height) // 2)
         left = max(0, (w - self.width) // 2)
         bottom = min(h, top + self.height)
         right = min(w, left + self.width)
+        return left, top, right, bottom
+
+    def __call__(self, image: Image.Image | np.ndarray
+                 ) -> Image.Image | np.ndarray:
+        """
+        Performs center cropping on the input image.
+
+        Args:
+            image (PIL.Image.Image or np.ndarray): The input image, or
+            images as an (H, W, C) array or an (N, H, W, C) batch.
 
-        return image.crop((left, top, right, bottom))
+        Returns:
+            PIL.Image.Image or np.ndarray: The center-cropped image. Arrays
+            are cropped by slicing, so the result is a view of the input.
+        """
+        if isinstance(image, np.ndarray):
+            if image.ndim not in [3, 4]:
+                raise ValueError("Arrays must be (H, W, C) or (N, H, W, C)")
+            h, w = image.shape[-3:-1]
+            left, top, right, bottom = self.crop_box(w, h)
+            return image[..., top:bottom, left:right, :]
+
+        if not isinstance(image, Image.Image):
+            raise TypeError("The input must be a PIL.Image.Image or an "
+                            "np.ndarray")
+
+        w, h = image.size
+        return image.crop(self.crop_box(w, h))
@@ -0,0 +1,189 @@
+import numpy as np
+from PIL import Image
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class Collator:
+    """
+    A callable class that stacks a batch of samples into NumPy arrays.
+
+    Images are written into one contiguous (N, H, W, C) uint8 array. Audio
+    clips are zero-padded into an (N, T) float32 array, returned together
+    with the length and sampling rate of every clip. Numeric labels, if
+    present, are returned as a NumPy array.
+
+    The arrays are views into buffers that are reused across batches, so a
+    batch is only valid until the next call. Copy it to keep it longer.
+
+    Attributes:
+        _buffers (Dict[str, np.ndarray]): The flat buffers the data and the
+        labels of a batch are written into.
+    """
+    def __init__(self) -> None:
+        self._buffers: Dict[str, np.ndarray] = {}
+
+    def _get_buffer(self, shape: Tuple[int, ...], dtype: np.dtype,
+                    name: str = "data") -> np.ndarray:
+        """
+        Returns a contiguous view of the given shape into a reused buffer,
+        growing the buffer if it is too small.
+
+        Args:
+            shape (Tuple[int, ...]): The shape of the requested array.
+
+            dtype (np.dtype): The data type of the requested array.
+
+            name (str): The buffer to use, "data" or "labels".
+
+        Returns:
+            np.ndarray: A view of the buffer with the given shape.
+        """
+        size = int(np.prod(shape))
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.dtype != dtype or buffer.size < size:
+            buffer = np.empty(size, dtype=dtype)
+            self._buffers[name] = buffer
+        return buffer[:size].reshape(shape)
+
+    @staticmethod
+    def _split_labels(batch: List[Any]) -> Tuple[List[Any],
+                                                 Optional[List[Any]]]:
+        """
+        Separates the data from the labels of a batch of samples.
+
+        Args:
+            batch (List): The samples, either data or (data, label) tuples.
+
+        Returns:
+            tuple: The list of data and the list of labels, or None if the
+            samples have no labels.
+        """
+        first = batch[0]
+        # An unlabeled audio sample is a (1-D np.ndarray, int) tuple itself,
+        # or (None, None) if it failed to load
+        is_audio = (isinstance(first, tuple)
+                    and (isinstance(first[0], np.ndarray)
+                         and first[0].ndim == 1
+                         or first[0] is None and first[1] is None))
+        if isinstance(first, tuple) and not is_audio:
+            data, labels = zip(*batch)
+            return list(data), list(labels)
+        return batch, None
+
+    @staticmethod
+    def _image_shape(image: Any) -> Tuple[int, ...]:
+        """
+        Reads the shape of an image as an array, without converting it.
+
+        Args:
+            image: A PIL image or an (H, W, C) array.
+
+        Returns:
+            tuple: The (H, W) or (H, W, C) shape.
+        """
+        if isinstance(image, np.ndarray):
+            return image.shape
+        bands = len(image.getbands())
+        return ((image.height, image.width) if bands == 1
+                else (image.height, image.width, bands))
+
+    def _collate_images(self, images: List[Any]) -> np.ndarray:
+        """
+        Stacks images into an (N, H, W, C) uint8 array. Arrays are copied
+        straight into the buffer, PIL images one at a time.
+
+        Args:
+            images (List): The images, as PIL images or (H, W, C) arrays.
+
+        Returns:
+            np.ndarray: The stacked images.
+        """
+        shape = self._image_shape(images[0])
+        if any(self._image_shape(image) != shape for image in images):
+            raise ValueError("All images in a batch must have the same size, "
+                             "crop or pad them before collating")
+
+        out = self._get_buffer((len(images),) + shape, np.uint8)
+        for i, image in enumerate(images):
+            out[i] = image
+        if len(shape) == 2:
+            return out[..., np.newaxis]
+        return out
+
+    def _collate_audio(self, clips: List[Tuple[np.ndarray, int]]
+                       ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pads audio clips into an (N, T) float32 array, where T is the length
+        of the longest clip.
+
+        Args:
+            clips (List[Tuple[np.ndarray, int]]): The audio time series and
+            their sampling rates.
+
+        Returns:
+            tuple (np.ndarray, np.ndarray, np.ndarray): The padded audio, the
+            length of every clip and the sampling rate of every clip.
+        """
+        lengths = np.array([len(audio_ts) for audio_ts, _ in clips],
+                           dtype=np.int64)
+        sample_rates = np.array([sr for _, sr in clips], dtype=np.int64)
+
+        out = self._get_buffer((len(clips), int(lengths.max())), np.float32)
+        for i, (audio_ts, _) in enumerate(clips):
+            out[i, :lengths[i]] = audio_ts
+            out[i, lengths[i]:] = 0
+        return out, lengths, sample_rates
+
+    def _collate_labels(self, labels: List[Any]) -> np.ndarray:
+        """
+        Stacks numeric labels into the reused label buffer. Other labels,
+        e.g. strings, are converted to a new array.
+
+        Args:
+            labels (List): The labels of the batch.
+
+        Returns:
+            np.ndarray: The labels.
+        """
+        dtype = np.asarray(labels[0]).dtype
+        if dtype.kind not in "biuf":
+            return np.asarray(labels)
+        out = self._get_buffer((len(labels),), dtype, "labels")
+        for i, label in enumerate(labels):
+            out[i] = label
+        return out
+
+    def __call__(self, batch: List[Any]) -> Any:
+        """
+        Collates a batch of samples into NumPy arrays.
+
+        Args:
+            batch (List): The samples of the batch, as returned by a dataset.
+
+        Returns:
+            The collated batch, mirroring the structure of a sample:
+            images or (images, labels) for image data, and
+            (audio, lengths, sample_rates) or
+            ((audio, lengths, sample_rates), labels) for audio data.
+        """
+        if len(batch) == 0:
+            raise ValueError("Cannot collate an empty batch")
+
+        data, labels = self._split_labels(batch)
+        for i, sample in enumerate(data):
+            if sample is None or isinstance(sample, tuple) \
+                    and sample[0] is None:
+                raise ValueError(f"Sample {i} of the batch failed to load, "
+                                 f"remove it before collating")
+
+        if isinstance(data[0], tuple):
+            collated = self._collate_audio(data)
+        elif isinstance(data[0], (Image.Image, np.ndarray)):
+            collated = self._collate_images(data)
+        else:
+            raise TypeError("Samples must be images or (np.ndarray, int) "
+                            "audio tuples")
+
+        if labels is None:
+            return collated
+        return collated, self._collate_labels(labels)
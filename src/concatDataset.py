@@ -0,0 +1,228 @@
+import os
+import bisect
+import numpy as np
+from src.dataset import Dataset
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class ConcatDataset(Dataset):
+    """
+    Several datasets of the same data type read as one.
+
+    A global index is mapped to a source dataset and a local index by a
+    binary search over the cumulative sizes of the sources, so nothing is
+    copied and every source keeps its own storage, caches and transform.
+    The root is the common path of the sources' roots, and the loading
+    method, cache directory and decoder are None unless every source has
+    the same. The transform is None: each source applies its own.
+
+    If every source has integer-encoded labels, they are re-encoded into
+    the sorted union of the class names, so the same class has the same
+    code whatever its source.
+
+    Attributes:
+        _datasets (List[Dataset]): The source datasets.
+        _offsets (np.ndarray): The global index of the first sample of
+        every source, followed by the total number of samples.
+        _code_maps (List[np.ndarray]): For every source, the merged code of
+        each of its label codes, or None if the labels are not encoded.
+        _labeled (List[bool]): Whether every sample of each source has a
+        label.
+    """
+    def __init__(self, datasets: Sequence[Dataset]) -> None:
+        datasets = list(datasets)
+        if not datasets:
+            raise ValueError("datasets must not be empty")
+        for dataset in datasets:
+            if not isinstance(dataset, Dataset):
+                raise TypeError("datasets must be instances of Dataset or "
+                                "its subclasses")
+        if len({dataset.data_type for dataset in datasets}) > 1:
+            raise ValueError("datasets must have the same data type")
+
+        # The base attributes describe all the sources: a setting is only
+        # reported if every source shares it. Loading, caching and
+        # transforms are left to the sources.
+        self._init_composite(os.path.commonpath(
+            [os.path.abspath(dataset.root) for dataset in datasets]),
+            datasets[0].data_type)
+        self._loading_method = self._shared(
+            dataset.loading_method for dataset in datasets)
+        self._cache_dir = self._shared(
+            dataset.cache_dir for dataset in datasets)
+        self._decoder = self._shared(dataset.decoder for dataset in datasets)
+        self._datasets = datasets
+        # Whether every source has labels, decided once so reading a sample
+        # never builds the label array of a view
+        self._labeled = [len(dataset.labels) == len(dataset)
+                         for dataset in datasets]
+        self._offsets = np.concatenate(
+            [[0], np.cumsum([len(dataset) for dataset in datasets])]
+        ).astype(np.int64)
+        self._starts: List[int] = self._offsets[:-1].tolist()
+
+        self._classes: Optional[np.ndarray] = None
+        self._code_maps: Optional[List[np.ndarray]] = None
+        if all(dataset.classes is not None for dataset in datasets):
+            self._classes = np.unique(np.concatenate(
+                [dataset.classes for dataset in datasets]))
+            self._code_maps = [np.searchsorted(self._classes,
+                                               dataset.classes)
+                               for dataset in datasets]
+
+    @staticmethod
+    def _shared(values: Iterable[Any]) -> Any:
+        """
+        Args:
+            values (Iterable): The value of a setting in every source.
+
+        Returns:
+            The value if every source has the same, None otherwise.
+        """
+        values = set(values)
+        return values.pop() if len(values) == 1 else None
+
+    @property
+    def datasets(self) -> List[Dataset]:
+        return list(self._datasets)
+
+    @property
+    def cache_bytes(self) -> int:
+        return sum(dataset.cache_bytes for dataset in self._datasets)
+
+    @property
+    def cache_stats(self) -> Optional[Dict[str, int]]:
+        """
+        Returns:
+            dict: The hits, misses, evictions, items and bytes of the
+            in-memory caches of the sources, summed, or None if no source
+            has one.
+        """
+        stats = [dataset.cache_stats for dataset in self._datasets
+                 if dataset.cache_stats is not None]
+        if not stats:
+            return None
+        return {key: sum(source[key] for source in stats)
+                for key in stats[0]}
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return self._offsets
+
+    @property
+    def data(self) -> List:
+        return [sample for dataset in self._datasets
+                for sample in dataset.data]
+
+    @property
+    def labels(self) -> List[Any] | np.ndarray:
+        """
+        Returns:
+            np.ndarray or List: The labels of all the sources, in order, or
+            an empty list if a source has no labels.
+        """
+        if not all(self._labeled):
+            return []
+        labels = [dataset.labels for dataset in self._datasets]
+        if self._code_maps is not None:
+            return np.concatenate([code_map[np.asarray(source)]
+                                   for code_map, source in zip(
+                                       self._code_maps, labels)])
+        if all(isinstance(source, np.ndarray) for source in labels):
+            return np.concatenate(labels)
+        return [label for source in labels for label in source]
+
+    def _load_data(self) -> None:
+        """
+        Does nothing: the samples are loaded by the source datasets.
+
+        Returns:
+            None
+        """
+        pass
+
+    def locate(self, index: int) -> Tuple[int, int]:
+        """
+        Maps a global index to its source.
+
+        Args:
+            index (int): The index of the data sample.
+
+        Returns:
+            tuple (int, int): The position of the source dataset and the
+            index of the sample in it.
+        """
+        index = self._check_index(index)
+        source = bisect.bisect_right(self._starts, index) - 1
+        return source, index - self._starts[source]
+
+    def locate_many(self, indices: Any) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Maps global indices to their sources in one vectorized search.
+
+        Args:
+            indices (array-like): Non-negative indices of data samples.
+
+        Returns:
+            tuple (np.ndarray, np.ndarray): The position of the source
+            dataset and the local index of every sample.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if np.any((indices < 0) | (indices >= len(self))):
+            raise IndexError("Dataset index out of range")
+        sources = np.searchsorted(self._offsets, indices, side="right") - 1
+        return sources, indices - self._offsets[sources]
+
+    def _getitem(self, index: int) -> Tuple[Any, Any]:
+        """
+        Retrieves the data sample at the specified global index.
+
+        Args:
+            index (int): The index of the data sample.
+
+        Returns:
+            tuple or object: The data sample and its corresponding
+            label (if available).
+        """
+        source, local = self.locate(index)
+        item = self._datasets[source]._getitem(local)
+        if self._code_maps is None or not self._labeled[source]:
+            return item
+        data, label = item
+        return data, self._code_maps[source][label]
+
+    def warm_up(self) -> None:
+        """
+        Decodes and caches the samples of the sources with the "cached"
+        loading method.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        for dataset in self._datasets:
+            if dataset.loading_method == "cached":
+                dataset.warm_up()
+
+    def durations(self) -> np.ndarray:
+        """
+        Args:
+            None
+
+        Returns:
+            np.ndarray: The duration of every sample in seconds.
+        """
+        return np.concatenate([dataset.durations()
+                               for dataset in self._datasets])
+
+    def __len__(self) -> int:
+        """
+        Args:
+            None
+
+        Returns:
+            An int representing the total number of samples of the sources
+        """
+        return int(self._offsets[-1])
@@ -1,18 +1,64 @@
 from abc import ABC, abstractmethod
-import random
-import librosa
-from PIL import Image
-from typing import Optional, List, Any, Tuple, Callable
+import os
+import hashlib
+import operator
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Any, Tuple, Callable, Dict, Iterator
 import numpy as np
+from src.pathIndex import PathIndex
+from src.memmapCache import MemmapCache
+from src.memoryCache import MemoryCache
+from src.sharedArena import SharedArena
+from src.transformCache import TransformCache
+from src.executors import make_executor, map_chunksize
+from src.audioMetadata import AudioMetadataIndex
+from src.preprocessingABC import PreprocessingTechniqueABC
+from src.pipeline import PreprocessingPipeline
+from src.randomAudioCrop import RandomAudioCrop
+from src.instrumentation import timed
+from src.decoders import (DEFAULT_DECODERS, decode_audio_librosa,
+                          decode_audio_soundfile, get_decoder)
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "datasets_manager")
+
+
+def _probe_image_shape(filepath: str) -> Tuple[int, ...]:
+    """
+    Reads the shape of the decoded array of an image from its header.
+
+    Args:
+        filepath (str): The path of the image.
+
+    Returns:
+        tuple: (H, W, 3), or an empty tuple if the header cannot be read.
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(filepath) as image:
+            return image.height, image.width, 3
+    except Exception:
+        return ()
 
 
 class Dataset(ABC):
     def __init__(self, root: str,
                  data_type: str = "image",
                  loading_method: str = "lazy",
-                 data: Optional[List[str | Image.Image | Tuple[np.ndarray,
-                                                               int]]] = None,
-                 labels: Optional[List[str | int]] = None) -> None:
+                 data: Optional[List[Any]] = None,
+                 labels: Optional[List[str | int] | np.ndarray] = None,
+                 cache_dir: Optional[str] = None,
+                 cache_bytes: int = 0,
+                 cache_policy: str = "lru",
+                 num_workers: int = 0,
+                 backend: str = "thread",
+                 progress: bool = False,
+                 transform: Optional[PreprocessingTechniqueABC] = None,
+                 metadata_path: Optional[str] = None,
+                 decoder: Optional[str] = None,
+                 transform_cache_dir: Optional[str] = None,
+                 transform_cache_identity: str = "stat") -> None:
 
         if not isinstance(root, str):
             raise ValueError("root must be a string")
@@ -22,15 +68,119 @@ class Dataset(ABC):
             raise ValueError("data_type must be in 'image' or 'audio'")
         self._data_type = data_type
 
-        if loading_method not in ["lazy", "eager"]:
-            raise ValueError("loading_method must be 'lazy' or 'eager'")
+        if loading_method not in ["lazy", "eager", "cached", "shared"]:
+            raise ValueError("loading_method must be 'lazy', 'eager', "
+                             "'cached' or 'shared'")
         self._loading_method = loading_method
 
-        self._data = data if data is not None else []
+        if cache_dir is not None and not isinstance(cache_dir, str):
+            raise ValueError("cache_dir must be a string or None")
+        self._cache_dir = (cache_dir if cache_dir is not None
+                           else DEFAULT_CACHE_DIR)
+        self._cache: Optional[MemmapCache] = None
+
+        if not isinstance(cache_bytes, int) or cache_bytes < 0:
+            raise ValueError("cache_bytes must be a non-negative integer")
+        if cache_bytes > 0 and loading_method != "lazy":
+            raise ValueError("cache_bytes requires the 'lazy' loading method")
+        if cache_policy not in ["lru", "lfu"]:
+            raise ValueError("cache_policy must be 'lru' or 'lfu'")
+        self._memory_cache = (MemoryCache(cache_bytes, cache_policy)
+                              if cache_bytes > 0 else None)
+
+        if not isinstance(num_workers, int) or num_workers < 0:
+            raise ValueError("num_workers must be a non-negative integer")
+        if backend not in ["thread", "process"]:
+            raise ValueError("backend must be 'thread' or 'process'")
+        if not isinstance(progress, bool):
+            raise ValueError("progress must be a boolean")
+        self._num_workers = num_workers
+        self._backend = backend
+        self._progress = progress
+
+        if transform is not None and not isinstance(
+                transform, PreprocessingTechniqueABC):
+            raise TypeError("transform must be a preprocessing technique")
+        self._transform = transform
+        self._audio_metadata = AudioMetadataIndex(metadata_path)
+
+        if decoder is not None and not isinstance(decoder, str):
+            raise ValueError("decoder must be a string or None")
+        self._decoder = (decoder if decoder is not None
+                         else DEFAULT_DECODERS[data_type])
+        # Unknown decoder names are rejected here
+        get_decoder(data_type, self._decoder)
+        self._window_crop, self._transform_tail = self._split_window(
+            transform)
+
+        if transform_cache_dir is not None and not isinstance(
+                transform_cache_dir, str):
+            raise ValueError("transform_cache_dir must be a string or None")
+        if transform_cache_dir is not None and loading_method not in [
+                "lazy", "cached"]:
+            raise ValueError("transform_cache_dir requires the 'lazy' or "
+                             "'cached' loading method")
+        self._transform_cache: Optional[TransformCache] = None
+        self._prefix_steps, self._prefix_tail = self._split_deterministic(
+            transform)
+        if transform_cache_dir is not None and self._prefix_steps:
+            self._transform_cache = TransformCache(
+                transform_cache_dir, self._prefix_steps, data_type,
+                self._decoder, transform_cache_identity)
+
+        self._extension, self._loader = self._get_extension_and_loader()
+
+        if loading_method in ["lazy", "cached", "shared"]:
+            # Lazy and cached datasets only keep paths, stored in a compact
+            # index. Shared datasets replace them with the arena below.
+            self._data = (PathIndex.from_paths(data) if data is not None
+                          else PathIndex(os.path.join(root, "")))
+        else:
+            self._data = data if data is not None else []
         self._labels = labels if labels is not None else []
+        # Class names of integer-encoded labels, set by the subclasses that
+        # encode them
+        self._classes: Optional[np.ndarray] = None
 
         if data is None:
             self._load_data()
+        if (self._transform_cache is not None
+                and not isinstance(self._data, PathIndex)):
+            raise ValueError("transform_cache_dir requires a dataset of file "
+                             f"paths, {type(self).__name__} does not hold "
+                             "paths")
+
+        if loading_method == "cached":
+            # The cache is keyed by the file list, so a dataset with other
+            # files or another order never reads stale samples. Files
+            # rewritten in place are detected by their size and mtime.
+            name = f"{data_type}-{self._data.digest()}"
+            if self._decoder != DEFAULT_DECODERS[data_type]:
+                name = f"{name}-{self._decoder}"
+            directory = os.path.join(self._cache_dir, name)
+            self._cache = MemmapCache(directory, len(self._data), data_type)
+
+        if loading_method == "shared":
+            self._data = self._build_arena()
+
+    def _init_composite(self, root: str, data_type: str) -> None:
+        """
+        Initializes a dataset whose samples are read from other datasets,
+        e.g. a concatenation, instead of the constructor. Every base
+        attribute gets its default value, as in a lazy dataset without
+        files, and nothing is listed or loaded. The subclass then sets the
+        attributes it derives from its sources and overrides the data
+        access.
+
+        Args:
+            root (str): The root reported for the dataset.
+
+            data_type (str): Either "image" or "audio".
+
+        Returns:
+            None
+        """
+        Dataset.__init__(self, root, data_type, data=[])
 
     @property
     def root(self) -> str:
@@ -44,22 +194,102 @@ class Dataset(ABC):
     def loading_method(self) -> str:
         return self._loading_method
 
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir
+
+    @property
+    def cache_bytes(self) -> int:
+        return (self._memory_cache.max_bytes
+                if self._memory_cache is not None else 0)
+
+    @property
+    def cache_policy(self) -> str:
+        return (self._memory_cache.policy
+                if self._memory_cache is not None else "lru")
+
+    @property
+    def cache_stats(self) -> Optional[Dict[str, int]]:
+        """
+        Returns:
+            dict: The hits, misses, evictions, items and bytes of the
+            in-memory cache, or None if the cache is disabled.
+        """
+        if self._memory_cache is None:
+            return None
+        return self._memory_cache.stats
+
+    @property
+    def num_workers(self) -> int:
+        return self._num_workers
+
+    @num_workers.setter
+    def num_workers(self, value: int) -> None:
+        if not isinstance(value, int) or value < 0:
+            raise ValueError("num_workers must be a non-negative integer")
+        self._num_workers = value
+
+    @property
+    def backend(self) -> str:
+        return self._backend
+
+    @backend.setter
+    def backend(self, value: str) -> None:
+        if value not in ["thread", "process"]:
+            raise ValueError("backend must be 'thread' or 'process'")
+        self._backend = value
+
+    @property
+    def progress(self) -> bool:
+        return self._progress
+
+    @progress.setter
+    def progress(self, value: bool) -> None:
+        if not isinstance(value, bool):
+            raise ValueError("progress must be a boolean")
+        self._progress = value
+
+    @property
+    def transform(self) -> Optional[PreprocessingTechniqueABC]:
+        return self._transform
+
+    @property
+    def decoder(self) -> str:
+        return self._decoder
+
+    @property
+    def transform_cache(self) -> Optional[TransformCache]:
+        return self._transform_cache
+
+    @property
+    def audio_metadata(self) -> AudioMetadataIndex:
+        return self._audio_metadata
+
     @property
     def data(self) -> List:
-        return self._data.copy()
+        return list(self._data)
 
     @data.setter
     def data(self, value) -> None:
         self._data = value
 
     @property
-    def labels(self) -> List[str | int]:
+    def labels(self) -> List[str | int] | np.ndarray:
         return self._labels
 
     @labels.setter
     def labels(self, value) -> None:
         self._labels = value
 
+    @property
+    def classes(self) -> Optional[np.ndarray]:
+        """
+        Returns:
+            np.ndarray: The class names, indexed by the integer labels of a
+            classification dataset, or None if the labels are not encoded.
+        """
+        return self._classes
+
     @abstractmethod
     def _load_data(self) -> None:
         """
@@ -70,15 +300,78 @@ class Dataset(ABC):
         """
         pass
 
-    def _handle_load_method(self, load_method: Callable[[str], Any],
-                            filepath: str) -> None:
+    def _report_progress(self, done: int, total: int) -> None:
+        """
+        Prints how many files were decoded, roughly every 10% of the total,
+        if progress reporting is enabled.
+
+        Args:
+            done (int): The number of files decoded so far.
+
+            total (int): The total number of files to decode.
+
+        Returns:
+            None
+        """
+        step = max(1, total // 10)
+        if self.progress and (done % step == 0 or done == total):
+            print(f"Loaded {done}/{total} files")
+
+    def _map_files(self, function: Callable[[str], Any],
+                   filepaths: List[str]) -> Iterator[Any]:
+        """
+        Applies a function to files, over num_workers workers if
+        num_workers is positive. With the "process" backend, function must
+        be picklable.
+
+        Args:
+            function (function): The function applied to every file path.
+
+            filepaths (List[str]): The file paths to the data.
+
+        Returns:
+            iterator: The results, in the order of filepaths.
+        """
+        if self.num_workers == 0:
+            yield from map(function, filepaths)
+            return
+
+        chunksize = map_chunksize(self.backend, self.num_workers,
+                                  len(filepaths))
+        with make_executor(self.backend, self.num_workers) as executor:
+            yield from executor.map(function, filepaths, chunksize=chunksize)
+
+    def _decode_files(self, load_method: Callable[[str], Any],
+                      filepaths: List[str]) -> Iterator[Any]:
         """
-        Handles the loading of the data based on the loading method.
+        Decodes files, in parallel if num_workers is positive, reporting
+        progress along the way.
 
         Args:
             load_method (function): The method used to load data.
 
-            filepath (str): The file path to the data.
+            filepaths (List[str]): The file paths to the data.
+
+        Returns:
+            iterator: The decoded files, in the order of filepaths.
+        """
+        total = len(filepaths)
+        decoded = self._map_files(load_method, filepaths)
+        for done, data in enumerate(decoded, start=1):
+            self._report_progress(done, total)
+            yield data
+
+    def _load_files(self, load_method: Callable[[str], Any],
+                    filepaths: List[str]) -> None:
+        """
+        Handles the loading of several files based on the loading method.
+        Eager datasets decode the files over num_workers workers, keeping
+        the order of filepaths.
+
+        Args:
+            load_method (function): The method used to load data.
+
+            filepaths (List[str]): The file paths to the data.
 
         Returns:
             None
@@ -86,14 +379,63 @@ class Dataset(ABC):
         if not callable(load_method):
             raise TypeError("load_method must be callable")
 
-        if not isinstance(filepath, str):
-            raise TypeError("filepath must be a string")
-
         if self.loading_method == "eager":
-            data = load_method(filepath)
-            self._data.append(data)
-        elif self.loading_method == "lazy":
-            self._data.append(filepath)
+            self._data.extend(self._decode_files(load_method, filepaths))
+        else:
+            self._data.extend(filepaths)
+
+    def _probe_shapes(self, filepaths: List[str]) -> List[Tuple[int, ...]]:
+        """
+        Reads the shape of the decoded array of every file from its header,
+        without decoding it, over num_workers workers.
+
+        Args:
+            filepaths (List[str]): The file paths to the data.
+
+        Returns:
+            List[tuple]: (H, W, 3) for an image, (frames,) for an audio
+            file, or an empty tuple if the header cannot be read.
+        """
+        if self.data_type == "image":
+            return list(self._map_files(_probe_image_shape, filepaths))
+
+        def probe_audio(filepath: str) -> Tuple[int, ...]:
+            try:
+                return (self._audio_metadata.get(filepath).frames,)
+            except Exception:
+                return ()
+
+        # The metadata index lives in this process, so threads share it
+        with ThreadPoolExecutor(max_workers=self.num_workers or 1) as pool:
+            shapes = list(pool.map(probe_audio, filepaths))
+        self._audio_metadata.save()
+        return shapes
+
+    def _build_arena(self) -> SharedArena:
+        """
+        Attaches to the shared memory arena of the dataset's files, or
+        builds it by decoding the files over num_workers workers. The arena
+        is named after the file list and the decoder, so every process
+        opening the same dataset on the node shares it.
+
+        Args:
+            None
+
+        Returns:
+            SharedArena: The arena holding the decoded samples.
+        """
+        key = hashlib.sha1(f"{self._data.digest()}-{self._decoder}".encode(
+            "utf-8")).hexdigest()[:20]
+        name = f"dm-{key}"
+        try:
+            return SharedArena.attach(name)
+        except FileNotFoundError:
+            pass
+
+        filepaths = list(self._data)
+        shapes = self._probe_shapes(filepaths)
+        return SharedArena.build(name, self.data_type, shapes,
+                                 self._decode_files(self._loader, filepaths))
 
     def __getitem__(self, index: int) -> Tuple[Any, Any]:
         """
@@ -106,56 +448,305 @@ class Dataset(ABC):
             tuple or object: The data sample and its corresponding
             label (if available).
         """
-        _, loading_method = self._get_extension_and_loader()
-        data = self.data[index]
-        label = self.labels[index] if self.labels else None
-        if self.loading_method == "eager":
+        with timed("dataset.getitem"):
+            return self._getitem(index)
+
+    def _getitem(self, index: int) -> Tuple[Any, Any]:
+        """
+        Retrieves the data sample at the specified index, applying the
+        transform if there is one.
+
+        Args:
+            index (int): The index of the data sample.
+
+        Returns:
+            tuple or object: The data sample and its corresponding
+            label (if available).
+        """
+        label = self._labels[index] if len(self._labels) else None
+        if self._transform_cache is not None:
+            data = self._get_prefixed(index)
+            if self._prefix_tail is not None:
+                data = self._prefix_tail(data)
             return (data, label) if label is not None else data
-        else:
-            data = loading_method(data)
+
+        if self.loading_method in ["eager", "shared"]:
+            data = self._data[index]
+        elif self.loading_method == "cached":
+            data = self._get_cached(index)
+        elif self._window_crop is not None and self._memory_cache is None:
+            # Only the cropped window is read from disk
+            data = self._load_audio_window(self._data[index],
+                                           self._window_crop)
+            for step in self._transform_tail:
+                data = step(data)
             return (data, label) if label is not None else data
+        else:
+            data = self._get_lazy(index)
 
-    def _load_image(self, filepath: str) -> Image:
+        if self._transform is not None:
+            data = self._transform(data)
+        return (data, label) if label is not None else data
+
+    @staticmethod
+    def _split_deterministic(transform: Optional[PreprocessingTechniqueABC]
+                             ) -> Tuple[Tuple[PreprocessingTechniqueABC, ...],
+                                        Optional[PreprocessingTechniqueABC]]:
         """
-        Loads an image from the specified file path.
+        Splits the transform into its longest deterministic prefix and the
+        steps to run on every call.
 
         Args:
-            filepath (str): The file path to the image.
+            transform (PreprocessingTechniqueABC): The transform of the
+            dataset.
 
         Returns:
-            PIL.Image.Image: The loaded image. If the loading fails,
-            returns None.
+            tuple: The deterministic leading steps, and the rest of the
+            transform, or None if there is no rest.
         """
-        try:
-            return Image.open(filepath).convert("RGB")
-        except IOError as e:
-            print(f"Error loading image {filepath}: {e}")
-            return None
+        if isinstance(transform, PreprocessingPipeline):
+            return transform.split_deterministic()
+        if transform is not None and transform.deterministic:
+            return (transform,), None
+        return (), transform
+
+    def _get_prefixed(self, index: int) -> Any:
+        """
+        Returns the output of the deterministic prefix of the transform for
+        a sample, from the transform cache if it holds it, otherwise by
+        loading the sample, running the prefix and caching the output.
+
+        Args:
+            index (int): The index of the data sample.
 
-    def _load_audio(self, filepath: str):
+        Returns:
+            The output of the prefix in its cached form: an (H, W, C) array
+            for images, an (np.ndarray, int) tuple for audio.
         """
-        Loads audio data from the specified file path.
+        index = self._check_index(index)
+        key = self._transform_cache.key(self._data[index])
+        with timed("transform_cache.read"):
+            data = self._transform_cache.get(key)
+        if data is not None:
+            return data
+
+        data = (self._get_cached(index) if self.loading_method == "cached"
+                else self._get_lazy(index))
+        for step in self._prefix_steps:
+            data = step(data)
+        cached = self._transform_cache.put(key, data)
+        # A sample that failed to load is returned as is
+        return cached if cached is not None else data
+
+    def _split_window(self, transform: Optional[PreprocessingTechniqueABC]
+                      ) -> Tuple[Optional[RandomAudioCrop],
+                                 List[PreprocessingTechniqueABC]]:
+        """
+        Detects an audio transform starting with a RandomAudioCrop, whose
+        window can be chosen before the file is decoded. Windows are read
+        with soundfile, so only datasets using one of the built-in WAV
+        decoders qualify: other decoders decode the whole file and crop it.
+
+        Args:
+            transform (PreprocessingTechniqueABC): The transform of the
+            dataset.
+
+        Returns:
+            tuple: The leading RandomAudioCrop and the steps after it, or
+            (None, []) if the transform does not start with one.
+        """
+        if self.data_type != "audio":
+            return None, []
+        _, decode = get_decoder(self.data_type, self._decoder)
+        if decode not in [decode_audio_librosa, decode_audio_soundfile]:
+            return None, []
+        if isinstance(transform, RandomAudioCrop):
+            return transform, []
+        if (isinstance(transform, PreprocessingPipeline) and transform.plan
+                and isinstance(transform.plan[0], RandomAudioCrop)):
+            return transform.plan[0], list(transform.plan[1:])
+        return None, []
+
+    def _load_audio_window(self, filepath: str,
+                           crop: RandomAudioCrop) -> Tuple[np.ndarray, int]:
+        """
+        Loads a random window of an audio file, reading only that window
+        from disk. The window is drawn from the length found in the audio
+        metadata index, exactly as crop would draw it from the decoded
+        track. Files soundfile cannot seek in are decoded whole and cropped.
 
         Args:
             filepath (str): The file path to the audio data.
 
+            crop (RandomAudioCrop): The crop choosing the window.
+
         Returns:
-            tuple (np.ndarray, int): Tuple containing the audio time series
-            and its sampling rate.
+            tuple (np.ndarray, int): Tuple containing the cropped audio time
+            series and its sampling rate.
 
             If the loading fails, returns (None, None).
         """
         try:
-            audio_ts, sr = librosa.load(filepath, sr=None)
-            return audio_ts, sr
+            with timed("audio.metadata"):
+                info = self._audio_metadata.get(filepath)
+        except Exception:
+            audio = self._loader(filepath)
+            return crop(audio) if audio[0] is not None else audio
+
+        import soundfile
+
+        start, stop = crop.window(info.frames, info.sample_rate)
+        try:
+            with timed("audio.decode"):
+                audio_ts, sr = soundfile.read(filepath, start=start,
+                                              stop=stop, dtype="float32",
+                                              always_2d=True)
         except Exception as e:
             print(f"Error loading audio {filepath}: {e}")
             return None, None
+        # Down-mix like librosa.load does
+        audio_ts = audio_ts.mean(axis=1) if info.channels > 1 \
+            else audio_ts[:, 0]
+        return np.ascontiguousarray(audio_ts), sr
+
+    def _check_index(self, index: int) -> int:
+        """
+        Validates an index and converts it to a non-negative one.
+
+        Args:
+            index (int): The index of the data sample.
+
+        Returns:
+            int: The equivalent index in [0, len(self)).
+        """
+        index = operator.index(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Dataset index out of range")
+        return index
+
+    def _get_lazy(self, index: int) -> Any:
+        """
+        Loads a sample from disk, going through the in-memory cache if it
+        is enabled.
+
+        Args:
+            index (int): The index of the data sample.
+
+        Returns:
+            The loaded sample.
+        """
+        if self._memory_cache is None:
+            return self._loader(self._data[index])
+
+        index = self._check_index(index)
+        data = self._memory_cache.get(index)
+        if data is None:
+            data = self._loader(self._data[index])
+            self._memory_cache.put(index, data)
+        return data
+
+    def _get_cached(self, index: int) -> Any:
+        """
+        Retrieves a sample from the disk cache, decoding and caching it
+        first if needed.
+
+        Args:
+            index (int): The index of the data sample.
+
+        Returns:
+            The sample as a read-only memory-mapped array for images, or an
+            (np.ndarray, int) tuple for audio.
+        """
+        index = self._check_index(index)
+        filepath = self._data[index]
+        stamp = self._file_stamp(filepath)
+        data = self._cache.get(index, stamp)
+        if data is None:
+            data = self._loader(filepath)
+            if self._cache.put(index, data, stamp):
+                data = self._cache.get(index)
+        return data
+
+    @staticmethod
+    def _file_stamp(filepath: str) -> Tuple[int, int]:
+        """
+        Reads the size and modification time of a file, which identify the
+        version of the file a cached sample was decoded from.
+
+        Args:
+            filepath (str): The file path to the data.
+
+        Returns:
+            tuple (int, int): The size and modification time in nanoseconds,
+            or (-1, -1) if the file cannot be read.
+        """
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return -1, -1
+        return stat.st_size, stat.st_mtime_ns
+
+    def warm_up(self) -> None:
+        """
+        Decodes every sample missing from the disk cache, or cached from an
+        older version of its file, and caches it, so later epochs and
+        processes only read memory-mapped samples. Only applies to datasets
+        with the "cached" loading method.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if self.loading_method != "cached":
+            raise ValueError("warm_up requires the 'cached' loading method")
+        stamps = [self._file_stamp(filepath) for filepath in self._data]
+        missing = [index for index in range(len(self))
+                   if not self._cache.fresh(index, stamps[index])]
+        filepaths = [self._data[index] for index in missing]
+        # Decoding runs over num_workers workers, writing stays in this
+        # process
+        for index, data in zip(missing,
+                               self._decode_files(self._loader, filepaths)):
+            self._cache.put(index, data, stamps[index])
+
+    def durations(self) -> np.ndarray:
+        """
+        Returns the duration of every audio sample. Lazy and cached datasets
+        read it from the file headers through the audio metadata index,
+        which is then saved, so no audio is decoded. Eager datasets use the
+        decoded time series.
+
+        Args:
+            None
+
+        Returns:
+            np.ndarray: The duration of every sample in seconds, as float64.
+            Samples that failed to load have a duration of 0.
+        """
+        if self.data_type != "audio":
+            raise ValueError("durations requires the 'audio' data type")
+
+        if self.loading_method in ["eager", "shared"]:
+            return np.array([len(audio_ts) / sr if audio_ts is not None
+                             else 0.0 for audio_ts, sr in self._data],
+                            dtype=np.float64)
+
+        if not isinstance(self._data, PathIndex):
+            raise ValueError("durations requires a dataset of audio files")
+        filepaths = list(self._data)
+        self._audio_metadata.prefetch(filepaths, self.num_workers or None)
+        return np.array([self._audio_metadata.duration(filepath)
+                         for filepath in filepaths], dtype=np.float64)
 
     def _get_extension_and_loader(self):
         """
-        Determine the file extension and whether to load an image or audio
-        file based on the data type.
+        Determine the file pattern and the load method from the decoder
+        registered for the data type under the name of the dataset's
+        decoder.
 
         Args:
             None
@@ -163,12 +754,7 @@ class Dataset(ABC):
         Returns:
             Tuple[str, Callable] of file extension and load method
         """
-        if self.data_type == "image":
-            return ("*.jpg", self._load_image)
-        elif self.data_type == "audio":
-            return ("*.wav", self._load_audio)
-        else:
-            raise ValueError("Invalid data type specified")
+        return get_decoder(self.data_type, self._decoder)
 
     def __len__(self) -> int:
         """
@@ -181,14 +767,73 @@ class Dataset(ABC):
         """
         return len(self._data)
 
-    def split(self, train_size: float = 0.8) -> Tuple['Dataset', 'Dataset']:
+    def subset(self, indices: Any) -> 'Dataset':
+        """
+        Returns a view of some samples of the dataset. The view shares the
+        storage, caches and transform of the dataset, so no data is copied.
+
+        Args:
+            indices (array-like): The indices of the samples of the view.
+
+        Returns:
+            SubsetDataset: The view.
+        """
+        from src.subsetDataset import SubsetDataset
+        return SubsetDataset(self, indices)
+
+    def _label_codes(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: The class of every sample as an integer code.
+        """
+        if len(self.labels) != len(self):
+            raise ValueError("Stratification requires a label for every "
+                             "sample")
+        _, codes = np.unique(np.asarray(self.labels), return_inverse=True)
+        return codes.reshape(-1)
+
+    @staticmethod
+    def _group_by_class(order: np.ndarray,
+                        codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray,
+                                                    np.ndarray]:
+        """
+        Groups indices by class, keeping their order within each class.
+
+        Args:
+            order (np.ndarray): The indices of the samples.
+
+            codes (np.ndarray): The class code of every sample.
+
+        Returns:
+            tuple (np.ndarray, np.ndarray, np.ndarray): The indices grouped
+            by class, the rank of every index within its class, and the
+            number of samples of its class.
+        """
+        grouped = order[np.argsort(codes[order], kind="stable")]
+        grouped_codes = codes[grouped]
+        counts = np.bincount(grouped_codes)
+        starts = np.cumsum(counts) - counts
+        ranks = np.arange(len(grouped)) - starts[grouped_codes]
+        return grouped, ranks, counts[grouped_codes]
+
+    def split(self, train_size: float = 0.8, shuffle: bool = True,
+              seed: Optional[int] = None,
+              stratify: bool = False) -> Tuple['Dataset', 'Dataset']:
         """
-        Split the dataset into training and test sets.
+        Split the dataset into training and test sets. Both sets are views
+        sharing the storage of the dataset.
 
         Args:
             train_size: The proportion of the dataset to include
             in the train split.
 
+            shuffle: Whether to shuffle the samples before splitting.
+
+            seed: The seed of the shuffle. If None, it is random.
+
+            stratify: Whether to keep the proportion of every class in both
+            sets. Requires labels.
+
         Returns:
             Tuple['Dataset', 'Dataset'] A tuple of two instances of the Dataset
             class
@@ -196,34 +841,60 @@ class Dataset(ABC):
         if not (0 < train_size < 1):
             raise ValueError("train_size must be a value between 0 and 1")
 
-        combined = list(zip(self.data, self.labels))
-        random.shuffle(combined)
-        data_shuffled, labels_shuffled = zip(*combined)
+        rng = np.random.default_rng(seed)
+        order = (rng.permutation(len(self)) if shuffle
+                 else np.arange(len(self)))
+
+        if not stratify:
+            split_index = int(len(order) * train_size)
+            return (self.subset(order[:split_index]),
+                    self.subset(order[split_index:]))
 
-        split_index = int(len(data_shuffled) * train_size)
+        grouped, ranks, counts = self._group_by_class(order,
+                                                      self._label_codes())
+        in_train = ranks < (counts * train_size).astype(np.int64)
+        return self.subset(grouped[in_train]), self.subset(grouped[~in_train])
 
-        data_train = data_shuffled[:split_index]
-        data_test = data_shuffled[split_index:]
+    def k_fold(self, k: int = 5, shuffle: bool = True,
+               seed: Optional[int] = None,
+               stratify: bool = False) -> Iterator[Tuple['Dataset',
+                                                         'Dataset']]:
+        """
+        Generates the folds of a k-fold cross-validation. Every sample is
+        in the validation set of exactly one fold. Both sets of every fold
+        are views sharing the storage of the dataset.
+
+        Args:
+            k: The number of folds.
 
-        if self.labels is not None:
-            labels_train = labels_shuffled[:split_index]
-            labels_test = labels_shuffled[split_index:]
+            shuffle: Whether to shuffle the samples before assigning them
+            to folds.
+
+            seed: The seed of the shuffle. If None, it is random.
+
+            stratify: Whether to keep the proportion of every class in every
+            fold. Requires labels.
+
+        Returns:
+            iterator: An iterator over (train, validation) pairs of datasets.
+        """
+        if not isinstance(k, int) or not 2 <= k <= len(self):
+            raise ValueError("k must be an integer between 2 and the "
+                             "number of samples")
+
+        rng = np.random.default_rng(seed)
+        order = (rng.permutation(len(self)) if shuffle
+                 else np.arange(len(self)))
+
+        if stratify:
+            order, ranks, _ = self._group_by_class(order,
+                                                   self._label_codes())
+            folds = ranks % k
         else:
-            labels_train, labels_test = None, None
-
-        train_dataset = self.__class__(
-            self.root,
-            data_type=self.data_type,
-            data=data_train,
-            labels=labels_train,
-            loading_method=self.loading_method,
-        )
-        test_dataset = self.__class__(
-            self.root,
-            data_type=self.data_type,
-            data=data_test,
-            labels=labels_test,
-            loading_method=self.loading_method,
-        )
-
-        return train_dataset, test_dataset
+            folds = np.repeat(np.arange(k), [len(part) for part in
+                                             np.array_split(order, k)])
+
+        for fold in range(k):
+            in_validation = folds == fold
+            yield (self.subset(order[~in_validation]),
+                   self.subset(order[in_validation]))
@@ -0,0 +1,166 @@
+import numpy as np
+from src.instrumentation import timed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# The decoders of every data type, by name: the glob pattern of the files
+# they read and the function decoding a path or a binary file object
+_DECODERS: Dict[str, Dict[str, Tuple[str, Callable[[Any], Any]]]] = {
+    "image": {},
+    "audio": {},
+}
+
+DEFAULT_DECODERS = {"image": "pil", "audio": "librosa"}
+
+
+def register_decoder(data_type: str, name: str, pattern: str,
+                     decode: Callable[[Any], Any]) -> None:
+    """
+    Registers a decoder, which datasets then select by name. A decoder with
+    the same name is replaced.
+
+    Image decoders return a PIL image or an (H, W, C) uint8 array, audio
+    decoders an (np.ndarray, int) tuple of a mono float32 time series and
+    its sampling rate. On failure, they print an error and return None, or
+    (None, None) for audio. To be used with the "process" backend, decode
+    must be a module-level function, so it can be pickled.
+
+    Args:
+        data_type (str): Either "image" or "audio".
+
+        name (str): The name of the decoder, e.g. "soundfile".
+
+        pattern (str): The glob pattern of the files it decodes, e.g.
+        "*.wav".
+
+        decode (Callable): The function decoding a path or a binary file
+        object.
+
+    Returns:
+        None
+    """
+    if data_type not in _DECODERS:
+        raise ValueError("data_type must be in 'image' or 'audio'")
+    if not isinstance(name, str) or not isinstance(pattern, str):
+        raise ValueError("name and pattern must be strings")
+    if not callable(decode):
+        raise TypeError("decode must be callable")
+    _DECODERS[data_type][name] = (pattern, decode)
+
+
+def get_decoder(data_type: str,
+                name: Optional[str] = None) -> Tuple[str, Callable]:
+    """
+    Looks up a registered decoder.
+
+    Args:
+        data_type (str): Either "image" or "audio".
+
+        name (str): The name of the decoder. If None, the default decoder of
+        the data type.
+
+    Returns:
+        tuple (str, Callable): The glob pattern of the files and the
+        decoding function.
+    """
+    if data_type not in _DECODERS:
+        raise ValueError("data_type must be in 'image' or 'audio'")
+    if name is None:
+        name = DEFAULT_DECODERS[data_type]
+    if name not in _DECODERS[data_type]:
+        raise ValueError(f"Unknown {data_type} decoder {name!r}, expected "
+                         f"one of {decoder_names(data_type)}")
+    return _DECODERS[data_type][name]
+
+
+def decoder_names(data_type: str) -> List[str]:
+    """
+    Args:
+        data_type (str): Either "image" or "audio".
+
+    Returns:
+        List[str]: The names of the decoders registered for the data type.
+    """
+    return sorted(_DECODERS.get(data_type, {}))
+
+
+def decode_image_pil(source: Any) -> Any:
+    """
+    Loads an image with Pillow.
+
+    Args:
+        source: The path of the image, or a binary file object.
+
+    Returns:
+        PIL.Image.Image: The loaded RGB image. If the loading fails,
+        returns None.
+    """
+    from PIL import Image
+
+    try:
+        with timed("image.open"):
+            image = Image.open(source)
+        with timed("image.decode"):
+            return image.convert("RGB")
+    except IOError as e:
+        print(f"Error loading image {source}: {e}")
+        return None
+
+
+def decode_audio_librosa(source: Any) -> Tuple[Optional[np.ndarray],
+                                               Optional[int]]:
+    """
+    Loads audio with librosa, at its original sampling rate.
+
+    Args:
+        source: The path of the audio file, or a binary file object.
+
+    Returns:
+        tuple (np.ndarray, int): Tuple containing the audio time series
+        and its sampling rate.
+
+        If the loading fails, returns (None, None).
+    """
+    import librosa
+
+    try:
+        with timed("audio.load"):
+            audio_ts, sr = librosa.load(source, sr=None)
+        return audio_ts, sr
+    except Exception as e:
+        print(f"Error loading audio {source}: {e}")
+        return None, None
+
+
+def decode_audio_soundfile(source: Any) -> Tuple[Optional[np.ndarray],
+                                                 Optional[int]]:
+    """
+    Loads audio with soundfile, which reads WAV files directly through
+    libsndfile and avoids importing librosa. The channels are averaged
+    like librosa.load does.
+
+    Args:
+        source: The path of the audio file, or a binary file object.
+
+    Returns:
+        tuple (np.ndarray, int): Tuple containing the float32 audio time
+        series and its sampling rate.
+
+        If the loading fails, returns (None, None).
+    """
+    import soundfile
+
+    try:
+        with timed("audio.load"):
+            audio_ts, sr = soundfile.read(source, dtype="float32",
+                                          always_2d=True)
+    except Exception as e:
+        print(f"Error loading audio {source}: {e}")
+        return None, None
+    audio_ts = (audio_ts.mean(axis=1) if audio_ts.shape[1] > 1
+                else audio_ts[:, 0])
+    return np.ascontiguousarray(audio_ts), sr
+
+
+register_decoder("image", "pil", "*.jpg", decode_image_pil)
+register_decoder("audio", "librosa", "*.wav", decode_audio_librosa)
+register_decoder("audio", "soundfile", "*.wav", decode_audio_soundfile)
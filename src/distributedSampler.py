@@ -0,0 +1,106 @@
+import numpy as np
+from src.dataset import Dataset
+from typing import Iterator
+from src.epochMixin import EpochMixin
+
+
+class DistributedSampler(EpochMixin):
+    """
+    Splits the indices of a dataset between the processes of a
+    distributed training run, so that every process reads a different,
+    equally sized part of the dataset.
+
+    All ranks shuffle with the same seed and epoch, so they agree on the
+    permutation without communicating; rank r then takes every
+    world_size-th index starting at r. To give every rank the same number
+    of samples, the permutation is either padded by repeating its first
+    indices or truncated (drop_last).
+
+    Call set_epoch at the start of every epoch to get a new shuffle.
+
+    Attributes:
+        _dataset_size (int): The number of samples of the dataset.
+        _world_size (int): The number of processes.
+        _rank (int): The rank of this process, in [0, world_size).
+        _shuffle (bool): Whether to shuffle the indices.
+        _seed (int): The seed shared by all ranks.
+        _drop_last (bool): Whether to drop the tail of the permutation
+        instead of padding it.
+        _epoch (int): The current epoch.
+    """
+    def __init__(self, dataset: Dataset, world_size: int, rank: int,
+                 shuffle: bool = True, seed: int = 0,
+                 drop_last: bool = False) -> None:
+        if not isinstance(dataset, Dataset):
+            raise TypeError("dataset must be an instance of Dataset or its"
+                            "subclass")
+        if not isinstance(world_size, int) or world_size <= 0:
+            raise ValueError("world_size must be a positive integer")
+        if not isinstance(rank, int) or not 0 <= rank < world_size:
+            raise ValueError("rank must be an integer in [0, world_size)")
+        if not isinstance(shuffle, bool):
+            raise ValueError("shuffle must be a boolean")
+        if not isinstance(seed, int):
+            raise ValueError("seed must be an integer")
+        if not isinstance(drop_last, bool):
+            raise ValueError("drop_last must be a boolean")
+
+        self._dataset_size = len(dataset)
+        self._world_size = world_size
+        self._rank = rank
+        self._shuffle = shuffle
+        self._seed = seed
+        self._drop_last = drop_last
+        self._epoch = 0
+
+    @property
+    def world_size(self) -> int:
+        return self._world_size
+
+    @property
+    def rank(self) -> int:
+        return self._rank
+
+    @property
+    def shuffle(self) -> bool:
+        return self._shuffle
+
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+    @property
+    def drop_last(self) -> bool:
+        return self._drop_last
+
+    def _total_size(self) -> int:
+        if self.drop_last:
+            return (self._dataset_size // self.world_size) * self.world_size
+        return -(-self._dataset_size // self.world_size) * self.world_size
+
+    def __iter__(self) -> Iterator[int]:
+        """
+        Returns:
+            iterator: The indices of the samples of this rank.
+        """
+        if self.shuffle:
+            rng = np.random.default_rng([self.seed, self.epoch])
+            indices = rng.permutation(self._dataset_size)
+        else:
+            indices = np.arange(self._dataset_size)
+
+        total_size = self._total_size()
+        if total_size > len(indices) and len(indices) > 0:
+            # Pad by wrapping around, possibly several times for tiny
+            # datasets
+            indices = np.resize(indices, total_size)
+        indices = indices[:total_size]
+
+        return iter(indices[self.rank::self.world_size].tolist())
+
+    def __len__(self) -> int:
+        """
+        Returns:
+            int: The number of samples of this rank.
+        """
+        return self._total_size() // self.world_size
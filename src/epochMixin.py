@@ -0,0 +1,28 @@
+class EpochMixin:
+    """
+    Gives a sampler an epoch number, which seeds its shuffle together with
+    its seed. Calling set_epoch with the same value on every rank or worker
+    before each epoch gives them the same, new order.
+
+    Attributes:
+        _epoch (int): The current epoch, 0 until set_epoch is called.
+    """
+    _epoch = 0
+
+    @property
+    def epoch(self) -> int:
+        return self._epoch
+
+    def set_epoch(self, epoch: int) -> None:
+        """
+        Sets the epoch the next shuffle is seeded with.
+
+        Args:
+            epoch (int): The epoch number.
+
+        Returns:
+            None
+        """
+        if not isinstance(epoch, int) or epoch < 0:
+            raise ValueError("epoch must be a non-negative integer")
+        self._epoch = epoch
@@ -0,0 +1,54 @@
+from concurrent.futures import (Executor, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from typing import Callable, Optional, Tuple
+
+
+def make_executor(backend: str, num_workers: int,
+                  initializer: Optional[Callable] = None,
+                  initargs: Tuple = ()) -> Executor:
+    """
+    Creates a pool of workers.
+
+    Args:
+        backend (str): The kind of workers, either "thread" or "process".
+
+        num_workers (int): The number of workers.
+
+        initializer (Callable): Called at the start of every worker.
+
+        initargs (tuple): The arguments passed to initializer.
+
+    Returns:
+        Executor: A thread or process pool.
+    """
+    if backend not in ["thread", "process"]:
+        raise ValueError("backend must be 'thread' or 'process'")
+    if not isinstance(num_workers, int) or num_workers <= 0:
+        raise ValueError("num_workers must be a positive integer")
+
+    if backend == "process":
+        return ProcessPoolExecutor(max_workers=num_workers,
+                                   initializer=initializer,
+                                   initargs=initargs)
+    return ThreadPoolExecutor(max_workers=num_workers,
+                              initializer=initializer, initargs=initargs)
+
+
+def map_chunksize(backend: str, num_workers: int, num_items: int) -> int:
+    """
+    Chooses how many items a process worker receives per task, so that the
+    cost of sending tasks is small compared to the work.
+
+    Args:
+        backend (str): The kind of workers, either "thread" or "process".
+
+        num_workers (int): The number of workers.
+
+        num_items (int): The number of items to process.
+
+    Returns:
+        int: The chunk size to pass to Executor.map.
+    """
+    if backend == "thread":
+        return 1
+    return max(1, num_items // (num_workers * 4))
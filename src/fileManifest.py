@@ -0,0 +1,210 @@
+import os
+import json
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.atomicWrite import atomic_write
+
+MANIFEST_VERSION = 1
+
+
+class FileManifest:
+    """
+    Discovers the files of a dataset and remembers them in an on-disk
+    manifest.
+
+    Directories are listed with os.scandir, class folders in parallel. For
+    every directory the manifest stores its modification time, its
+    subfolders and the (name, size, mtime) of the files matching the
+    pattern. When the manifest is loaded again, only the directories whose
+    modification time changed (i.e. files were added, removed or renamed)
+    are listed again.
+
+    Attributes:
+        _root (str): The root folder of the dataset.
+        _pattern (str): The glob pattern of the data files, e.g. "*.jpg".
+        _manifest_path (str): Where the manifest is stored. If None, nothing
+        is persisted and every scan lists the directories.
+        _num_workers (int): The number of threads listing class folders.
+        _directories (dict): The listing of every known directory, keyed by
+        its path relative to root.
+    """
+    def __init__(self, root: str, pattern: str,
+                 manifest_path: Optional[str] = None,
+                 num_workers: Optional[int] = None) -> None:
+        if not isinstance(root, str):
+            raise ValueError("root must be a string")
+        if not isinstance(pattern, str):
+            raise ValueError("pattern must be a string")
+        if manifest_path is not None and not isinstance(manifest_path, str):
+            raise ValueError("manifest_path must be a string or None")
+        if num_workers is not None and (not isinstance(num_workers, int)
+                                        or num_workers <= 0):
+            raise ValueError("num_workers must be a positive integer")
+
+        self._root = root
+        self._pattern = pattern
+        self._manifest_path = manifest_path
+        self._num_workers = num_workers
+        self._directories: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    @property
+    def pattern(self) -> str:
+        return self._pattern
+
+    @property
+    def manifest_path(self) -> Optional[str]:
+        return self._manifest_path
+
+    @staticmethod
+    def _sort_name(sort_key: Optional[Callable]) -> Optional[str]:
+        if sort_key is None:
+            return None
+        return getattr(sort_key, "__qualname__", repr(sort_key))
+
+    def _load(self, sort_key: Optional[Callable]) -> None:
+        """
+        Reads the manifest from disk, if it exists and was written for the
+        same root, pattern and file ordering.
+
+        Args:
+            sort_key (Callable): The key the files are sorted by.
+
+        Returns:
+            None
+        """
+        self._directories = {}
+        if self.manifest_path is None or not os.path.isfile(
+                self.manifest_path):
+            return
+
+        try:
+            with open(self.manifest_path, encoding="utf-8") as file:
+                manifest = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable manifest {self.manifest_path}: {e}")
+            return
+
+        if (manifest.get("version") == MANIFEST_VERSION
+                and manifest.get("root") == os.path.abspath(self.root)
+                and manifest.get("pattern") == self.pattern
+                and manifest.get("sort_key") == self._sort_name(sort_key)):
+            self._directories = manifest["directories"]
+
+    def _save(self, sort_key: Optional[Callable]) -> None:
+        """
+        Writes the manifest to disk. The file is replaced atomically so a
+        concurrent reader never sees a partial manifest.
+
+        Args:
+            sort_key (Callable): The key the files are sorted by.
+
+        Returns:
+            None
+        """
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "root": os.path.abspath(self.root),
+            "pattern": self.pattern,
+            "sort_key": self._sort_name(sort_key),
+            "directories": self._directories,
+        }
+        with atomic_write(self.manifest_path, encoding="utf-8") as file:
+            json.dump(manifest, file, separators=(",", ":"))
+
+    def _list_directory(self, relpath: str,
+                        sort_key: Optional[Callable]) -> Tuple[bool, Dict]:
+        """
+        Returns the listing of a directory, reusing the one from the
+        manifest if the directory did not change since.
+
+        Args:
+            relpath (str): The directory, relative to root.
+
+            sort_key (Callable): The key the file names are sorted by. If
+            None, they are sorted alphabetically.
+
+        Returns:
+            tuple (bool, dict): Whether the directory was listed again, and
+            its listing.
+        """
+        path = os.path.join(self.root, relpath)
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._directories.get(relpath)
+        if cached is not None and cached["mtime"] == mtime:
+            return False, cached
+
+        subdirs, files = [], []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    subdirs.append(entry.name)
+                elif (entry.is_file() and not entry.name.startswith(".")
+                      and fnmatch.fnmatch(entry.name, self.pattern)):
+                    stat = entry.stat()
+                    files.append([entry.name, stat.st_size,
+                                  stat.st_mtime_ns])
+
+        files.sort(key=lambda file: (sort_key(file[0]) if sort_key
+                                     else file[0]))
+        return True, {"mtime": mtime, "subdirs": sorted(subdirs),
+                      "files": files}
+
+    def scan(self, subdirectories: bool,
+             sort_key: Optional[Callable[[str], Any]] = None
+             ) -> List[Tuple[str, str, int, int]]:
+        """
+        Lists the data files of the dataset, updating the manifest.
+
+        Args:
+            subdirectories (bool): If True, the files are read from the
+            subfolders of root, each subfolder being a class. If False, they
+            are read from root itself.
+
+            sort_key (Callable): The key the file names are sorted by
+            within a folder. If None, they are sorted alphabetically.
+
+        Returns:
+            List[Tuple[str, str, int, int]]: The path, class, size and
+            modification time (in ns) of every file. The class is the name
+            of the subfolder, or an empty string for files in root.
+        """
+        self._load(sort_key)
+        listings: Dict[str, Dict[str, Any]] = {}
+
+        changed, listings[""] = self._list_directory("", sort_key)
+        class_dirs = listings[""]["subdirs"] if subdirectories else []
+
+        if class_dirs:
+            with ThreadPoolExecutor(max_workers=self._num_workers) as pool:
+                results = pool.map(
+                    lambda class_dir: self._list_directory(class_dir,
+                                                           sort_key),
+                    class_dirs)
+                for class_dir, (class_changed, listing) in zip(class_dirs,
+                                                               results):
+                    changed = changed or class_changed
+                    listings[class_dir] = listing
+
+        # Folders that were not visited in this scan are forgotten
+        changed = changed or set(listings) != set(self._directories)
+        self._directories = listings
+        if changed and self.manifest_path is not None:
+            self._save(sort_key)
+
+        entries = []
+        if subdirectories:
+            for class_dir in class_dirs:
+                class_path = os.path.join(self.root, class_dir)
+                for name, size, mtime in listings[class_dir]["files"]:
+                    entries.append((os.path.join(class_path, name),
+                                    class_dir, size, mtime))
+        else:
+            for name, size, mtime in listings[""]["files"]:
+                entries.append((os.path.join(self.root, name), "", size,
+                                mtime))
+        return entries
@@ -0,0 +1,121 @@
+from src.preprocessingABC import PreprocessingTechniqueABC
+from src.centerCrop import CenterCrop
+from src.randomCrop import RandomCrop
+from PIL import Image
+import numpy as np
+from typing import Any, Dict, Tuple
+
+
+class FusedCrop(PreprocessingTechniqueABC):
+    """
+    A sequence of consecutive crops applied as a single crop.
+
+    The crop boxes of the steps are composed into one box, so no
+    intermediate image is created. Random positions are drawn in the same
+    order as when running the crops one by one, so the output is identical.
+    PreprocessingPipeline builds these automatically.
+    """
+    def __init__(self, *crops: CenterCrop | RandomCrop) -> None:
+        if len(crops) == 0:
+            raise ValueError("At least one crop is required")
+        if not all(isinstance(crop, (CenterCrop, RandomCrop))
+                   for crop in crops):
+            raise TypeError("All steps must be CenterCrop or RandomCrop")
+        self._crops = crops
+
+    @property
+    def crops(self):
+        return self._crops
+
+    @property
+    def deterministic(self) -> bool:
+        return all(crop.deterministic for crop in self.crops)
+
+    def config(self) -> Dict[str, Any]:
+        """
+        Returns:
+            dict: The class name and the configuration of every crop.
+        """
+        return {"step": f"{type(self).__module__}.{type(self).__qualname__}",
+                "crops": [crop.config() for crop in self.crops]}
+
+    def crop_box(self, w: int, h: int) -> Tuple[int, int, int, int]:
+        """
+        Composes the crop boxes of all the steps for an image of the given
+        size.
+
+        Args:
+            w (int): The width of the image.
+
+            h (int): The height of the image.
+
+        Returns:
+            tuple (int, int, int, int): The left, top, right and bottom
+            coordinates of the crop in the original image.
+        """
+        left, top, right, bottom = 0, 0, w, h
+        for crop in self.crops:
+            box = crop.crop_box(right - left, bottom - top)
+            left, top, right, bottom = (left + box[0], top + box[1],
+                                        left + box[2], top + box[3])
+        return left, top, right, bottom
+
+    def _crop_batch(self, images: np.ndarray) -> np.ndarray:
+        """
+        Crops an (N, H, W, C) batch with all the steps at once.
+
+        Args:
+            images (np.ndarray): The batch of images.
+
+        Returns:
+            np.ndarray: The cropped batch.
+        """
+        n, h, w = images.shape[:3]
+        offsets = np.zeros((n, 2), dtype=np.int64)
+        is_random = False
+        for crop in self.crops:
+            if isinstance(crop, RandomCrop):
+                step_offsets, w, h = crop.batch_offsets(n, w, h)
+                offsets += step_offsets
+                is_random = True
+            else:
+                left, top, right, bottom = crop.crop_box(w, h)
+                offsets += (top, left)
+                w, h = right - left, bottom - top
+
+        if not is_random:
+            top, left = offsets[0]
+            return images[:, top:top + h, left:left + w]
+
+        rows = offsets[:, 0, None] + np.arange(h)
+        cols = offsets[:, 1, None] + np.arange(w)
+        return images[np.arange(n)[:, None, None], rows[:, :, None],
+                      cols[:, None, :]]
+
+    def __call__(self, image: Image.Image | np.ndarray
+                 ) -> Image.Image | np.ndarray:
+        """
+        Performs all the crops on the input image.
+
+        Args:
+            image (PIL.Image.Image or np.ndarray): The input image, or
+            images as an (H, W, C) array or an (N, H, W, C) batch.
+
+        Returns:
+            PIL.Image.Image or np.ndarray: The cropped image.
+        """
+        if isinstance(image, np.ndarray):
+            if image.ndim == 4:
+                return self._crop_batch(image)
+            if image.ndim != 3:
+                raise ValueError("Arrays must be (H, W, C) or (N, H, W, C)")
+            h, w = image.shape[:2]
+            left, top, right, bottom = self.crop_box(w, h)
+            return image[top:bottom, left:right]
+
+        if not isinstance(image, Image.Image):
+            raise TypeError("The input must be a PIL.Image.Image or an "
+                            "np.ndarray")
+
+        w, h = image.size
+        return image.crop(self.crop_box(w, h))
@@ -0,0 +1,226 @@
+import json
+import time
+import threading
+import warnings
+import numpy as np
+from contextlib import nullcontext
+from typing import Any, Dict, Optional
+
+# Upper bounds of the latency histogram buckets: 1us, 2us, 4us, ... ~67s.
+# The last bucket also collects everything slower.
+BUCKET_BOUNDS = 1e-6 * 2.0 ** np.arange(27)
+
+
+class _StageTimer:
+    """
+    Context manager timing one run of a stage.
+    """
+    __slots__ = ("_profiler", "_stage", "_start")
+
+    def __init__(self, profiler: 'Profiler', stage: str) -> None:
+        self._profiler = profiler
+        self._stage = stage
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc: Any) -> None:
+        self._profiler.record(self._stage, time.perf_counter() - self._start)
+
+
+class Profiler:
+    """
+    Collects the number of runs and a latency histogram for every stage
+    of the data path, such as file open, decode, each pipeline step and
+    batch assembly.
+
+    Stages are recorded by the hooks in Dataset, PreprocessingPipeline and
+    BatchLoader while the profiler is active (see set_profiler). With
+    process workers, only the stages run in the current process are
+    recorded.
+
+    Attributes:
+        _stall_threshold (float): If set, a warning is issued whenever the
+        consumer of a BatchLoader waits longer than this many seconds for a
+        batch.
+        _stages (dict): The count, total, max and histogram of each stage.
+    """
+    def __init__(self, stall_threshold: Optional[float] = None) -> None:
+        if stall_threshold is not None and (
+                not isinstance(stall_threshold, (int, float))
+                or stall_threshold <= 0):
+            raise ValueError("stall_threshold must be a positive number")
+        self._stall_threshold = stall_threshold
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def stall_threshold(self) -> Optional[float]:
+        return self._stall_threshold
+
+    def reset(self) -> None:
+        """
+        Forgets every recorded run.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._stages: Dict[str, Dict[str, Any]] = {}
+            self._stalls = 0
+
+    def stage(self, name: str) -> _StageTimer:
+        """
+        Args:
+            name (str): The name of the stage.
+
+        Returns:
+            A context manager recording the duration of its block.
+        """
+        return _StageTimer(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        """
+        Records one run of a stage.
+
+        Args:
+            name (str): The name of the stage.
+
+            seconds (float): The duration of the run.
+
+        Returns:
+            None
+        """
+        bucket = min(int(np.searchsorted(BUCKET_BOUNDS, seconds)),
+                     len(BUCKET_BOUNDS) - 1)
+        with self._lock:
+            stats = self._stages.get(name)
+            if stats is None:
+                stats = {"count": 0, "total": 0.0, "max": 0.0,
+                         "histogram": np.zeros(len(BUCKET_BOUNDS),
+                                               dtype=np.int64)}
+                self._stages[name] = stats
+            stats["count"] += 1
+            stats["total"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+            stats["histogram"][bucket] += 1
+
+    def record_wait(self, seconds: float) -> None:
+        """
+        Records how long the consumer of a BatchLoader waited for a batch,
+        warning if the wait exceeds the stall threshold.
+
+        Args:
+            seconds (float): The duration of the wait.
+
+        Returns:
+            None
+        """
+        self.record("batch.wait", seconds)
+        if self.stall_threshold is not None and \
+                seconds > self.stall_threshold:
+            with self._lock:
+                self._stalls += 1
+            warnings.warn(f"BatchLoader consumer waited {seconds:.3f}s for "
+                          f"a batch (threshold {self.stall_threshold}s)",
+                          RuntimeWarning, stacklevel=3)
+
+    @staticmethod
+    def _percentile(histogram: np.ndarray, count: int, q: float) -> float:
+        # Upper bound of the bucket holding the q-th percentile
+        rank = int(np.ceil(q / 100 * count))
+        bucket = int(np.searchsorted(np.cumsum(histogram), max(rank, 1)))
+        return float(BUCKET_BOUNDS[bucket])
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarizes every stage. Percentiles are upper bounds taken from the
+        histogram, so they are accurate to a factor of 2.
+
+        Args:
+            None
+
+        Returns:
+            dict: For every stage, its count, total and mean time, max and
+            p50/p90/p99 latency, and histogram; plus the number of stalls.
+        """
+        with self._lock:
+            stages = {}
+            for name, stats in sorted(self._stages.items()):
+                count = stats["count"]
+                histogram = stats["histogram"]
+                stages[name] = {
+                    "count": count,
+                    "total_s": stats["total"],
+                    "mean_ms": 1000 * stats["total"] / count,
+                    "max_ms": 1000 * stats["max"],
+                    "p50_ms": 1000 * self._percentile(histogram, count, 50),
+                    "p90_ms": 1000 * self._percentile(histogram, count, 90),
+                    "p99_ms": 1000 * self._percentile(histogram, count, 99),
+                    "histogram": {f"<={bound * 1000:.4g}ms": int(n)
+                                  for bound, n in zip(BUCKET_BOUNDS,
+                                                      histogram) if n},
+                }
+            return {"stages": stages, "stalls": self._stalls}
+
+    def export(self, path: str) -> None:
+        """
+        Writes the summary to a JSON file.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            None
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.summary(), file, indent=2)
+
+
+_active_profiler: Optional[Profiler] = None
+_no_timing = nullcontext()
+
+
+def set_profiler(profiler: Optional[Profiler]) -> None:
+    """
+    Activates a profiler for the hooks of the data path, or disables
+    instrumentation with None.
+
+    Args:
+        profiler (Profiler): The profiler to activate, or None.
+
+    Returns:
+        None
+    """
+    global _active_profiler
+    if profiler is not None and not isinstance(profiler, Profiler):
+        raise TypeError("profiler must be a Profiler or None")
+    _active_profiler = profiler
+
+
+def get_profiler() -> Optional[Profiler]:
+    """
+    Returns:
+        Profiler: The active profiler, or None if instrumentation is off.
+    """
+    return _active_profiler
+
+
+def timed(name: str):
+    """
+    Times a block as a stage of the active profiler. Does nothing if no
+    profiler is active.
+
+    Args:
+        name (str): The name of the stage.
+
+    Returns:
+        A context manager.
+    """
+    profiler = _active_profiler
+    if profiler is None:
+        return _no_timing
+    return profiler.stage(name)
@@ -0,0 +1,231 @@
+import os
+import json
+import functools
+from src.executors import make_executor, map_chunksize
+from src.atomicWrite import atomic_write
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+QUARANTINE_VERSION = 1
+
+
+def _check_file(filepath: str, data_type: str, mode: str) -> Optional[str]:
+    """
+    Checks that a file can be read.
+
+    Args:
+        filepath (str): The path of the file.
+
+        data_type (str): Either "image" or "audio".
+
+        mode (str): "header" to only parse the header, "decode" to decode
+        the whole file.
+
+    Returns:
+        str: Why the file is unreadable, or None if it is readable.
+    """
+    try:
+        if os.path.getsize(filepath) == 0:
+            return "empty file"
+        if data_type == "image":
+            from PIL import Image
+
+            with Image.open(filepath) as image:
+                if mode == "header":
+                    image.verify()
+                else:
+                    image = image.convert("RGB")
+                if image.width == 0 or image.height == 0:
+                    return "empty image"
+        else:
+            import soundfile
+
+            if mode == "header":
+                info = soundfile.info(filepath)
+                frames = info.frames
+            else:
+                frames = len(soundfile.read(filepath, dtype="float32")[0])
+            if frames == 0:
+                return "empty audio"
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+class IntegrityScan:
+    """
+    Checks files in parallel and records the unreadable ones in a
+    quarantine manifest, which TreeDataset and JoinedDataset read to leave
+    those files out.
+
+    Images are checked with Pillow and audio with soundfile, either by
+    parsing the header only ("header", fast) or by decoding the whole file
+    ("decode", which also catches truncated data).
+
+    The manifest is a JSON file mapping the absolute path of every
+    quarantined file to its size, modification time and the reason. A
+    quarantined file that is modified afterwards is no longer excluded.
+
+    Attributes:
+        _data_type (str): Either "image" or "audio".
+        _mode (str): Either "header" or "decode".
+        _num_workers (int): The number of workers checking files.
+        _backend (str): The kind of workers, either "thread" or "process".
+    """
+    def __init__(self, data_type: str, mode: str = "decode",
+                 num_workers: int = 1, backend: str = "process") -> None:
+        if data_type not in ["image", "audio"]:
+            raise ValueError("data_type must be in 'image' or 'audio'")
+        if mode not in ["header", "decode"]:
+            raise ValueError("mode must be 'header' or 'decode'")
+        if not isinstance(num_workers, int) or num_workers <= 0:
+            raise ValueError("num_workers must be a positive integer")
+        if backend not in ["thread", "process"]:
+            raise ValueError("backend must be 'thread' or 'process'")
+
+        self._data_type = data_type
+        self._mode = mode
+        self._num_workers = num_workers
+        self._backend = backend
+
+    @property
+    def data_type(self) -> str:
+        return self._data_type
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    @property
+    def num_workers(self) -> int:
+        return self._num_workers
+
+    @property
+    def backend(self) -> str:
+        return self._backend
+
+    def scan(self, filepaths: Iterable[str]) -> Dict[str, str]:
+        """
+        Checks files over num_workers workers.
+
+        Args:
+            filepaths (Iterable[str]): The paths of the files, e.g. the data
+            of a lazy dataset.
+
+        Returns:
+            dict: The reason every unreadable file was rejected, keyed by
+            its path.
+        """
+        filepaths = list(filepaths)
+        check = functools.partial(_check_file, data_type=self.data_type,
+                                  mode=self.mode)
+        if self.num_workers == 1:
+            reasons = map(check, filepaths)
+            return {path: reason for path, reason in zip(filepaths, reasons)
+                    if reason is not None}
+
+        chunksize = map_chunksize(self.backend, self.num_workers,
+                                  len(filepaths))
+        with make_executor(self.backend, self.num_workers) as executor:
+            reasons = executor.map(check, filepaths, chunksize=chunksize)
+            return {path: reason for path, reason in zip(filepaths, reasons)
+                    if reason is not None}
+
+    def quarantine(self, filepaths: Iterable[str],
+                   quarantine_path: str) -> Dict[str, str]:
+        """
+        Checks files and updates the quarantine manifest: unreadable files
+        are added, and checked files that are readable again are removed.
+        Entries of files that were not checked are kept. The manifest is
+        replaced atomically.
+
+        Args:
+            filepaths (Iterable[str]): The paths of the files.
+
+            quarantine_path (str): The path of the manifest.
+
+        Returns:
+            dict: The reason every unreadable file was rejected, keyed by
+            its path.
+        """
+        filepaths = list(filepaths)
+        bad = self.scan(filepaths)
+        entries = load_quarantine(quarantine_path)
+        for path in filepaths:
+            entries.pop(os.path.abspath(path), None)
+        for path, reason in bad.items():
+            try:
+                stat = os.stat(path)
+                size, mtime = stat.st_size, stat.st_mtime_ns
+            except OSError:
+                size, mtime = -1, -1
+            entries[os.path.abspath(path)] = {"size": size, "mtime": mtime,
+                                              "reason": reason}
+
+        manifest = {"version": QUARANTINE_VERSION, "files": entries}
+        with atomic_write(quarantine_path, encoding="utf-8") as file:
+            json.dump(manifest, file, indent=1)
+        return bad
+
+
+def load_quarantine(quarantine_path: Optional[str]) -> Dict[str, Dict]:
+    """
+    Reads a quarantine manifest.
+
+    Args:
+        quarantine_path (str): The path of the manifest, or None.
+
+    Returns:
+        dict: The size, modification time and reason of every quarantined
+        file, keyed by absolute path. Empty if there is no manifest.
+    """
+    if quarantine_path is None or not os.path.isfile(quarantine_path):
+        return {}
+    try:
+        with open(quarantine_path, encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable quarantine manifest {quarantine_path}: "
+              f"{e}")
+        return {}
+    if manifest.get("version") != QUARANTINE_VERSION:
+        print(f"Ignoring quarantine manifest {quarantine_path} with "
+              f"unsupported version")
+        return {}
+    return manifest["files"]
+
+
+def exclude_quarantined(entries: Sequence[Tuple[str, str, int, int]],
+                        quarantine_path: Optional[str]
+                        ) -> List[Tuple[str, str, int, int]]:
+    """
+    Leaves out the quarantined files of a FileManifest scan. A file that
+    changed since it was quarantined is kept. Quarantined files are stat'ed
+    again rather than trusting the sizes and times of the entries, which a
+    saved manifest does not refresh for files rewritten in place.
+
+    Args:
+        entries (Sequence[tuple]): The path, class, size and modification
+        time of every file.
+
+        quarantine_path (str): The path of the manifest, or None.
+
+    Returns:
+        List[tuple]: The entries of the files that are not quarantined.
+    """
+    quarantined = load_quarantine(quarantine_path)
+    if not quarantined:
+        return list(entries)
+
+    kept = []
+    for entry in entries:
+        info = quarantined.get(os.path.abspath(entry[0]))
+        if info is not None:
+            try:
+                stat = os.stat(entry[0])
+                stamp = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                stamp = (-1, -1)
+            if (info["size"], info["mtime"]) == stamp:
+                continue
+        kept.append(entry)
+    return kept
@@ -1,10 +1,14 @@
 import os
+import numpy as np
 from src.dataset import Dataset
-import glob
-import csv
+from src.fileManifest import FileManifest
+from src.integrityScan import exclude_quarantined
 from typing import Optional, List, Any
 import re
 
+# Rows of the label file parsed at a time
+LABEL_CHUNK_ROWS = 1_000_000
+
 
 class JoinedDataset(Dataset):
     def __init__(self, root: str,
@@ -12,7 +16,11 @@ class JoinedDataset(Dataset):
                  loading_method: str,
                  load_labels: bool = False,
                  data: Optional[List[Any]] = None,
-                 labels: Optional[List[Any]] = None) -> None:
+                 labels: Optional[List[Any]] = None,
+                 manifest_path: Optional[str] = None,
+                 quarantine_path: Optional[str] = None,
+                 label_type: Optional[str] = None,
+                 **kwargs: Any) -> None:
 
         self._label_path = os.path.join(os.path.dirname(root), "labels.csv")
 
@@ -20,7 +28,23 @@ class JoinedDataset(Dataset):
             raise ValueError("load labels should be True or False")
         self._load_labels = load_labels
 
-        super().__init__(root, data_type, loading_method, data, labels)
+        if manifest_path is not None and not isinstance(manifest_path, str):
+            raise ValueError("manifest_path must be a string or None")
+        self._manifest_path = manifest_path
+
+        if quarantine_path is not None and not isinstance(quarantine_path,
+                                                          str):
+            raise ValueError("quarantine_path must be a string or None")
+        self._quarantine_path = quarantine_path
+
+        if label_type not in [None, "regression", "classification"]:
+            raise ValueError("label_type must be 'regression', "
+                             "'classification' or None")
+        self._label_type = label_type
+        self._filenames: Optional[List[str]] = None
+
+        super().__init__(root, data_type, loading_method, data, labels,
+                         **kwargs)
 
         if self.load_labels and labels is None:
             self._load_labels_from_csv()
@@ -41,6 +65,18 @@ class JoinedDataset(Dataset):
     def load_labels(self, value: bool) -> None:
         self._load_labels = value
 
+    @property
+    def manifest_path(self) -> Optional[str]:
+        return self._manifest_path
+
+    @property
+    def quarantine_path(self) -> Optional[str]:
+        return self._quarantine_path
+
+    @property
+    def label_type(self) -> Optional[str]:
+        return self._label_type
+
     @staticmethod
     def numerical_sort_key(s: str) -> List[int]:
         """
@@ -52,7 +88,8 @@ class JoinedDataset(Dataset):
 
     def _load_data(self) -> None:
         """
-        Loads data from the disk stored in the root folder
+        Loads data from the disk stored in the root folder. If a manifest
+        path is set, the sorted file listing is read from and saved to it.
 
         Args:
             None
@@ -61,14 +98,40 @@ class JoinedDataset(Dataset):
             None
         """
         extension, load_method = self._get_extension_and_loader()
-
-        filepaths = glob.glob(os.path.join(self.root, extension))
-        for filepath in sorted(filepaths, key=self.numerical_sort_key):
-            self._handle_load_method(load_method, filepath)
+        manifest = FileManifest(self.root, extension, self.manifest_path)
+        entries = exclude_quarantined(
+            manifest.scan(subdirectories=False,
+                          sort_key=self.numerical_sort_key),
+            self.quarantine_path)
+        filepaths = [entry[0] for entry in entries]
+        self._load_files(load_method, filepaths)
+        if self.load_labels:
+            # Kept until the labels are joined, as eager data has no paths
+            self._filenames = [os.path.basename(path) for path in filepaths]
+
+    def _file_names(self) -> List[str]:
+        """
+        Returns:
+            List[str]: The file name of every sample, in order.
+        """
+        if self._filenames is not None:
+            return self._filenames
+        if self.loading_method in ["eager", "shared"]:
+            raise ValueError("Labels of a decoded dataset built from data "
+                             "must be given explicitly")
+        return [os.path.basename(path) for path in self._data]
 
     def _load_labels_from_csv(self) -> None:
         """
-        Load labels from a CSV file
+        Load labels from a CSV file whose first column is a file name and
+        second column a label, and join them to the samples by file name.
+        The file is parsed in chunks with pandas, and every chunk is joined
+        as it is read, so only the labels of the samples are kept.
+
+        Regression labels are stored as a float64 array. Classification
+        labels are stored as an int64 array of codes into classes, the
+        sorted class names. If label_type is None, the labels are regression
+        labels if they are all numbers.
 
         Args:
             None
@@ -76,6 +139,44 @@ class JoinedDataset(Dataset):
         Returns:
             None
         """
-        with open(self.label_path, newline="") as csvfile:
-            reader = csv.reader(csvfile)
-            self.labels = [row[1] for row in reader]
+        import pandas as pd
+
+        names = self._file_names()
+        # Samples sharing a file name share a label
+        positions, unique_names = pd.factorize(pd.Index(names))
+        found = np.zeros(len(unique_names), dtype=bool)
+        unique_labels = np.empty(len(unique_names), dtype=object)
+
+        chunks = pd.read_csv(self.label_path, header=None, usecols=[0, 1],
+                             names=["file", "label"], dtype=str,
+                             keep_default_na=False,
+                             chunksize=LABEL_CHUNK_ROWS)
+        for chunk in chunks:
+            # A file listed twice keeps its last label
+            chunk = chunk.drop_duplicates("file", keep="last")
+            rows = unique_names.get_indexer(chunk["file"])
+            matched = rows >= 0
+            unique_labels[rows[matched]] = chunk["label"].to_numpy()[matched]
+            found[rows[matched]] = True
+
+        missing = np.flatnonzero(~found[positions])
+        if len(missing) > 0:
+            raise ValueError(f"{len(missing)} files have no label in "
+                             f"{self.label_path}, e.g. "
+                             f"{names[missing[0]]}")
+        labels = unique_labels[positions]
+        self._filenames = None
+
+        label_type = self.label_type
+        if label_type != "classification":
+            values = pd.to_numeric(pd.Series(labels), errors="coerce")
+            if label_type == "regression" or not values.isna().any():
+                if values.isna().any():
+                    raise ValueError(f"Non-numeric regression labels in "
+                                     f"{self.label_path}")
+                self.labels = values.to_numpy(dtype=np.float64)
+                return
+
+        codes, classes = pd.factorize(labels, sort=True)
+        self._classes = np.asarray(classes, dtype=str)
+        self.labels = codes.astype(np.int64)
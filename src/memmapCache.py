@@ -0,0 +1,307 @@
+import os
+import uuid
+import threading
+import numpy as np
+from PIL import Image
+from typing import Any, Dict, List, Optional, Tuple
+
+# Every record of a shard index holds, as int64: the sample index, the
+# byte offset in the shard, the number of dimensions, three dimensions, the
+# sampling rate (-1 for images), and the size and modification time of the
+# source file when it was decoded.
+RECORD_SIZE = 9
+ALIGNMENT = 64
+
+
+class MemmapCache:
+    """
+    A disk cache of decoded samples, read back as memory-mapped arrays.
+
+    Decoded samples are appended to shard files in the cache directory:
+    images as (H, W, C) uint8 arrays and audio as float32 time series. Each
+    shard has an index file of fixed-size records locating its samples.
+    Every process writes to its own shard, so several processes can fill
+    the cache at the same time, and a sample written by one process is
+    visible to processes that open the cache afterwards.
+
+    Cached samples are returned as read-only views of a np.memmap, so
+    reading them copies nothing. Every sample is stored with the size and
+    modification time of its source file, and a sample whose file changed
+    since is treated as missing.
+
+    Attributes:
+        _directory (str): The directory holding the shards.
+        _size (int): The number of samples of the dataset.
+        _data_type (str): Either "image" or "audio".
+        _shards (List[str]): The names of the known shards.
+        _slots (np.ndarray): For every sample, the number of the shard
+        holding it, or -1 if it is not cached.
+        _records (np.ndarray): For every sample, its offset, number of
+        dimensions, shape, sampling rate and source file stamp.
+        _alternates (dict): The other records of samples cached several
+        times, from different versions of their file.
+    """
+    def __init__(self, directory: str, size: int, data_type: str) -> None:
+        if not isinstance(directory, str):
+            raise ValueError("directory must be a string")
+        if not isinstance(size, int) or size < 0:
+            raise ValueError("size must be a non-negative integer")
+        if data_type not in ["image", "audio"]:
+            raise ValueError("data_type must be in 'image' or 'audio'")
+
+        self._directory = directory
+        self._size = size
+        self._data_type = data_type
+        self._dtype = np.uint8 if data_type == "image" else np.float32
+
+        os.makedirs(directory, exist_ok=True)
+        self._open()
+
+    def _open(self) -> None:
+        self._shards: List[str] = []
+        self._maps: Dict[int, np.memmap] = {}
+        self._slots = np.full(self._size, -1, dtype=np.int32)
+        self._records = np.zeros((self._size, RECORD_SIZE - 1),
+                                 dtype=np.int64)
+        self._alternates: Dict[int, List[Tuple[int, np.ndarray]]] = {}
+        self._writer: Optional[Tuple[int, Any, Any]] = None
+        self._lock = threading.Lock()
+        self._read_index()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Open files, maps and locks stay in the process that created them
+        return {"_directory": self._directory, "_size": self._size,
+                "_data_type": self._data_type, "_dtype": self._dtype}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._open()
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def _read_index(self) -> None:
+        """
+        Reads the index of every shard in the cache directory.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        names = sorted(name[:-len(".idx")]
+                       for name in os.listdir(self._directory)
+                       if name.endswith(".idx"))
+        for name in names:
+            records = np.fromfile(os.path.join(self._directory,
+                                               f"{name}.idx"), dtype=np.int64)
+            # A record cut short by a crash is ignored
+            complete = len(records) - len(records) % RECORD_SIZE
+            records = records[:complete].reshape(-1, RECORD_SIZE)
+            records = records[(records[:, 0] >= 0)
+                              & (records[:, 0] < self._size)]
+
+            shard = len(self._shards)
+            self._shards.append(name)
+            # A sample cached by several shards, from several versions of
+            # its file, keeps the others as alternates, which fresh picks
+            # from by stamp
+            duplicate = self._slots[records[:, 0]] >= 0
+            for record in records[duplicate]:
+                self._alternates.setdefault(int(record[0]), []).append(
+                    (shard, record[1:]))
+            records = records[~duplicate]
+            self._slots[records[:, 0]] = shard
+            self._records[records[:, 0]] = records[:, 1:]
+
+    def _map(self, shard: int, end: int) -> np.memmap:
+        """
+        Returns a memory map of a shard covering at least end bytes.
+
+        Args:
+            shard (int): The number of the shard.
+
+            end (int): The number of bytes the map must cover.
+
+        Returns:
+            np.memmap: A read-only map of the shard.
+        """
+        mapped = self._maps.get(shard)
+        if mapped is None or len(mapped) < end:
+            path = os.path.join(self._directory, f"{self._shards[shard]}.bin")
+            mapped = np.memmap(path, dtype=np.uint8, mode="r")
+            self._maps[shard] = mapped
+        return mapped
+
+    def _to_array(self, sample: Any) -> Tuple[Optional[np.ndarray], int]:
+        """
+        Converts a decoded sample to the array stored in the cache.
+
+        Args:
+            sample: A PIL image, or an (np.ndarray, int) audio tuple.
+
+        Returns:
+            tuple (np.ndarray, int): The array and the sampling rate (-1 for
+            images). The array is None if the sample failed to load.
+        """
+        if self._data_type == "image":
+            if sample is None:
+                return None, -1
+            if isinstance(sample, Image.Image):
+                sample = sample.convert("RGB")
+            return np.ascontiguousarray(sample, dtype=np.uint8), -1
+
+        audio_ts, sr = sample
+        if audio_ts is None:
+            return None, -1
+        return np.ascontiguousarray(audio_ts, dtype=np.float32), sr
+
+    def fresh(self, index: int, stamp: Tuple[int, int]) -> bool:
+        """
+        Checks that a sample is cached from the current version of its
+        source file.
+
+        Args:
+            index (int): The index of the sample.
+
+            stamp (tuple (int, int)): The size and modification time in
+            nanoseconds of the source file.
+
+        Returns:
+            bool: Whether the sample is cached with that stamp.
+        """
+        stamp = list(stamp)
+        if self._slots[index] >= 0 and self._records[index,
+                                                     6:].tolist() == stamp:
+            return True
+        with self._lock:
+            for i, (shard, record) in enumerate(
+                    self._alternates.get(index, [])):
+                if record[6:].tolist() == stamp:
+                    # The matching version becomes the one read
+                    self._alternates[index][i] = (int(self._slots[index]),
+                                                  self._records[index].copy())
+                    self._slots[index] = shard
+                    self._records[index] = record
+                    return True
+        return False
+
+    def get(self, index: int,
+            stamp: Optional[Tuple[int, int]] = None) -> Any:
+        """
+        Retrieves a cached sample.
+
+        Args:
+            index (int): The index of the sample.
+
+            stamp (tuple (int, int)): The size and modification time in
+            nanoseconds of the source file. If given, a sample cached from
+            a file with another stamp is not returned.
+
+        Returns:
+            The sample as a read-only array, an (np.ndarray, int) tuple for
+            audio, or None if the sample is not cached.
+        """
+        shard = self._slots[index]
+        if shard < 0:
+            return None
+        if stamp is not None and not self.fresh(index, stamp):
+            return None
+
+        offset, ndim, d0, d1, d2, sr = self._records[index, :6].tolist()
+        shape = (d0, d1, d2)[:ndim]
+        nbytes = int(np.prod(shape)) * np.dtype(self._dtype).itemsize
+        with self._lock:
+            mapped = self._map(shard, offset + nbytes)
+        array = mapped[offset:offset + nbytes].view(self._dtype).reshape(
+            shape)
+
+        if self._data_type == "image":
+            return array
+        return array, sr
+
+    def put(self, index: int, sample: Any,
+            stamp: Tuple[int, int] = (-1, -1)) -> bool:
+        """
+        Writes a decoded sample to the shard of the current process. It
+        replaces any sample cached at the same index.
+
+        Args:
+            index (int): The index of the sample.
+
+            sample: A PIL image, or an (np.ndarray, int) audio tuple.
+
+            stamp (tuple (int, int)): The size and modification time in
+            nanoseconds of the source file.
+
+        Returns:
+            bool: Whether the sample was cached. Samples that failed to load
+            are not cached.
+        """
+        array, sr = self._to_array(sample)
+        if array is None:
+            return False
+        shape = list(array.shape) + [0] * (3 - array.ndim)
+
+        with self._lock:
+            if self._writer is None:
+                # One shard per writing process and cache object
+                name = f"shard-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+                data_file = open(os.path.join(self._directory,
+                                              f"{name}.bin"), "ab")
+                index_file = open(os.path.join(self._directory,
+                                               f"{name}.idx"), "ab")
+                self._shards.append(name)
+                self._writer = (len(self._shards) - 1, data_file, index_file)
+
+            shard, data_file, index_file = self._writer
+            offset = data_file.tell()
+            padding = -offset % ALIGNMENT
+            data_file.write(b"\0" * padding)
+            offset += padding
+            data_file.write(array.tobytes())
+            data_file.flush()
+
+            # The record is written after the data, so a record always
+            # points at complete data
+            record = np.array([index, offset, array.ndim, *shape, sr,
+                               *stamp], dtype=np.int64)
+            index_file.write(record.tobytes())
+            index_file.flush()
+
+            if self._slots[index] >= 0:
+                self._alternates.setdefault(index, []).append(
+                    (int(self._slots[index]), self._records[index].copy()))
+            self._records[index] = record[1:]
+            self._slots[index] = shard
+        return True
+
+    def close(self) -> None:
+        """
+        Closes the shard of the current process and drops the memory maps.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if self._writer is not None:
+                _, data_file, index_file = self._writer
+                data_file.close()
+                index_file.close()
+                self._writer = None
+            self._maps = {}
+
+    def __contains__(self, index: int) -> bool:
+        return bool(self._slots[index] >= 0)
+
+    def __len__(self) -> int:
+        """
+        Returns:
+            int: The number of cached samples.
+        """
+        return int(np.count_nonzero(self._slots >= 0))
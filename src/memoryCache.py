@@ -0,0 +1,256 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from PIL import Image
+from typing import Any, Dict, Hashable, Optional
+
+
+def sample_nbytes(sample: Any) -> int:
+    """
+    Estimates the memory used by a decoded sample.
+
+    Args:
+        sample: A PIL image, a NumPy array, or a tuple of those (e.g. an
+        audio tuple or a (data, label) pair).
+
+    Returns:
+        int: The approximate size of the sample in bytes.
+    """
+    if isinstance(sample, Image.Image):
+        return sample.width * sample.height * len(sample.getbands())
+    if isinstance(sample, np.ndarray):
+        return sample.nbytes
+    if isinstance(sample, tuple):
+        return sum(sample_nbytes(item) for item in sample)
+    return 0
+
+
+class MemoryCache:
+    """
+    An in-memory cache of decoded samples holding at most a given number
+    of bytes.
+
+    When the budget is exceeded, entries are evicted either by least
+    recent use ("lru") or by least frequent use ("lfu", ties broken by
+    least recent use). Both policies run in O(1) per operation. Hits,
+    misses and evictions are counted.
+
+    Cached samples are shared with every caller, so they must not be
+    modified in place.
+
+    Attributes:
+        _max_bytes (int): The byte budget.
+        _policy (str): The eviction policy, either "lru" or "lfu".
+        _entries (dict): The cached value, size and use count of every key.
+        _buckets (dict): For "lfu", the keys grouped by use count, each
+        group in order of last use.
+        _next (dict): For "lfu", the next larger use count that has keys,
+        by use count. Use count 0 is the head, so _next[0] is the smallest
+        count.
+        _prev (dict): For "lfu", the previous use count that has keys, by
+        use count.
+    """
+    def __init__(self, max_bytes: int, policy: str = "lru") -> None:
+        if not isinstance(max_bytes, int) or max_bytes <= 0:
+            raise ValueError("max_bytes must be a positive integer")
+        if policy not in ["lru", "lfu"]:
+            raise ValueError("policy must be 'lru' or 'lfu'")
+
+        self._max_bytes = max_bytes
+        self._policy = policy
+        self._reset()
+
+    def _reset(self) -> None:
+        self._entries: OrderedDict = OrderedDict()
+        self._buckets: Dict[int, OrderedDict] = {}
+        self._next: Dict[int, int] = {}
+        self._prev: Dict[int, int] = {}
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # A copy of the cache, e.g. in a worker process, starts empty
+        return {"_max_bytes": self._max_bytes, "_policy": self._policy}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._reset()
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def policy(self) -> str:
+        return self._policy
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            dict: The number of hits, misses, evictions, cached items and
+            cached bytes.
+        """
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses,
+                    "evictions": self._evictions,
+                    "items": len(self._entries), "bytes": self._nbytes}
+
+    def _add_bucket(self, count: int, after: int) -> None:
+        """
+        Creates the bucket of a use count, linked after another one.
+
+        Args:
+            count (int): The use count of the new bucket.
+
+            after (int): The use count of the bucket it follows, or 0 to
+            make it the first.
+
+        Returns:
+            None
+        """
+        following = self._next.get(after)
+        self._next[after] = count
+        self._prev[count] = after
+        if following is not None:
+            self._next[count] = following
+            self._prev[following] = count
+        self._buckets[count] = OrderedDict()
+
+    def _remove_bucket(self, count: int) -> None:
+        """
+        Removes the empty bucket of a use count and unlinks it.
+
+        Args:
+            count (int): The use count of the bucket.
+
+        Returns:
+            None
+        """
+        before = self._prev.pop(count)
+        following = self._next.pop(count, None)
+        if following is None:
+            del self._next[before]
+        else:
+            self._next[before] = following
+            self._prev[following] = before
+        del self._buckets[count]
+
+    def _touch(self, key: Hashable, entry: list) -> None:
+        """
+        Records a use of a cached key.
+
+        Args:
+            key (Hashable): The key.
+
+            entry (list): The [value, size, count] entry of the key.
+
+        Returns:
+            None
+        """
+        if self._policy == "lru":
+            self._entries.move_to_end(key)
+            return
+
+        count = entry[2]
+        if count + 1 not in self._buckets:
+            self._add_bucket(count + 1, count)
+        self._buckets[count + 1][key] = None
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            self._remove_bucket(count)
+        entry[2] = count + 1
+
+    def _evict(self) -> None:
+        """
+        Removes the entry chosen by the eviction policy.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if self._policy == "lru":
+            key, entry = self._entries.popitem(last=False)
+        else:
+            count = self._next[0]
+            bucket = self._buckets[count]
+            key, _ = bucket.popitem(last=False)
+            if not bucket:
+                self._remove_bucket(count)
+            entry = self._entries.pop(key)
+        self._nbytes -= entry[1]
+        self._evictions += 1
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Retrieves a cached value.
+
+        Args:
+            key (Hashable): The key of the value.
+
+        Returns:
+            The cached value, or None if the key is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._touch(key, entry)
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Caches a value, evicting other entries to stay within the budget.
+        Empty values, such as samples that failed to load, and values larger
+        than the whole budget are not cached.
+
+        Args:
+            key (Hashable): The key of the value.
+
+            value: The value to cache.
+
+        Returns:
+            None
+        """
+        if value is None:
+            return
+        size = sample_nbytes(value)
+        if size == 0 or size > self._max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                return
+            while self._entries and self._nbytes + size > self._max_bytes:
+                self._evict()
+
+            self._entries[key] = [value, size, 1]
+            self._nbytes += size
+            if self._policy == "lfu":
+                if 1 not in self._buckets:
+                    self._add_bucket(1, 0)
+                self._buckets[1][key] = None
+
+    def clear(self) -> None:
+        """
+        Removes every entry and resets the counters.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._reset()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,139 @@
+import os
+import hashlib
+import operator
+from array import array
+from typing import Iterable, Iterator, List
+
+
+class PathIndex:
+    """
+    A compact, append-only list of file paths sharing a common prefix.
+
+    Instead of one Python string per path, the part of every path after the
+    prefix is stored UTF-8 encoded in a single bytes buffer, together with
+    an array of offsets marking where each path starts and ends. Indexing
+    decodes a single path in O(1).
+
+    Attributes:
+        _prefix (str): The prefix shared by all the paths.
+        _buffer (bytearray): The encoded paths, without the prefix.
+        _offsets (array): The start offset of every path in the buffer,
+        followed by the end offset of the last path.
+    """
+    def __init__(self, prefix: str = "") -> None:
+        if not isinstance(prefix, str):
+            raise TypeError("prefix must be a string")
+        self._prefix = prefix
+        self._buffer = bytearray()
+        self._offsets = array("q", [0])
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[str]) -> 'PathIndex':
+        """
+        Builds an index from paths, using their common directory as prefix.
+
+        Args:
+            paths (Iterable[str]): The file paths.
+
+        Returns:
+            PathIndex: An index holding the paths, in the given order.
+        """
+        paths = list(paths)
+        try:
+            common = os.path.commonpath([os.path.dirname(path)
+                                         for path in paths])
+            prefix = os.path.join(common, "") if common else ""
+        except ValueError:
+            # Empty list, or a mix of absolute and relative paths
+            prefix = ""
+
+        index = cls(prefix)
+        index.extend(paths)
+        return index
+
+    @property
+    def prefix(self) -> str:
+        return self._prefix
+
+    def append(self, path: str) -> None:
+        """
+        Adds a path at the end of the index.
+
+        Args:
+            path (str): The path to add. It must start with the prefix.
+
+        Returns:
+            None
+        """
+        if not isinstance(path, str):
+            raise TypeError("path must be a string")
+        if not path.startswith(self._prefix):
+            raise ValueError(f"{path} does not start with {self._prefix}")
+
+        self._buffer += path[len(self._prefix):].encode("utf-8")
+        self._offsets.append(len(self._buffer))
+
+    def extend(self, paths: Iterable[str]) -> None:
+        """
+        Adds several paths at the end of the index.
+
+        Args:
+            paths (Iterable[str]): The paths to add.
+
+        Returns:
+            None
+        """
+        for path in paths:
+            self.append(path)
+
+    def copy(self) -> 'PathIndex':
+        """
+        Returns:
+            PathIndex: An independent copy of the index.
+        """
+        index = PathIndex(self._prefix)
+        index._buffer = self._buffer[:]
+        index._offsets = self._offsets[:]
+        return index
+
+    def digest(self) -> str:
+        """
+        Returns:
+            str: A SHA-1 hex digest identifying the paths and their order.
+        """
+        sha = hashlib.sha1(self._prefix.encode("utf-8"))
+        sha.update(self._offsets.tobytes())
+        sha.update(self._buffer)
+        return sha.hexdigest()
+
+    def _get(self, index: int) -> str:
+        start = self._offsets[index]
+        end = self._offsets[index + 1]
+        return self._prefix + self._buffer[start:end].decode("utf-8")
+
+    def __getitem__(self, index: int | slice) -> str | List[str]:
+        """
+        Retrieves the path at the specified index.
+
+        Args:
+            index (int or slice): The position of the path.
+
+        Returns:
+            str or List[str]: The path, or a list of paths for a slice.
+        """
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self)))]
+
+        index = operator.index(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PathIndex index out of range")
+        return self._get(index)
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self._get(i)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
@@ -1,32 +1,142 @@
 from src.preprocessingABC import PreprocessingTechniqueABC
-from typing import Callable, Tuple
+from src.centerCrop import CenterCrop
+from src.randomCrop import RandomCrop
+from src.fusedCrop import FusedCrop
+from src.randomAudioCrop import RandomAudioCrop
+from src.resampling import AudioResampling
+from src.instrumentation import timed
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from PIL import Image
 import numpy as np
 
 
 class PreprocessingPipeline(PreprocessingTechniqueABC):
-    def __init__(self, *steps: Callable) -> None:
+    def __init__(self, *steps: Callable, reorder_audio: bool = False) -> None:
         if not all(isinstance(step,
                               PreprocessingTechniqueABC) for step in steps):
             raise ValueError("All steps must be callable")
+        if not isinstance(reorder_audio, bool):
+            raise ValueError("reorder_audio must be a boolean")
         self._steps = steps
+        self._reorder_audio = reorder_audio
+        self._plan = self._build_plan()
+        self._stage_names = tuple(f"pipeline.{type(step).__name__}"
+                                  for step in self._plan)
 
     @property
     def steps(self):
         return self._steps
 
+    @property
+    def reorder_audio(self) -> bool:
+        return self._reorder_audio
+
+    @property
+    def plan(self) -> Tuple[PreprocessingTechniqueABC, ...]:
+        """
+        Returns:
+            tuple: The steps that are actually run, after fusion and
+            reordering.
+        """
+        return self._plan
+
+    @property
+    def deterministic(self) -> bool:
+        return all(step.deterministic for step in self.steps)
+
+    def config(self) -> Dict[str, Any]:
+        """
+        Returns:
+            dict: The class name and the configuration of every step.
+        """
+        return {"step": f"{type(self).__module__}.{type(self).__qualname__}",
+                "steps": [step.config() for step in self.steps],
+                "reorder_audio": self.reorder_audio}
+
+    def split_deterministic(self) -> Tuple[Tuple[PreprocessingTechniqueABC,
+                                                 ...],
+                                           Optional['PreprocessingPipeline']]:
+        """
+        Splits the steps into their longest deterministic prefix, whose
+        output can be cached, and the remaining steps, which must run on
+        every call. Steps are taken in their given order: reorder_audio only
+        applies to the remaining steps.
+
+        Args:
+            None
+
+        Returns:
+            tuple: The deterministic leading steps, and a pipeline of the
+            remaining steps, or None if every step is deterministic.
+        """
+        count = 0
+        while count < len(self.steps) and self.steps[count].deterministic:
+            count += 1
+        tail = (PreprocessingPipeline(*self.steps[count:],
+                                      reorder_audio=self.reorder_audio)
+                if count < len(self.steps) else None)
+        return tuple(self.steps[:count]), tail
+
+    def _build_plan(self) -> Tuple[PreprocessingTechniqueABC, ...]:
+        """
+        Optimizes the steps once, at construction:
+
+        - runs of consecutive CenterCrop / RandomCrop steps are fused into a
+          single FusedCrop, whose output is identical to running the crops
+          one by one;
+        - if reorder_audio is set, a RandomAudioCrop that follows
+          AudioResampling steps is moved in front of them, so only the
+          cropped clip is resampled. The crop has the same duration either
+          way, but the output is not bit-identical since resampling works on
+          different samples.
+
+        Args:
+            None
+
+        Returns:
+            tuple: The steps to run.
+        """
+        steps: List[PreprocessingTechniqueABC] = list(self.steps)
+
+        if self.reorder_audio:
+            for i, step in enumerate(steps):
+                if not isinstance(step, RandomAudioCrop):
+                    continue
+                j = i
+                while j > 0 and isinstance(steps[j - 1], AudioResampling):
+                    steps[j - 1], steps[j] = steps[j], steps[j - 1]
+                    j -= 1
+
+        plan: List[PreprocessingTechniqueABC] = []
+        crops: List[CenterCrop | RandomCrop] = []
+        for step in steps + [None]:
+            if isinstance(step, (CenterCrop, RandomCrop)):
+                crops.append(step)
+                continue
+            if len(crops) > 1:
+                plan.append(FusedCrop(*crops))
+            else:
+                plan.extend(crops)
+            crops = []
+            if step is not None:
+                plan.append(step)
+        return tuple(plan)
+
     def __call__(self,
-                 data: Image.Image | Tuple[np.ndarray, int]
-                 ) -> Image.Image | Tuple[np.ndarray, int]:
+                 data: Image.Image | np.ndarray | Tuple[np.ndarray, int]
+                 ) -> Image.Image | np.ndarray | Tuple[np.ndarray, int]:
         """
         Applies the preprocessing pipeline to the input data.
 
         Args:
-            data: The input data to be preprocessed.
+            data: The input data to be preprocessed. Image pipelines also
+            accept a whole (N, H, W, C) batch, e.g. from a Collator, if all
+            their steps support it.
 
         Returns:
             Preprocessed data
         """
-        for step in self.steps:
-            data = step(data)
+        for step, stage in zip(self._plan, self._stage_names):
+            with timed(stage):
+                data = step(data)
         return data
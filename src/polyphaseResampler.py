@@ -0,0 +1,132 @@
+import math
+import numpy as np
+from typing import Dict, Tuple
+
+# Half length of the anti-aliasing filter, in multiples of the larger of
+# the up and down factors, and the beta of its Kaiser window. "high"
+# matches the filter scipy.signal.resample_poly designs by default.
+QUALITIES = {
+    "fast": (4, 5.0),
+    "high": (10, 5.0),
+}
+
+
+class PolyphaseResampler:
+    """
+    Resamples audio with polyphase filtering, reusing the filter kernel
+    of every (original, new) sampling rate pair.
+
+    The output matches scipy.signal.resample_poly with the same kernel,
+    but the kernel is scaled and zero-padded once per pair instead of on
+    every call.
+
+    Attributes:
+        _quality (str): Either "fast" (short filter) or "high".
+        _kernels (dict): The filter kernel of every (up, down) pair.
+        _filters (dict): For every (up, down) pair, the scaled and padded
+        filter passed to upfirdn and the number of leading output samples
+        to drop.
+    """
+    def __init__(self, quality: str = "high") -> None:
+        if quality not in QUALITIES:
+            raise ValueError(f"quality must be in {list(QUALITIES)}")
+        self._quality = quality
+        self._kernels: Dict[Tuple[int, int], np.ndarray] = {}
+        self._filters: Dict[Tuple[int, int], Tuple[np.ndarray, int]] = {}
+
+    @property
+    def quality(self) -> str:
+        return self._quality
+
+    @staticmethod
+    def factors(orig_sr: int, new_sr: int) -> Tuple[int, int]:
+        """
+        Args:
+            orig_sr (int): The original sampling rate.
+
+            new_sr (int): The new sampling rate.
+
+        Returns:
+            tuple (int, int): The up and down factors of the conversion.
+        """
+        divisor = math.gcd(int(orig_sr), int(new_sr))
+        return int(new_sr) // divisor, int(orig_sr) // divisor
+
+    def kernel(self, up: int, down: int) -> np.ndarray:
+        """
+        Returns the anti-aliasing filter for the given factors, designing
+        it only the first time.
+
+        Args:
+            up (int): The upsampling factor.
+
+            down (int): The downsampling factor.
+
+        Returns:
+            np.ndarray: The FIR filter coefficients.
+        """
+        kernel = self._kernels.get((up, down))
+        if kernel is None:
+            from scipy.signal import firwin
+
+            half_len_factor, beta = QUALITIES[self.quality]
+            max_rate = max(up, down)
+            kernel = firwin(2 * half_len_factor * max_rate + 1,
+                            1.0 / max_rate, window=("kaiser", beta))
+            self._kernels[(up, down)] = kernel
+        return kernel
+
+    def _filter(self, up: int, down: int) -> Tuple[np.ndarray, int]:
+        """
+        Returns the kernel scaled by up and zero-padded the way
+        resample_poly does it, so the output samples are centered. Enough
+        trailing zeros are added for any input length.
+
+        Args:
+            up (int): The upsampling factor.
+
+            down (int): The downsampling factor.
+
+        Returns:
+            tuple (np.ndarray, int): The filter and the number of leading
+            output samples of upfirdn to drop.
+        """
+        prepared = self._filters.get((up, down))
+        if prepared is None:
+            kernel = self.kernel(up, down)
+            half_len = (len(kernel) - 1) // 2
+            pre_pad = down - half_len % down
+            pre_remove = (half_len + pre_pad) // down
+            post_pad = max(0, up + down * (pre_remove + 1)
+                           - pre_pad - len(kernel))
+            prepared = (np.concatenate([np.zeros(pre_pad), kernel * up,
+                                        np.zeros(post_pad)]), pre_remove)
+            self._filters[(up, down)] = prepared
+        return prepared
+
+    def resample(self, audio: np.ndarray, orig_sr: int,
+                 new_sr: int) -> np.ndarray:
+        """
+        Resamples one clip, or several clips of the same length stacked
+        along the first axis.
+
+        Args:
+            audio (np.ndarray): The audio, resampled along its last axis.
+
+            orig_sr (int): The original sampling rate.
+
+            new_sr (int): The new sampling rate.
+
+        Returns:
+            np.ndarray: The resampled float32 audio.
+        """
+        up, down = self.factors(orig_sr, new_sr)
+        if up == down:
+            return audio.astype(np.float32, copy=False)
+        from scipy.signal import upfirdn
+
+        h, pre_remove = self._filter(up, down)
+        length = -(-audio.shape[-1] * up // down)
+        resampled = upfirdn(h, audio, up, down, axis=-1)
+        resampled = resampled[..., pre_remove:pre_remove + length]
+        return resampled.astype(np.float32, copy=False)
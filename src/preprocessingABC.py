@@ -1,7 +1,55 @@
 from abc import ABC, abstractmethod
+import json
+from typing import Any, Dict
+import numpy as np
+
+
+def _plain(value: Any) -> Any:
+    """
+    Converts a value json cannot serialize into one it can, keeping arrays
+    whole so two different parameters never get the same description.
+
+    Args:
+        value: The value to convert.
+
+    Returns:
+        The configuration of a technique, the dtype, shape and items of an
+        array, the Python value of a NumPy scalar, or the repr of anything
+        else.
+    """
+    if isinstance(value, PreprocessingTechniqueABC):
+        return value.config()
+    if isinstance(value, np.ndarray):
+        return {"dtype": str(value.dtype), "shape": list(value.shape),
+                "items": value.tolist()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return repr(value)
 
 
 class PreprocessingTechniqueABC(ABC):
+    # Whether the technique always gives the same output for the same
+    # input, so its output can be cached across epochs
+    deterministic = False
+
+    def config(self) -> Dict[str, Any]:
+        """
+        Describes the technique and its parameters, e.g. to key a cache of
+        its outputs. By default, the parameters are all the attributes,
+        tuples, lists, None and arrays included. Techniques holding state
+        derived from their parameters should override it to leave that
+        state out.
+
+        Returns:
+            dict: The qualified class name and the parameters, as plain
+            json values.
+        """
+        params = {name.lstrip("_"): value
+                  for name, value in sorted(vars(self).items())}
+        params = json.loads(json.dumps(params, default=_plain))
+        return {"step": f"{type(self).__module__}."
+                        f"{type(self).__qualname__}", **params}
+
     @abstractmethod
     def __call__(self, data):
         """
@@ -9,7 +57,8 @@ class PreprocessingTechniqueABC(ABC):
 
         Args:
             data: The input data to be preprocessed. Either an Image.image file
-            or a Tuple[np.ndarray, int]
+            or a Tuple[np.ndarray, int]. Image techniques may also accept an
+            (H, W, C) array or an (N, H, W, C) batch.
 
         Returns:
             The preprocessed data. Either an Image.image file
@@ -1,4 +1,3 @@
-import librosa
 from src.preprocessingABC import PreprocessingTechniqueABC
 import random
 import numpy as np
@@ -17,6 +16,33 @@ class RandomAudioCrop(PreprocessingTechniqueABC):
     def duration(self):
         return self._duration
 
+    def window(self, num_frames: int, sr: int) -> Tuple[int, int]:
+        """
+        Draws the random window to keep from a track, knowing only its
+        length. This lets a loader read just the window from disk.
+
+        Args:
+            num_frames (int): The number of samples of the track.
+
+            sr (int): The sampling rate of the track.
+
+        Returns:
+            tuple (int, int): The first sample of the window and the sample
+            after its end. The whole track if it is not longer than
+            the duration.
+        """
+        track_duration = num_frames / sr
+        if track_duration <= self.duration:
+            return 0, num_frames
+
+        max_start = track_duration - self.duration
+        start_time = random.uniform(0, max_start)
+        end_time = start_time + self.duration
+
+        start_sample = int(start_time * sr)
+        end_sample = int(end_time * sr)
+        return start_sample, end_sample
+
     def __call__(self, audio: Tuple[np.ndarray, int]) -> Tuple[np.ndarray,
                                                                int]:
         """
@@ -39,14 +65,7 @@ class RandomAudioCrop(PreprocessingTechniqueABC):
         if not isinstance(audio_ts, np.ndarray) or not isinstance(sr, int):
             raise ValueError("Tuple needs to consist of an np.ndarray and int")
 
-        track_duration = librosa.get_duration(y=audio_ts, sr=sr)
-        if track_duration <= self.duration:
+        start_sample, end_sample = self.window(audio_ts.shape[-1], sr)
+        if (start_sample, end_sample) == (0, audio_ts.shape[-1]):
             return audio_ts, sr
-
-        max_start = track_duration - self.duration
-        start_time = random.uniform(0, max_start)
-        end_time = start_time + self.duration
-
-        start_sample = int(start_time * sr)
-        end_sample = int(end_time * sr)
         return (audio_ts[start_sample:end_sample], sr)
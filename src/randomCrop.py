@@ -1,6 +1,7 @@
 from src.preprocessingABC import PreprocessingTechniqueABC
 import numpy as np
 from PIL import Image
+from typing import Tuple
 
 
 class RandomCrop(PreprocessingTechniqueABC):
@@ -21,22 +22,93 @@ class RandomCrop(PreprocessingTechniqueABC):
     def width(self):
         return self._width
 
-    def __call__(self, image: Image) -> Image:
+    def crop_box(self, w: int, h: int) -> Tuple[int, int, int, int]:
+        """
+        Draws a random crop box for an image of the given size. A dimension
+        larger than the image is not cropped.
+
+        Args:
+            w (int): The width of the image.
+
+            h (int): The height of the image.
+
+        Returns:
+            tuple (int, int, int, int): The left, top, right and bottom
+            coordinates of the crop.
+        """
+        height = min(h, self.height)
+        width = min(w, self.width)
+        top = np.random.randint(0, h - height + 1)
+        left = np.random.randint(0, w - width + 1)
+        return left, top, left + width, top + height
+
+    def batch_offsets(self, n: int, w: int,
+                      h: int) -> Tuple[np.ndarray, int, int]:
+        """
+        Draws the crop positions for a batch of images of the same size in
+        a single call.
+
+        Args:
+            n (int): The number of images.
+
+            w (int): The width of the images.
+
+            h (int): The height of the images.
+
+        Returns:
+            tuple (np.ndarray, int, int): The (N, 2) array of (top, left)
+            offsets, and the width and height of the crops.
+        """
+        height = min(h, self.height)
+        width = min(w, self.width)
+        offsets = np.random.randint(0, [h - height + 1, w - width + 1],
+                                    size=(n, 2))
+        return offsets, width, height
+
+    def _crop_batch(self, images: np.ndarray) -> np.ndarray:
+        """
+        Crops every image of an (N, H, W, C) batch at its own random
+        position. The offsets are drawn in a single call and the crops are
+        taken with a single gather.
+
+        Args:
+            images (np.ndarray): The batch of images.
+
+        Returns:
+            np.ndarray: The (N, height, width, C) batch of crops.
+        """
+        n, h, w = images.shape[:3]
+        offsets, width, height = self.batch_offsets(n, w, h)
+        rows = offsets[:, 0, None] + np.arange(height)
+        cols = offsets[:, 1, None] + np.arange(width)
+        return images[np.arange(n)[:, None, None], rows[:, :, None],
+                      cols[:, None, :]]
+
+    def __call__(self, image: Image.Image | np.ndarray
+                 ) -> Image.Image | np.ndarray:
         """
         Performs random cropping on the input image.
 
         Args:
-            image (PIL.Image.Image): The input image.
+            image (PIL.Image.Image or np.ndarray): The input image, or
+            images as an (H, W, C) array or an (N, H, W, C) batch.
 
         Returns:
-            PIL.Image.Image: The randomly cropped image.
+            PIL.Image.Image or np.ndarray: The randomly cropped image. Each
+            image of a batch is cropped at its own random position.
         """
+        if isinstance(image, np.ndarray):
+            if image.ndim == 4:
+                return self._crop_batch(image)
+            if image.ndim != 3:
+                raise ValueError("Arrays must be (H, W, C) or (N, H, W, C)")
+            h, w = image.shape[:2]
+            left, top, right, bottom = self.crop_box(w, h)
+            return image[top:bottom, left:right]
+
         if not isinstance(image, Image.Image):
-            raise TypeError("The input must be a PIL.Image.Image")
+            raise TypeError("The input must be a PIL.Image.Image or an "
+                            "np.ndarray")
 
         w, h = image.size
-        top = np.random.randint(0, h - self.height + 1)
-        left = np.random.randint(0, w - self.width + 1)
-        bottom = top + self.height
-        right = left + self.width
-        return image.crop((left, top, right, bottom))
+        return image.crop(self.crop_box(w, h))
@@ -1,43 +1,122 @@
-import librosa
 from src.preprocessingABC import PreprocessingTechniqueABC
+from src.polyphaseResampler import PolyphaseResampler
 import numpy as np
-from typing import Tuple
+from typing import Any, Dict, Tuple
 
 
 class AudioResampling(PreprocessingTechniqueABC):
-    def __init__(self, new_sr: int) -> None:
+    deterministic = True
+
+    def __init__(self, new_sr: int, mode: str = "librosa") -> None:
         if not isinstance(new_sr, int):
             raise TypeError("new_sr must be an integer")
         if new_sr <= 0:
             raise ValueError("new_sr must be a positive integer")
+        if mode not in ["librosa", "fast", "high"]:
+            raise ValueError("mode must be 'librosa', 'fast' or 'high'")
         self._new_sr = new_sr
+        self._mode = mode
+        self._resampler = (PolyphaseResampler(mode) if mode != "librosa"
+                           else None)
 
     @property
     def new_sr(self):
         return self._new_sr
 
+    @property
+    def mode(self):
+        return self._mode
+
+    def config(self) -> Dict[str, Any]:
+        """
+        Returns:
+            dict: The class name, new_sr and mode. The resampler is derived
+            from mode, so it is left out.
+        """
+        config = super().config()
+        del config["resampler"]
+        return config
+
+    def _resample_batch(self, batch: Tuple[np.ndarray, np.ndarray,
+                                           np.ndarray]
+                        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Resamples a padded batch of clips, as produced by a Collator. Every
+        clip is resampled over its own length, with the same method as a
+        single clip, so the padding costs nothing and the results match.
+
+        Args:
+            batch (tuple): The (N, T) padded audio, the length of every
+            clip and the sampling rate of every clip.
+
+        Returns:
+            tuple (np.ndarray, np.ndarray, np.ndarray): The padded
+            resampled audio, the new lengths and the new sampling rates.
+        """
+        audio, lengths, sample_rates = batch
+        if not isinstance(audio, np.ndarray) or audio.ndim != 2:
+            raise ValueError("Batched audio must be an (N, T) np.ndarray")
+
+        clips = [self._resample(audio[i, :length], sr) for i, (length, sr)
+                 in enumerate(zip(np.asarray(lengths).tolist(),
+                                  np.asarray(sample_rates).tolist()))]
+        new_lengths = np.array([len(clip) for clip in clips],
+                               dtype=np.int64)
+        out = np.zeros((len(clips), int(new_lengths.max(initial=0))),
+                       dtype=np.float32)
+        for i, clip in enumerate(clips):
+            out[i, :len(clip)] = clip
+        return (out, new_lengths,
+                np.full(len(new_lengths), self.new_sr, dtype=np.int64))
+
+    def _resample(self, audio_ts: np.ndarray, sr: int) -> np.ndarray:
+        """
+        Resamples one clip with the method of the mode.
+
+        Args:
+            audio_ts (np.ndarray): The audio time series.
+
+            sr (int): Its sampling rate.
+
+        Returns:
+            np.ndarray: The resampled audio time series.
+        """
+        if self._resampler is not None:
+            return self._resampler.resample(audio_ts, sr, self.new_sr)
+
+        import librosa
+
+        return librosa.resample(audio_ts, orig_sr=sr, target_sr=self.new_sr)
+
     def __call__(self, audio: Tuple[np.ndarray, int]) -> Tuple[np.ndarray,
                                                                int]:
         """
         Resamples the input audio data to the new sampling rate.
 
+        With mode "librosa", clips are resampled by librosa.resample. With
+        "fast" or "high", they go through a polyphase filter whose kernel is
+        designed once per pair of sampling rates, "fast" using a shorter
+        filter.
+
         Args:
-            audio (Tuple[np.ndarray, int]): The input audio data.
-            tuple: A tuple containing the randomly cropped audio
-            segment and its sampling rate.
+            audio (Tuple[np.ndarray, int]): The input audio data, or a
+            padded batch (audio, lengths, sample_rates) from a Collator,
+            whose clips are resampled with the same method.
 
         Returns:
-            tuple (Tuple[np.ndarray, int]): A tuple containing the randomly
-            cropped audio segment and its sampling rate.
+            tuple (Tuple[np.ndarray, int]): A tuple containing the
+            resampled audio and the new sampling rate, or the resampled
+            batch with its new lengths and sampling rates.
         """
         if not isinstance(audio, tuple):
             raise TypeError("Audio must be a tuple (np.ndarray, int)")
 
+        if len(audio) == 3:
+            return self._resample_batch(audio)
+
         audio_ts, sr = audio
 
         if not isinstance(audio_ts, np.ndarray) or not isinstance(sr, int):
             raise ValueError("Tuple needs to consist of an np.ndarray and int")
 
-        return (librosa.resample(audio_ts,
-                                 orig_sr=sr,
-                                 target_sr=self.new_sr), self.new_sr)
+        return self._resample(audio_ts, sr), self.new_sr
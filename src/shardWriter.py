@@ -0,0 +1,120 @@
+import os
+import json
+import numpy as np
+from src.dataset import Dataset
+from src.atomicWrite import atomic_write
+from typing import Any, Dict, List
+
+SHARD_FORMAT_VERSION = 1
+
+
+class ShardWriter:
+    """
+    Packs the files of a dataset into a few large shard files, so they can
+    be read back with sequential I/O instead of one small read per sample.
+
+    Every shard "shard-XXXXX.rec" holds the encoded bytes of its files back
+    to back (e.g. the original JPEG or WAV bytes), and "shard-XXXXX.npy"
+    holds the (offset, length) of each of them. "meta.json" describes the
+    data type, the shards and the labels. The output is read back with
+    ShardedDataset.
+
+    Attributes:
+        _output_dir (str): The directory the shards are written to.
+        _shard_bytes (int): The size after which a new shard is started.
+    """
+    def __init__(self, output_dir: str,
+                 shard_bytes: int = 256 * 1024 * 1024) -> None:
+        if not isinstance(output_dir, str):
+            raise ValueError("output_dir must be a string")
+        if not isinstance(shard_bytes, int) or shard_bytes <= 0:
+            raise ValueError("shard_bytes must be a positive integer")
+
+        self._output_dir = output_dir
+        self._shard_bytes = shard_bytes
+
+    @property
+    def output_dir(self) -> str:
+        return self._output_dir
+
+    @property
+    def shard_bytes(self) -> int:
+        return self._shard_bytes
+
+    def _close_shard(self, name: str, records: List[List[int]]) -> None:
+        """
+        Writes the offset index of a finished shard.
+
+        Args:
+            name (str): The name of the shard, without extension.
+
+            records (List[List[int]]): The (offset, length) of its files.
+
+        Returns:
+            None
+        """
+        index = np.array(records, dtype=np.int64).reshape(-1, 2)
+        np.save(os.path.join(self.output_dir, f"{name}.npy"), index)
+
+    def write(self, dataset: Dataset) -> None:
+        """
+        Packs a dataset, keeping the order of its samples.
+
+        Args:
+            dataset (Dataset): A lazy or cached dataset, whose data are
+            file paths.
+
+        Returns:
+            None
+        """
+        if not isinstance(dataset, Dataset):
+            raise TypeError("dataset must be an instance of Dataset or its"
+                            "subclass")
+        if dataset.loading_method not in ["lazy", "cached"]:
+            raise ValueError("Only lazy or cached datasets keep the file "
+                             "paths needed to pack them")
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        shards: List[Dict[str, Any]] = []
+        shard_file = None
+        records: List[List[int]] = []
+
+        try:
+            for filepath in dataset.data:
+                if shard_file is None or shard_file.tell() >= \
+                        self.shard_bytes:
+                    if shard_file is not None:
+                        shard_file.close()
+                        self._close_shard(shards[-1]["name"], records)
+                    name = f"shard-{len(shards):05d}"
+                    shards.append({"name": name, "count": 0})
+                    shard_file = open(os.path.join(self.output_dir,
+                                                   f"{name}.rec"), "wb")
+                    records = []
+
+                with open(filepath, "rb") as file:
+                    encoded = file.read()
+                records.append([shard_file.tell(), len(encoded)])
+                shard_file.write(encoded)
+                shards[-1]["count"] += 1
+        finally:
+            if shard_file is not None:
+                shard_file.close()
+                self._close_shard(shards[-1]["name"], records)
+
+        labels = (np.asarray(dataset.labels).tolist()
+                  if len(dataset.labels) else None)
+        classes = (dataset.classes.tolist() if dataset.classes is not None
+                   else None)
+        meta = {
+            "version": SHARD_FORMAT_VERSION,
+            "data_type": dataset.data_type,
+            "shards": shards,
+            "labels": labels,
+            "classes": classes,
+        }
+        # meta.json is written last and atomically, so a reader never sees
+        # a partial pack
+        with atomic_write(os.path.join(self.output_dir, "meta.json"),
+                          encoding="utf-8") as file:
+            json.dump(meta, file)
@@ -0,0 +1,294 @@
+import io
+import os
+import json
+import threading
+import weakref
+import numpy as np
+from src.dataset import Dataset
+from src.shardWriter import SHARD_FORMAT_VERSION
+from src.instrumentation import timed
+from src.decoders import get_decoder
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+def _close_files(fds: Dict[int, int]) -> None:
+    """
+    Closes the open shard files of a dataset.
+
+    Args:
+        fds (dict): The file descriptor of every open shard.
+
+    Returns:
+        None
+    """
+    for fd in fds.values():
+        os.close(fd)
+    fds.clear()
+
+
+class ShardedDataset(Dataset):
+    """
+    A dataset read from the shards written by ShardWriter.
+
+    Samples can be accessed by index like in any other dataset, which
+    reads a single record from its shard through a file kept open.
+
+    For a full pass, items() reads the shards sequentially, read_buffer
+    bytes at a time, and load() decodes what it yields. BatchLoader reads
+    a ShardedDataset this way unless it is given a sampler: the reads stay
+    on the iterating thread and the decoding runs on the workers. With
+    shuffle, the shards, the read_buffer-sized chunks of every shard and
+    the records of every chunk are visited in random order, so memory use
+    is bounded by read_buffer.
+
+    Only the "lazy" loading method is supported.
+
+    Attributes:
+        _read_buffer (int): The number of bytes read at a time by items.
+        _meta (dict): The content of the meta.json of the shards.
+        _fds (dict): The file descriptor of every shard opened by this
+        process for random access.
+    """
+    def __init__(self, root: str,
+                 loading_method: str = "lazy",
+                 read_buffer: int = 16 * 1024 * 1024,
+                 **kwargs: Any) -> None:
+
+        if loading_method != "lazy":
+            raise ValueError("ShardedDataset only supports the 'lazy' "
+                             "loading method")
+        if not isinstance(read_buffer, int) or read_buffer <= 0:
+            raise ValueError("read_buffer must be a positive integer")
+        self._read_buffer = read_buffer
+        self._fds: Dict[int, int] = {}
+        self._fds_lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _close_files, self._fds)
+
+        with open(os.path.join(root, "meta.json"), encoding="utf-8") as file:
+            self._meta = json.load(file)
+        if self._meta.get("version") != SHARD_FORMAT_VERSION:
+            raise ValueError(f"Unsupported shard format in {root}")
+
+        super().__init__(root, self._meta["data_type"], loading_method,
+                         **kwargs)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Open files and locks stay in the process that created them
+        state = self.__dict__.copy()
+        for key in ["_fds", "_fds_lock", "_finalizer"]:
+            del state[key]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._fds = {}
+        self._fds_lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _close_files, self._fds)
+
+    def close(self) -> None:
+        """
+        Closes the shard files opened for random access.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        with self._fds_lock:
+            _close_files(self._fds)
+
+    @property
+    def read_buffer(self) -> int:
+        return self._read_buffer
+
+    @property
+    def shard_paths(self) -> List[str]:
+        return [os.path.join(self.root, f"{shard['name']}.rec")
+                for shard in self._meta["shards"]]
+
+    def _load_data(self) -> None:
+        """
+        Loads the offset index of every shard. Each data entry is a
+        (shard, offset, length) row.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        records = []
+        for shard, info in enumerate(self._meta["shards"]):
+            index = np.load(os.path.join(self.root, f"{info['name']}.npy"))
+            shard_column = np.full((len(index), 1), shard, dtype=np.int64)
+            records.append(np.hstack([shard_column, index]))
+
+        self._data = (np.concatenate(records) if records
+                      else np.empty((0, 3), dtype=np.int64))
+        labels = self._meta["labels"]
+        self._labels = np.asarray(labels) if labels else []
+        if self._meta.get("classes") is not None:
+            self._classes = np.asarray(self._meta["classes"])
+
+    def _decode(self, encoded: bytes) -> Any:
+        """
+        Decodes the bytes of a record with the dataset's decoder.
+
+        Args:
+            encoded (bytes): The encoded file, e.g. JPEG or WAV bytes.
+
+        Returns:
+            PIL.Image.Image or tuple (np.ndarray, int): The decoded sample,
+            None or (None, None) if the decoding fails.
+        """
+        _, decode = get_decoder(self.data_type, self.decoder)
+        return decode(io.BytesIO(encoded))
+
+    def _load_record(self, record: np.ndarray) -> Any:
+        """
+        Reads and decodes a single record from its shard. Shards stay open
+        once read, and records are read with positioned reads, so threads
+        can share the files.
+
+        Args:
+            record (np.ndarray): The (shard, offset, length) of the record.
+
+        Returns:
+            The decoded sample.
+        """
+        shard, offset, length = (int(value) for value in record)
+        with timed("shard.read"):
+            fd = self._fds.get(shard)
+            if fd is None:
+                with self._fds_lock:
+                    fd = self._fds.get(shard)
+                    if fd is None:
+                        fd = os.open(self.shard_paths[shard], os.O_RDONLY)
+                        self._fds[shard] = fd
+            encoded = os.pread(fd, length, offset)
+        with timed("shard.decode"):
+            return self._decode(encoded)
+
+    def _get_extension_and_loader(self):
+        """
+        Records are decoded from their shard whatever the data type.
+
+        Args:
+            None
+
+        Returns:
+            Tuple[str, Callable] of file extension and load method
+        """
+        return ("*.rec", self._load_record)
+
+    def _chunks(self, shard: int) -> List[np.ndarray]:
+        """
+        Groups the records of a shard into runs of consecutive records
+        spanning at most read_buffer bytes. A record larger than read_buffer
+        is a run of its own.
+
+        Args:
+            shard (int): The number of the shard.
+
+        Returns:
+            List[np.ndarray]: The positions in the dataset of the records of
+            every run, in file order.
+        """
+        positions = np.flatnonzero(self._data[:, 0] == shard)
+        positions = positions[np.argsort(self._data[positions, 1],
+                                         kind="stable")]
+        starts = self._data[positions, 1].tolist()
+        ends = (self._data[positions, 1]
+                + self._data[positions, 2]).tolist()
+
+        chunks = []
+        first = 0
+        for i in range(1, len(positions) + 1):
+            if i == len(positions) or ends[i] - starts[first] \
+                    > self.read_buffer:
+                chunks.append(positions[first:i])
+                first = i
+        return chunks
+
+    def items(self, shuffle: bool = False, seed: Optional[int] = None
+              ) -> Iterator[Tuple[bytes, int]]:
+        """
+        Reads the records shard by shard, with one sequential read of at
+        most read_buffer bytes per run of records.
+
+        Args:
+            shuffle (bool): Whether to visit the shards, the runs of every
+            shard and the records of every run in random order.
+
+            seed (int): Seed of the shuffling.
+
+        Returns:
+            iterator: The encoded bytes of every record and its position in
+            the dataset, to be decoded by load.
+        """
+        rng = np.random.default_rng(seed)
+        shards = np.arange(len(self._meta["shards"]))
+        if shuffle:
+            rng.shuffle(shards)
+
+        for shard in shards.tolist():
+            chunks = self._chunks(shard)
+            order = (rng.permutation(len(chunks)).tolist() if shuffle
+                     else range(len(chunks)))
+            with open(self.shard_paths[shard], "rb", buffering=0) as file:
+                for chunk in order:
+                    positions = chunks[chunk]
+                    start = int(self._data[positions[0], 1])
+                    end = int(self._data[positions[-1], 1]
+                              + self._data[positions[-1], 2])
+                    with timed("shard.read"):
+                        file.seek(start)
+                        content = file.read(end - start)
+
+                    if shuffle:
+                        positions = rng.permutation(positions)
+                    for position in positions.tolist():
+                        _, offset, length = self._data[position].tolist()
+                        offset -= start
+                        yield content[offset:offset + length], position
+
+    def load(self, item: Tuple[bytes, int]) -> Any:
+        """
+        Decodes a record yielded by items and applies the transform.
+
+        Args:
+            item (tuple): The encoded bytes of the record and its position.
+
+        Returns:
+            tuple or object: The data sample and its label, if the dataset
+            has labels.
+        """
+        encoded, position = item
+        with timed("shard.decode"):
+            data = self._decode(encoded)
+        if self._transform is not None:
+            data = self._transform(data)
+        if len(self._labels):
+            return data, self._labels[position]
+        return data
+
+    def stream(self, shuffle: bool = False,
+               seed: Optional[int] = None) -> Iterator[Any]:
+        """
+        Iterates over the whole dataset with the sequential reads of items.
+
+        Args:
+            shuffle (bool): Whether to shuffle, see items.
+
+            seed (int): Seed of the shuffling.
+
+        Returns:
+            iterator: The samples, with their label if the dataset has
+            labels.
+        """
+        for item in self.items(shuffle, seed):
+            yield self.load(item)
+
+    def __iter__(self) -> Iterator[Any]:
+        return self.stream()
@@ -0,0 +1,300 @@
+import sys
+import time
+import threading
+import weakref
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+# The header holds, as int64: a ready flag set once the arena is filled,
+# the number of samples and the data type (0 for images, 1 for audio). It
+# is followed by one record per sample: the byte offset of its data, the
+# number of dimensions (-1 if it failed to load), three dimensions and the
+# sampling rate (-1 for images).
+HEADER_SIZE = 3
+RECORD_SIZE = 6
+ALIGNMENT = 64
+DATA_TYPES = ["image", "audio"]
+# The number of seconds attach waits by default for an arena to be filled
+ATTACH_TIMEOUT = 600.0
+
+# Set in a thread while it attaches to a block, see _attach
+_attaching = threading.local()
+_install_lock = threading.Lock()
+_register = None
+
+
+def _register_unless_attaching(name: str, rtype: str) -> None:
+    if getattr(_attaching, "active", False) and rtype == "shared_memory":
+        return
+    _register(name, rtype)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Attaches to an existing shared memory block without registering it with
+    the resource tracker, which would otherwise destroy it when this process
+    exits, while its creator and other processes still use it.
+
+    Args:
+        name (str): The name of the block.
+
+    Returns:
+        shared_memory.SharedMemory: The attached block.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Older versions always register the block. Unregistering it afterwards
+    # is not an option: worker processes may share the tracker of the
+    # creator, whose registration would be removed too. Registration is
+    # skipped instead, only for the attaching thread, so blocks created
+    # meanwhile by other threads are still registered.
+    global _register
+    with _install_lock:
+        if _register is None:
+            _register = resource_tracker.register
+            resource_tracker.register = _register_unless_attaching
+    _attaching.active = True
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        _attaching.active = False
+
+
+class SharedArena:
+    """
+    Decoded samples stored once in a shared memory block, which every
+    process on the node can attach to by name.
+
+    Images are stored as (H, W, C) uint8 arrays and audio as float32 time
+    series, behind a small index of offsets, shapes and sampling rates.
+    Samples are returned as read-only views of the block, so reading them
+    copies nothing. Pickling an arena only pickles its name: the copy in a
+    worker process attaches to the same block.
+
+    The process that builds the arena owns the block and removes it when
+    the arena is closed or the process exits. Processes that are attached
+    at that point keep their mapping.
+
+    Attributes:
+        _name (str): The name of the shared memory block.
+        _owner (bool): Whether this process created the block.
+        _records (np.ndarray): The index of the samples.
+    """
+    def __init__(self, memory: shared_memory.SharedMemory,
+                 owner: bool) -> None:
+        self._memory = memory
+        self._name = memory.name
+        self._owner = owner
+        header = np.ndarray((HEADER_SIZE,), dtype=np.int64,
+                            buffer=memory.buf)
+        self._records = np.ndarray((int(header[1]), RECORD_SIZE),
+                                   dtype=np.int64, buffer=memory.buf,
+                                   offset=HEADER_SIZE * 8)
+        self._data_type = DATA_TYPES[int(header[2])]
+        self._dtype = np.uint8 if self._data_type == "image" else np.float32
+        self._finalizer = weakref.finalize(
+            self, SharedArena._release, memory, owner)
+
+    @staticmethod
+    def _release(memory: shared_memory.SharedMemory, owner: bool) -> None:
+        try:
+            memory.close()
+        except BufferError:
+            # Views handed out are still alive; the mapping goes away with
+            # the process
+            pass
+        if owner:
+            try:
+                memory.unlink()
+            except FileNotFoundError:
+                pass
+
+    @classmethod
+    def build(cls, name: str, data_type: str, sizes: Iterable[tuple],
+              samples: Iterable[Any]) -> 'SharedArena':
+        """
+        Creates the shared block and fills it with decoded samples, or
+        attaches to it if another process already created it.
+
+        Args:
+            name (str): The name of the block.
+
+            data_type (str): Either "image" or "audio".
+
+            sizes (Iterable[tuple]): The shape of every sample as an array,
+            known before decoding, e.g. from the file headers. It is used to
+            size the block.
+
+            samples (Iterable): The decoded samples, in order: PIL images
+            or arrays, or (np.ndarray, int) audio tuples.
+
+        Returns:
+            SharedArena: The filled arena.
+        """
+        if data_type not in DATA_TYPES:
+            raise ValueError("data_type must be in 'image' or 'audio'")
+        shapes = [tuple(int(d) for d in shape) for shape in sizes]
+        itemsize = 1 if data_type == "image" else 4
+
+        offsets = np.zeros(len(shapes), dtype=np.int64)
+        position = (HEADER_SIZE + len(shapes) * RECORD_SIZE) * 8
+        for i, shape in enumerate(shapes):
+            position += -position % ALIGNMENT
+            offsets[i] = position
+            position += int(np.prod(shape)) * itemsize
+
+        try:
+            memory = shared_memory.SharedMemory(name=name, create=True,
+                                                size=max(position, 1))
+        except FileExistsError:
+            return cls.attach(name)
+
+        try:
+            header = np.ndarray((HEADER_SIZE,), dtype=np.int64,
+                                buffer=memory.buf)
+            header[:] = [0, len(shapes), DATA_TYPES.index(data_type)]
+            arena = cls(memory, owner=True)
+            for i, sample in enumerate(samples):
+                arena._write(i, offsets[i], shapes[i], sample)
+            # Attached processes wait for this flag
+            header[0] = 1
+        except BaseException:
+            memory.unlink()
+            raise
+        return arena
+
+    @classmethod
+    def attach(cls, name: str, timeout: Optional[float] = ATTACH_TIMEOUT
+               ) -> 'SharedArena':
+        """
+        Attaches to an arena built by another process, waiting until it is
+        filled.
+
+        Args:
+            name (str): The name of the block.
+
+            timeout (float): The maximum number of seconds to wait, after
+            which a creator that exited before filling the arena is
+            assumed. If None, waits indefinitely.
+
+        Returns:
+            SharedArena: The arena.
+        """
+        memory = _attach(name)
+        header = np.ndarray((HEADER_SIZE,), dtype=np.int64,
+                            buffer=memory.buf)
+        start = time.monotonic()
+        while header[0] != 1:
+            if timeout is not None and time.monotonic() - start > timeout:
+                del header
+                memory.close()
+                raise TimeoutError(f"Shared arena {name} was not filled in "
+                                   f"{timeout} seconds, its creator may "
+                                   f"have exited before filling it")
+            time.sleep(0.05)
+        del header
+        return cls(memory, owner=False)
+
+    def _write(self, index: int, offset: int, shape: tuple,
+               sample: Any) -> None:
+        """
+        Copies a decoded sample into its slot.
+
+        Args:
+            index (int): The index of the sample.
+
+            offset (int): The byte offset of its slot.
+
+            shape (tuple): The shape the slot was sized for.
+
+            sample: The decoded sample.
+
+        Returns:
+            None
+        """
+        sr = -1
+        if self._data_type == "audio":
+            sample, sr = sample
+        record = self._records[index]
+        if sample is None:
+            record[:] = [offset, -1, 0, 0, 0, -1]
+            return
+
+        array = np.asarray(sample, dtype=self._dtype)
+        if array.shape != shape:
+            raise ValueError(f"Sample {index} has shape {array.shape}, "
+                             f"expected {shape} from its header")
+        target = np.ndarray(shape, dtype=self._dtype,
+                            buffer=self._memory.buf, offset=int(offset))
+        target[...] = array
+        dims = list(shape) + [0] * (3 - len(shape))
+        record[:] = [offset, len(shape), *dims, sr]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"_name": self._name}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        arena = SharedArena.attach(state["_name"])
+        self.__dict__.update(arena.__dict__)
+        # The finalizer must release the block when this object goes away
+        arena._finalizer.detach()
+        self._finalizer = weakref.finalize(
+            self, SharedArena._release, self._memory, False)
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def data_type(self) -> str:
+        return self._data_type
+
+    @property
+    def nbytes(self) -> int:
+        return self._memory.size
+
+    def get(self, index: int) -> Any:
+        """
+        Retrieves a sample.
+
+        Args:
+            index (int): The index of the sample.
+
+        Returns:
+            The sample as a read-only array, an (np.ndarray, int) tuple for
+            audio. None, or (None, None) for audio, if it failed to load.
+        """
+        offset, ndim, d0, d1, d2, sr = self._records[index].tolist()
+        if ndim < 0:
+            return None if self._data_type == "image" else (None, None)
+
+        array = np.ndarray((d0, d1, d2)[:ndim], dtype=self._dtype,
+                           buffer=self._memory.buf, offset=offset)
+        array.flags.writeable = False
+        if self._data_type == "image":
+            return array
+        return array, sr
+
+    def close(self) -> None:
+        """
+        Releases this process's mapping, and removes the block if this
+        process created it.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self._finalizer()
+
+    def __getitem__(self, index: int) -> Any:
+        return self.get(index)
+
+    def __iter__(self) -> Iterator[Any]:
+        for index in range(len(self)):
+            yield self.get(index)
+
+    def __len__(self) -> int:
+        return len(self._records)
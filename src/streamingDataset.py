@@ -0,0 +1,280 @@
+import os
+import queue
+import fnmatch
+import threading
+import numpy as np
+from src.decoders import DEFAULT_DECODERS, get_decoder
+from src.preprocessingABC import PreprocessingTechniqueABC
+from src.instrumentation import timed
+from typing import Any, Iterator, List, Optional, Tuple
+from src.epochMixin import EpochMixin
+
+# Marks the end of a scan in the queue of discovered files
+_END = object()
+
+
+class StreamingDataset(EpochMixin):
+    """
+    A dataset read in a single pass while its files are being discovered.
+
+    A background thread walks root with os.scandir and queues every file
+    as soon as it is found, so the first samples are yielded before the
+    scan finishes. The queue is bounded: the scanner waits when the
+    consumer falls behind. Files are yielded in the order the file system
+    lists them, optionally mixed by a bounded shuffle buffer.
+
+    With the "tree" layout, files are read from the subfolders of root and
+    labeled with the int64 code of their subfolder in classes, the sorted
+    names of the subfolders listed when the dataset is created, like the
+    labels of a TreeDataset. With the "joined" layout, they are read from
+    root itself and yielded without label.
+
+    The dataset has no length and no random access. It can be iterated
+    directly or through a BatchLoader.
+
+    Attributes:
+        _root (str): The root folder of the dataset.
+        _data_type (str): Either "image" or "audio".
+        _layout (str): Either "tree" or "joined".
+        _shuffle_buffer (int): The number of files the shuffle buffer
+        holds. With 0, files are yielded in discovery order.
+        _seed (int): The seed of the shuffle buffer, or None.
+        _queue_size (int): The maximum number of discovered files waiting
+        to be consumed.
+        _decoder (str): The name of the decoder of the files.
+        _transform (PreprocessingTechniqueABC): Applied to every sample.
+        _classes (np.ndarray): The class names of the "tree" layout, or
+        None.
+        _epoch (int): The current epoch.
+    """
+    def __init__(self, root: str, data_type: str = "image",
+                 layout: str = "joined", shuffle_buffer: int = 0,
+                 seed: Optional[int] = None, queue_size: int = 4096,
+                 decoder: Optional[str] = None,
+                 transform: Optional[PreprocessingTechniqueABC] = None
+                 ) -> None:
+        if not isinstance(root, str):
+            raise ValueError("root must be a string")
+        if data_type not in ["image", "audio"]:
+            raise ValueError("data_type must be in 'image' or 'audio'")
+        if layout not in ["tree", "joined"]:
+            raise ValueError("layout must be 'tree' or 'joined'")
+        if not isinstance(shuffle_buffer, int) or shuffle_buffer < 0:
+            raise ValueError("shuffle_buffer must be a non-negative integer")
+        if seed is not None and not isinstance(seed, int):
+            raise ValueError("seed must be an integer or None")
+        if not isinstance(queue_size, int) or queue_size <= 0:
+            raise ValueError("queue_size must be a positive integer")
+        if decoder is not None and not isinstance(decoder, str):
+            raise ValueError("decoder must be a string or None")
+        if transform is not None and not isinstance(
+                transform, PreprocessingTechniqueABC):
+            raise TypeError("transform must be a preprocessing technique")
+
+        self._root = root
+        self._data_type = data_type
+        self._layout = layout
+        self._shuffle_buffer = shuffle_buffer
+        self._seed = seed
+        self._queue_size = queue_size
+        self._decoder = (decoder if decoder is not None
+                         else DEFAULT_DECODERS[data_type])
+        self._pattern, self._loader = get_decoder(data_type, self._decoder)
+        self._transform = transform
+        self._classes: Optional[np.ndarray] = None
+        if layout == "tree":
+            with os.scandir(root) as entries:
+                self._classes = np.array(sorted(
+                    entry.name for entry in entries
+                    if entry.is_dir() and not entry.name.startswith(".")),
+                    dtype=str)
+        self._epoch = 0
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    @property
+    def data_type(self) -> str:
+        return self._data_type
+
+    @property
+    def layout(self) -> str:
+        return self._layout
+
+    @property
+    def shuffle_buffer(self) -> int:
+        return self._shuffle_buffer
+
+    @property
+    def seed(self) -> Optional[int]:
+        return self._seed
+
+    @property
+    def decoder(self) -> str:
+        return self._decoder
+
+    @property
+    def transform(self) -> Optional[PreprocessingTechniqueABC]:
+        return self._transform
+
+    @property
+    def classes(self) -> Optional[np.ndarray]:
+        """
+        Returns:
+            np.ndarray: The class names, indexed by the integer labels of
+            the "tree" layout, or None for the "joined" layout.
+        """
+        return self._classes
+
+    def _list_files(self, directory: str) -> Iterator[str]:
+        """
+        Lists the data files of a directory as they are found.
+
+        Args:
+            directory (str): The directory to list.
+
+        Returns:
+            iterator: The paths of the files matching the decoder's pattern.
+        """
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if (not entry.name.startswith(".")
+                        and fnmatch.fnmatch(entry.name, self._pattern)
+                        and entry.is_file()):
+                    yield entry.path
+
+    def _walk(self) -> Iterator[Tuple[str, Optional[int]]]:
+        """
+        Walks root in discovery order.
+
+        Args:
+            None
+
+        Returns:
+            iterator: The path and label of every file. The label is the
+            code of the class folder for the "tree" layout, None otherwise.
+        """
+        if self.layout == "joined":
+            for path in self._list_files(self.root):
+                yield path, None
+            return
+
+        for code, name in enumerate(self._classes.tolist()):
+            for path in self._list_files(os.path.join(self.root, name)):
+                yield path, code
+
+    def _scan(self, files: queue.Queue, stop: threading.Event) -> None:
+        """
+        Puts every discovered file in the queue, then the end marker, or
+        the exception that stopped the scan.
+
+        Args:
+            files (queue.Queue): The queue of discovered files.
+
+            stop (threading.Event): Set by the consumer to end the scan
+            early.
+
+        Returns:
+            None
+        """
+        def put(item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    files.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        try:
+            with timed("stream.scan"):
+                for item in self._walk():
+                    if not put(item):
+                        return
+        except Exception as e:
+            put(e)
+            return
+        put(_END)
+
+    def _discover(self) -> Iterator[Tuple[str, Optional[int]]]:
+        """
+        Runs the scan on a background thread and yields its files.
+
+        Args:
+            None
+
+        Returns:
+            iterator: The path and label of every file, in discovery order.
+        """
+        files: queue.Queue = queue.Queue(maxsize=self._queue_size)
+        stop = threading.Event()
+        scanner = threading.Thread(target=self._scan, args=(files, stop),
+                                   daemon=True)
+        scanner.start()
+        try:
+            while True:
+                item = files.get()
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            scanner.join()
+
+    def items(self) -> Iterator[Tuple[str, Optional[int]]]:
+        """
+        Yields the files of the dataset, mixed by the shuffle buffer if it
+        is enabled. Once the buffer is full, every new file replaces a
+        random file of the buffer, which is yielded.
+
+        Args:
+            None
+
+        Returns:
+            iterator: The path and label of every file.
+        """
+        if self.shuffle_buffer == 0:
+            yield from self._discover()
+            return
+
+        rng = np.random.default_rng(
+            None if self.seed is None else [self.seed, self.epoch])
+        buffer: List[Tuple[str, Optional[int]]] = []
+        for item in self._discover():
+            if len(buffer) < self.shuffle_buffer:
+                buffer.append(item)
+                continue
+            position = int(rng.integers(len(buffer)))
+            yield buffer[position]
+            buffer[position] = item
+
+        for position in rng.permutation(len(buffer)):
+            yield buffer[position]
+
+    def load(self, item: Tuple[str, Optional[int]]) -> Any:
+        """
+        Decodes a file yielded by items and applies the transform.
+
+        Args:
+            item (tuple): The path and label of the file.
+
+        Returns:
+            tuple or object: The data sample and its label, or only the
+            sample for the "joined" layout.
+        """
+        path, label = item
+        data = self._loader(path)
+        if self._transform is not None:
+            data = self._transform(data)
+        return (data, np.int64(label)) if label is not None else data
+
+    def __iter__(self) -> Iterator[Any]:
+        """
+        Returns:
+            iterator: The samples, with their label for the "tree" layout.
+        """
+        for item in self.items():
+            yield self.load(item)
@@ -0,0 +1,128 @@
+import numpy as np
+from src.dataset import Dataset
+from src.concatDataset import ConcatDataset
+from typing import Any, List, Tuple
+
+
+class SubsetDataset(Dataset):
+    """
+    A view of some samples of another dataset, selected by index.
+
+    The view holds only the parent and an index array. Items are read
+    from the parent through the index array, and every attribute the view
+    does not set, e.g. the configuration read by the base properties, is
+    looked up on the parent. Creating a view copies no data and costs no
+    file access, and the view follows later changes to the parent. A view
+    of a view points at the original dataset directly.
+
+    Attributes:
+        _parent (Dataset): The dataset the samples are read from.
+        _indices (np.ndarray): The index in the parent of every sample of
+        the view.
+    """
+    def __init__(self, parent: Dataset, indices: Any) -> None:
+        if not isinstance(parent, Dataset):
+            raise TypeError("parent must be an instance of Dataset or its"
+                            "subclass")
+        indices = np.asarray(indices)
+        if indices.size == 0:
+            indices = indices.astype(np.int64)
+        if indices.ndim != 1 or not np.issubdtype(indices.dtype,
+                                                  np.integer):
+            raise ValueError("indices must be a 1-D array of integers")
+        indices = indices.astype(np.int64)
+        indices[indices < 0] += len(parent)
+        if np.any((indices < 0) | (indices >= len(parent))):
+            raise IndexError("Subset index out of range")
+
+        if isinstance(parent, SubsetDataset):
+            indices = parent._indices[indices]
+            parent = parent._parent
+
+        self._parent = parent
+        self._indices = indices
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes the view does not have
+        if name.startswith("__") or name in ["_parent", "_indices"]:
+            raise AttributeError(name)
+        return getattr(self._parent, name)
+
+    @property
+    def parent(self) -> Dataset:
+        return self._parent
+
+    @property
+    def indices(self) -> np.ndarray:
+        return self._indices
+
+    @property
+    def data(self) -> List:
+        # A concatenation holds no samples of its own
+        data = (self._parent.data if isinstance(self._parent, ConcatDataset)
+                else self._parent._data)
+        return [data[i] for i in self._indices.tolist()]
+
+    @property
+    def labels(self) -> List[str | int] | np.ndarray:
+        labels = self._parent.labels
+        if len(labels) == 0:
+            return labels
+        if isinstance(labels, np.ndarray):
+            return labels[self._indices]
+        return [labels[i] for i in self._indices.tolist()]
+
+    def _load_data(self) -> None:
+        """
+        Does nothing: the samples are loaded by the parent dataset.
+
+        Returns:
+            None
+        """
+        pass
+
+    def _getitem(self, index: int) -> Tuple[Any, Any]:
+        """
+        Retrieves the data sample at the specified index of the view.
+
+        Args:
+            index (int): The index of the data sample in the view.
+
+        Returns:
+            tuple or object: The data sample and its corresponding
+            label (if available).
+        """
+        return self._parent._getitem(
+            int(self._indices[self._check_index(index)]))
+
+    def warm_up(self) -> None:
+        """
+        Decodes and caches the samples of the parent dataset.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self._parent.warm_up()
+
+    def durations(self) -> np.ndarray:
+        """
+        Args:
+            None
+
+        Returns:
+            np.ndarray: The duration of every sample of the view in seconds.
+        """
+        return self._parent.durations()[self._indices]
+
+    def __len__(self) -> int:
+        """
+        Args:
+            None
+
+        Returns:
+            An int representing the number of samples of the view
+        """
+        return len(self._indices)
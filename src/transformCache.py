@@ -0,0 +1,189 @@
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+from src.preprocessingABC import PreprocessingTechniqueABC
+from src.atomicWrite import atomic_write
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+IDENTITIES = ["stat", "content"]
+
+
+class TransformCache:
+    """
+    A content-addressed disk cache of the output of deterministic
+    preprocessing steps, applied to decoded files.
+
+    Every entry is keyed by the identity of the source file and by the
+    configuration of the steps, so changing a file or a step parameter
+    leads to new keys and stale entries are never read. The file identity
+    is either its absolute path, size and modification time ("stat"), or
+    a hash of its content ("content"), which survives copies and renames
+    but reads the whole file. Content hashes are memoized per path, size
+    and modification time, so a file is only read again once it changed.
+
+    Images are stored as (H, W, C) uint8 .npy files, audio as .npz files
+    holding the float32 time series and its sampling rate. Entries are
+    written atomically, so several processes can share the cache.
+
+    Attributes:
+        _directory (str): The directory holding the entries.
+        _identity (str): How files are identified, "stat" or "content".
+        _signature (str): The hash of the step configurations, the data
+        type and the decoder.
+        _digests (dict): The size, modification time and content hash of
+        every file hashed so far, by path.
+    """
+    def __init__(self, directory: str,
+                 steps: Sequence[PreprocessingTechniqueABC], data_type: str,
+                 decoder: str, identity: str = "stat") -> None:
+        if not isinstance(directory, str):
+            raise ValueError("directory must be a string")
+        if data_type not in ["image", "audio"]:
+            raise ValueError("data_type must be in 'image' or 'audio'")
+        if identity not in IDENTITIES:
+            raise ValueError("identity must be 'stat' or 'content'")
+        if not all(step.deterministic for step in steps):
+            raise ValueError("Only deterministic steps can be cached")
+
+        self._directory = directory
+        self._data_type = data_type
+        self._identity = identity
+        description = {"steps": [step.config() for step in steps],
+                       "data_type": data_type, "decoder": decoder}
+        self._signature = hashlib.sha1(json.dumps(
+            description, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+        self._digests_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Locks cannot be pickled, every process gets its own
+        state = self.__dict__.copy()
+        del state["_digests_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._digests_lock = threading.Lock()
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def identity(self) -> str:
+        return self._identity
+
+    @property
+    def signature(self) -> str:
+        return self._signature
+
+    def key(self, filepath: str) -> str:
+        """
+        Computes the key of the entry of a file.
+
+        Args:
+            filepath (str): The path of the source file.
+
+        Returns:
+            str: A SHA-1 hex digest of the file identity and the signature.
+        """
+        if not isinstance(filepath, str):
+            raise TypeError("TransformCache keys files by their path, got "
+                            f"{type(filepath).__name__}")
+        sha = hashlib.sha1(self._signature.encode("utf-8"))
+        stat = os.stat(filepath)
+        if self._identity == "stat":
+            sha.update(f"{os.path.abspath(filepath)}\0{stat.st_size}\0"
+                       f"{stat.st_mtime_ns}".encode("utf-8"))
+        else:
+            sha.update(self._digest(filepath, stat.st_size,
+                                    stat.st_mtime_ns).encode("utf-8"))
+        return sha.hexdigest()
+
+    def _digest(self, filepath: str, size: int, mtime: int) -> str:
+        """
+        Hashes the content of a file, unless it was already hashed with the
+        same size and modification time.
+
+        Args:
+            filepath (str): The path of the file.
+
+            size (int): The size of the file in bytes.
+
+            mtime (int): The modification time of the file in nanoseconds.
+
+        Returns:
+            str: A SHA-1 hex digest of the content of the file.
+        """
+        entry = self._digests.get(filepath)
+        if entry is not None and entry[:2] == (size, mtime):
+            return entry[2]
+
+        sha = hashlib.sha1()
+        with open(filepath, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                sha.update(block)
+        digest = sha.hexdigest()
+        with self._digests_lock:
+            self._digests[filepath] = (size, mtime, digest)
+        return digest
+
+    def _path(self, key: str) -> str:
+        suffix = ".npy" if self._data_type == "image" else ".npz"
+        return os.path.join(self._directory, key[:2], key + suffix)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Reads an entry.
+
+        Args:
+            key (str): The key of the entry.
+
+        Returns:
+            The cached (H, W, C) array for images, the (np.ndarray, int)
+            tuple for audio, or None if there is no entry.
+        """
+        path = self._path(key)
+        try:
+            if self._data_type == "image":
+                return np.load(path)
+            with np.load(path) as entry:
+                return entry["audio"], int(entry["sr"])
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, sample: Any) -> Optional[Any]:
+        """
+        Writes an entry. Samples that failed to load are not cached.
+
+        Args:
+            key (str): The key of the entry.
+
+            sample: The output of the steps, a PIL image or an array for
+            images, an (np.ndarray, int) tuple for audio.
+
+        Returns:
+            The sample in its cached form, i.e. as returned by get, or None
+            if it was not cached.
+        """
+        if self._data_type == "image":
+            if sample is None:
+                return None
+            value = np.ascontiguousarray(sample, dtype=np.uint8)
+        else:
+            audio_ts, sr = sample
+            if audio_ts is None:
+                return None
+            value = (np.ascontiguousarray(audio_ts, dtype=np.float32),
+                     int(sr))
+
+        with atomic_write(self._path(key), "wb") as file:
+            if self._data_type == "image":
+                np.save(file, value)
+            else:
+                np.savez(file, audio=value[0], sr=value[1])
+        return value
@@ -1,7 +1,8 @@
-import os
-import glob
+import numpy as np
 from src.dataset import Dataset
-from typing import Optional, List, Any
+from src.fileManifest import FileManifest
+from src.integrityScan import exclude_quarantined
+from typing import Optional, List, Any, Dict
 
 
 class TreeDataset(Dataset):
@@ -9,12 +10,38 @@ class TreeDataset(Dataset):
                  data_type: str,
                  loading_method: str,
                  data: Optional[List[Any]] = None,
-                 labels: Optional[List[Any]] = None) -> None:
-        super().__init__(root, data_type, loading_method, data, labels)
+                 labels: Optional[List[Any]] = None,
+                 manifest_path: Optional[str] = None,
+                 quarantine_path: Optional[str] = None,
+                 **kwargs: Any) -> None:
+
+        if manifest_path is not None and not isinstance(manifest_path, str):
+            raise ValueError("manifest_path must be a string or None")
+        self._manifest_path = manifest_path
+
+        if quarantine_path is not None and not isinstance(quarantine_path,
+                                                          str):
+            raise ValueError("quarantine_path must be a string or None")
+        self._quarantine_path = quarantine_path
+
+        super().__init__(root, data_type, loading_method, data, labels,
+                         **kwargs)
+
+    @property
+    def manifest_path(self) -> Optional[str]:
+        return self._manifest_path
+
+    @property
+    def quarantine_path(self) -> Optional[str]:
+        return self._quarantine_path
 
     def _load_data(self) -> None:
         """
-        Loads data from the disk stored in the root folder
+        Loads data from the disk stored in the root folder. If a manifest
+        path is set, the file listing is read from and saved to it. Files
+        listed in the quarantine manifest, if set, are left out. The
+        labels are stored as integer codes into classes, the sorted names
+        of the class folders.
 
         Args:
             None
@@ -23,10 +50,14 @@ class TreeDataset(Dataset):
             None
         """
         extension, load_method = self._get_extension_and_loader()
-        for class_dir in os.listdir(self.root):
-            class_path = os.path.join(self.root, class_dir)
-            if os.path.isdir(class_path):
-                for filepath in glob.glob(os.path.join(class_path,
-                                                       extension)):
-                    self._handle_load_method(load_method, filepath)
-                    self.labels.append(class_dir)
+        manifest = FileManifest(self.root, extension, self.manifest_path)
+        entries = exclude_quarantined(manifest.scan(subdirectories=True),
+                                      self.quarantine_path)
+        self._load_files(load_method, [entry[0] for entry in entries])
+
+        codes: Dict[str, int] = {}
+        for entry in entries:
+            codes.setdefault(entry[1], len(codes))
+        self._classes = np.array(list(codes), dtype=str)
+        self.labels = np.fromiter((codes[entry[1]] for entry in entries),
+                                  dtype=np.int64, count=len(entries))
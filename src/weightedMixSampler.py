@@ -0,0 +1,112 @@
+import numpy as np
+from src.concatDataset import ConcatDataset
+from typing import Iterator, Optional, Sequence
+from src.epochMixin import EpochMixin
+
+
+class WeightedMixSampler(EpochMixin):
+    """
+    Draws the samples of a ConcatDataset from its sources at configured
+    ratios, e.g. to oversample a small dataset.
+
+    Every drawn sample first picks a source with probability proportional
+    to its weight. Within a source, samples are taken from a shuffled
+    permutation, reshuffled each time it is used up, so a source is covered
+    evenly however often it is drawn. Draws are made chunk_size samples at
+    a time with vectorized NumPy calls.
+
+    Call set_epoch at the start of every epoch to get new draws.
+
+    Attributes:
+        _dataset (ConcatDataset): The dataset whose sources are mixed.
+        _weights (np.ndarray): The probability of drawing every source.
+        _num_samples (int): The number of samples drawn per epoch.
+        _seed (int): The seed of the draws.
+        _chunk_size (int): The number of samples drawn at a time.
+        _epoch (int): The current epoch.
+    """
+    def __init__(self, dataset: ConcatDataset, weights: Sequence[float],
+                 num_samples: Optional[int] = None, seed: int = 0,
+                 chunk_size: int = 65536) -> None:
+        if not isinstance(dataset, ConcatDataset):
+            raise TypeError("dataset must be a ConcatDataset")
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.shape != (len(dataset.datasets),):
+            raise ValueError("weights must hold one weight per source")
+        if np.any(weights < 0) or weights.sum() <= 0:
+            raise ValueError("weights must be non-negative and not all zero")
+        sizes = np.diff(dataset.offsets)
+        if np.any((weights > 0) & (sizes == 0)):
+            raise ValueError("weighted sources must not be empty")
+        if num_samples is None:
+            num_samples = len(dataset)
+        if not isinstance(num_samples, int) or num_samples < 0:
+            raise ValueError("num_samples must be a non-negative integer")
+        if not isinstance(seed, int):
+            raise ValueError("seed must be an integer")
+        if not isinstance(chunk_size, int) or chunk_size <= 0:
+            raise ValueError("chunk_size must be a positive integer")
+
+        self._dataset = dataset
+        self._weights = weights / weights.sum()
+        self._sizes = sizes
+        self._num_samples = num_samples
+        self._seed = seed
+        self._chunk_size = chunk_size
+        self._epoch = 0
+
+    @property
+    def weights(self) -> np.ndarray:
+        return self._weights
+
+    @property
+    def num_samples(self) -> int:
+        return self._num_samples
+
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+    def __iter__(self) -> Iterator[int]:
+        """
+        Returns:
+            iterator: The global indices of the drawn samples.
+        """
+        rng = np.random.default_rng([self.seed, self.epoch])
+        num_sources = len(self._sizes)
+        # The unused part of the current permutation of every source
+        pools = [np.empty(0, dtype=np.int64) for _ in range(num_sources)]
+        offsets = self._dataset.offsets
+
+        remaining = self.num_samples
+        while remaining > 0:
+            count = min(self._chunk_size, remaining)
+            remaining -= count
+            sources = rng.choice(num_sources, size=count, p=self._weights)
+            indices = np.empty(count, dtype=np.int64)
+
+            for source in range(num_sources):
+                positions = np.flatnonzero(sources == source)
+                needed = len(positions)
+                if needed == 0:
+                    continue
+                pool = pools[source]
+                if len(pool) < needed:
+                    # All the permutations a small, oversampled source
+                    # needs are joined at once
+                    size = int(self._sizes[source])
+                    count = -(-(needed - len(pool)) // size)
+                    pool = np.concatenate(
+                        [pool] + [rng.permutation(size)
+                                  for _ in range(count)])
+                indices[positions] = pool[:needed] + offsets[source]
+                pools[source] = pool[needed:]
+
+            yield from indices.tolist()
+
+    def __len__(self) -> int:
+        """
+        Returns:
+            int: The number of samples drawn per epoch.
+        """
+        return self.num_samples
@@ -0,0 +1,35 @@
+import os
+import shutil
+import pytest
+from benchmarks.syntheticData import generate_audio_corpus, generate_image_tree
+
+
+@pytest.fixture(scope="session")
+def image_root(tmp_path_factory) -> str:
+    """
+    A small TreeDataset image layout: 24 images over 3 classes.
+    """
+    root = str(tmp_path_factory.mktemp("images"))
+    return generate_image_tree(root, num_images=24, num_classes=3,
+                               size=(40, 48), seed=0)
+
+
+@pytest.fixture(scope="session")
+def audio_root(tmp_path_factory) -> str:
+    """
+    A small JoinedDataset audio layout: 8 clips of 0.5 to 1.5 seconds, with
+    regression labels in the parent folder.
+    """
+    root = str(tmp_path_factory.mktemp("audio"))
+    return generate_audio_corpus(root, num_clips=8, duration=(0.5, 1.5),
+                                 sr=8000, seed=0)
+
+
+@pytest.fixture
+def image_copy(image_root, tmp_path) -> str:
+    """
+    A copy of the image layout that a test may modify.
+    """
+    root = os.path.join(str(tmp_path), "images")
+    shutil.copytree(image_root, root)
+    return root
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from src.treeDataset import TreeDataset
+from src.batchLoader import BatchLoader
+
+
+def _labels(loader: BatchLoader, seed: int):
+    np.random.seed(seed)
+    return [[int(label) for _, label in batch] for batch in loader]
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_workers_keep_batch_order(image_root, backend):
+    dataset = TreeDataset(image_root, "image", "lazy")
+    serial = _labels(BatchLoader(dataset, 5), seed=3)
+    parallel = _labels(BatchLoader(dataset, 5, num_workers=3, prefetch=2,
+                                   backend=backend), seed=3)
+    assert parallel == serial
+    assert sum(len(batch) for batch in parallel) == len(dataset)
+
+
+def test_unshuffled_batches_follow_dataset_order(image_root):
+    dataset = TreeDataset(image_root, "image", "lazy")
+    loader = BatchLoader(dataset, 7, shuffle=False, num_workers=2)
+    labels = [label for batch in loader for _, label in batch]
+    assert labels == [int(label) for label in dataset.labels]
+
+
+def test_last_batch_can_be_dropped(image_root):
+    dataset = TreeDataset(image_root, "image", "lazy")
+    loader = BatchLoader(dataset, 5, include_last_batch=False,
+                         num_workers=2)
+    assert [len(batch) for batch in loader] == [5] * (len(dataset) // 5)
+
+
+class _FailingDataset(TreeDataset):
+    def __getitem__(self, index):
+        if index == 4:
+            raise RuntimeError("boom")
+        return super().__getitem__(index)
+
+
+def test_worker_errors_reach_the_caller(image_root):
+    dataset = _FailingDataset(image_root, "image", "lazy")
+    with pytest.raises(RuntimeError, match="boom"):
+        list(BatchLoader(dataset, 3, shuffle=False, num_workers=2))
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from PIL import Image
+from src.collate import Collator
+
+
+def test_images_and_labels_are_stacked():
+    rng = np.random.default_rng(0)
+    arrays = [rng.integers(0, 256, (6, 5, 3), dtype=np.uint8)
+              for _ in range(4)]
+    batch = [(Image.fromarray(array), label)
+             for label, array in enumerate(arrays)]
+    images, labels = Collator()(batch)
+    assert images.shape == (4, 6, 5, 3) and images.dtype == np.uint8
+    assert np.array_equal(images, np.stack(arrays))
+    assert np.array_equal(labels, [0, 1, 2, 3])
+
+
+def test_grayscale_images_get_a_channel_axis():
+    batch = [np.full((4, 4), i, dtype=np.uint8) for i in range(3)]
+    images = Collator()(batch)
+    assert images.shape == (3, 4, 4, 1)
+    assert np.array_equal(images[:, 0, 0, 0], [0, 1, 2])
+
+
+def test_audio_is_zero_padded():
+    clips = [(np.ones(3, np.float32), 8000), (np.ones(5, np.float32), 8000)]
+    (audio, lengths, sample_rates), labels = Collator()(
+        [(clip, 1.5) for clip in clips])
+    assert audio.shape == (2, 5)
+    assert np.array_equal(audio[0], [1, 1, 1, 0, 0])
+    assert np.array_equal(lengths, [3, 5])
+    assert np.array_equal(sample_rates, [8000, 8000])
+    assert labels.dtype == np.float64
+
+
+def test_buffers_are_reused_and_cleared():
+    collator = Collator()
+    first = collator([(np.ones(5, np.float32), 8000)] * 2)[0]
+    second = collator([(np.ones(2, np.float32), 8000)] * 2)[0]
+    assert np.shares_memory(first, second)
+    assert np.array_equal(second, np.ones((2, 2)))
+
+    long_audio = collator([(np.ones(5, np.float32), 8000)] * 2)[0]
+    short_audio = collator([(np.ones(5, np.float32), 8000),
+                            (np.ones(2, np.float32), 8000)])[0]
+    assert np.shares_memory(long_audio, short_audio)
+    assert np.array_equal(short_audio[1], [1, 1, 0, 0, 0])
+
+
+@pytest.mark.parametrize("failed", [(None, None), ((None, None), 1)])
+def test_failed_samples_are_reported(failed):
+    good = ((np.ones(3, np.float32), 8000) if failed == (None, None)
+            else ((np.ones(3, np.float32), 8000), 1))
+    with pytest.raises(ValueError, match="Sample 1"):
+        Collator()([good, failed])
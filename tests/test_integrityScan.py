@@ -0,0 +1,97 @@
+import os
+import json
+import shutil
+import pytest
+from src.treeDataset import TreeDataset
+from src.joinedDataset import JoinedDataset
+from src.integrityScan import IntegrityScan, load_quarantine
+
+
+@pytest.fixture
+def corrupt_images(image_copy):
+    """
+    Corrupts three images of the copy: an empty file, a file that is not
+    an image and a truncated image.
+    """
+    filepaths = TreeDataset(image_copy, "image", "lazy").data
+    corrupt = filepaths[:3]
+    open(corrupt[0], "wb").close()
+    with open(corrupt[1], "wb") as file:
+        file.write(b"garbage" * 10)
+    with open(corrupt[2], "rb") as file:
+        data = file.read()
+    with open(corrupt[2], "wb") as file:
+        file.write(data[:len(data) // 3])
+    return image_copy, corrupt
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_decode_scan_finds_every_corrupt_file(corrupt_images, backend):
+    root, corrupt = corrupt_images
+    dataset = TreeDataset(root, "image", "lazy")
+    bad = IntegrityScan("image", "decode", num_workers=2,
+                        backend=backend).scan(dataset.data)
+    assert sorted(bad) == sorted(corrupt)
+    assert all(isinstance(reason, str) for reason in bad.values())
+
+
+def test_header_scan_finds_unreadable_headers(corrupt_images):
+    root, corrupt = corrupt_images
+    dataset = TreeDataset(root, "image", "lazy")
+    bad = IntegrityScan("image", "header").scan(dataset.data)
+    assert set(corrupt[:2]) <= set(bad)
+
+
+def test_quarantined_files_are_left_out(corrupt_images, image_root,
+                                        tmp_path):
+    root, corrupt = corrupt_images
+    quarantine_path = str(tmp_path / "quarantine.json")
+    dataset = TreeDataset(root, "image", "lazy")
+    IntegrityScan("image", num_workers=2, backend="thread").quarantine(
+        dataset.data, quarantine_path)
+    assert len(load_quarantine(quarantine_path)) == 3
+
+    kept = TreeDataset(root, "image", "lazy",
+                       quarantine_path=quarantine_path)
+    assert len(kept) == len(dataset) - 3
+    assert not set(corrupt) & set(kept.data)
+    assert len(kept.labels) == len(kept)
+
+    # A repaired file is read again, and dropped from the manifest by the
+    # next quarantine
+    shutil.copy(os.path.join(image_root, os.path.relpath(corrupt[0], root)),
+                corrupt[0])
+    repaired = TreeDataset(root, "image", "lazy",
+                           quarantine_path=quarantine_path)
+    assert len(repaired) == len(dataset) - 2
+    IntegrityScan("image").quarantine(repaired.data, quarantine_path)
+    assert len(load_quarantine(quarantine_path)) == 2
+
+
+def test_quarantine_keeps_entries_of_unchecked_files(corrupt_images,
+                                                     tmp_path):
+    root, corrupt = corrupt_images
+    quarantine_path = str(tmp_path / "quarantine.json")
+    scan = IntegrityScan("image")
+    scan.quarantine(corrupt, quarantine_path)
+    scan.quarantine(corrupt[:1], quarantine_path)
+    with open(quarantine_path, encoding="utf-8") as file:
+        assert len(json.load(file)["files"]) == 3
+
+
+def test_corrupt_audio_is_quarantined(audio_root, tmp_path):
+    shutil.copytree(audio_root, str(tmp_path / "audio"))
+    root = str(tmp_path / "audio")
+    shutil.copy(os.path.join(os.path.dirname(audio_root), "labels.csv"),
+                str(tmp_path / "labels.csv"))
+    with open(os.path.join(root, "audio_3.wav"), "wb") as file:
+        file.write(b"RIFF1234WAVEjunk")
+
+    quarantine_path = str(tmp_path / "quarantine.json")
+    bad = IntegrityScan("audio", num_workers=2).quarantine(
+        JoinedDataset(root, "audio", "lazy").data, quarantine_path)
+    assert [os.path.basename(path) for path in bad] == ["audio_3.wav"]
+
+    dataset = JoinedDataset(root, "audio", "eager", load_labels=True,
+                            quarantine_path=quarantine_path)
+    assert len(dataset) == len(dataset.labels) == 7
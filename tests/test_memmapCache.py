@@ -0,0 +1,77 @@
+import os
+import glob
+import numpy as np
+from PIL import Image
+from src.treeDataset import TreeDataset
+
+
+def _no_decoding(filepath):
+    raise AssertionError(f"{filepath} was decoded instead of read from the "
+                         f"cache")
+
+
+def _rewrite(filepath: str, value: int) -> None:
+    Image.new("RGB", (48, 40), (value, value, value)).save(filepath)
+
+
+def test_cached_samples_match_decoded_ones(image_root, tmp_path):
+    lazy = TreeDataset(image_root, "image", "lazy")
+    cached = TreeDataset(image_root, "image", "cached",
+                         cache_dir=str(tmp_path / "cache"))
+    for index in [0, 5, len(lazy) - 1]:
+        data, label = cached[index]
+        assert np.array_equal(data, np.asarray(lazy[index][0]))
+        assert label == lazy[index][1]
+        assert not data.flags.writeable
+
+
+def test_warm_cache_is_shared_between_instances(image_root, tmp_path):
+    TreeDataset(image_root, "image", "cached",
+                cache_dir=str(tmp_path / "cache")).warm_up()
+    reopened = TreeDataset(image_root, "image", "cached",
+                           cache_dir=str(tmp_path / "cache"))
+    reopened._loader = _no_decoding
+    assert all(reopened[index][0] is not None
+               for index in range(len(reopened)))
+
+
+def test_rewritten_files_are_decoded_again(image_copy, tmp_path):
+    dataset = TreeDataset(image_copy, "image", "cached",
+                          cache_dir=str(tmp_path / "cache"))
+    dataset.warm_up()
+    filepath = dataset.data[3]
+    _rewrite(filepath, 200)
+
+    reopened = TreeDataset(image_copy, "image", "cached",
+                           cache_dir=str(tmp_path / "cache"))
+    assert np.all(reopened[3][0] == 200)
+
+
+def test_restored_files_hit_their_old_entry(image_copy, tmp_path):
+    dataset = TreeDataset(image_copy, "image", "cached",
+                          cache_dir=str(tmp_path / "cache"))
+    filepath = dataset.data[3]
+    _rewrite(filepath, 10)
+    with open(filepath, "rb") as file:
+        original = file.read()
+    stat = os.stat(filepath)
+    assert np.all(dataset[3][0] == 10)
+
+    _rewrite(filepath, 200)
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert np.all(dataset[3][0] == 200)
+
+    with open(filepath, "wb") as file:
+        file.write(original)
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    dataset._loader = _no_decoding
+    assert np.all(dataset[3][0] == 10)
+
+
+def test_other_file_lists_use_other_caches(image_copy, tmp_path):
+    TreeDataset(image_copy, "image", "cached",
+                cache_dir=str(tmp_path / "cache")).warm_up()
+    os.remove(sorted(glob.glob(os.path.join(image_copy, "*", "*.jpg")))[0])
+    TreeDataset(image_copy, "image", "cached",
+                cache_dir=str(tmp_path / "cache")).warm_up()
+    assert len(os.listdir(str(tmp_path / "cache"))) == 2
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from src.memoryCache import MemoryCache
+
+
+def _value(fill: int) -> np.ndarray:
+    return np.full(100, fill, dtype=np.uint8)
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = MemoryCache(300, "lru")
+    for key in "abc":
+        cache.put(key, _value(0))
+    cache.get("a")
+    cache.put("d", _value(0))
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in "acd")
+
+
+def test_lfu_evicts_the_least_frequently_used():
+    cache = MemoryCache(300, "lfu")
+    for key in "abc":
+        cache.put(key, _value(0))
+    for key in ["a", "a", "b", "c", "c"]:
+        cache.get(key)
+    cache.put("d", _value(0))
+    assert cache.get("b") is None
+
+    # d was used once, less than a and c
+    cache.put("e", _value(0))
+    assert cache.get("d") is None
+    assert all(cache.get(key) is not None for key in "ace")
+    assert cache.stats["evictions"] == 2
+
+
+def test_lfu_breaks_ties_by_recency():
+    cache = MemoryCache(200, "lfu")
+    cache.put("a", _value(0))
+    cache.put("b", _value(0))
+    cache.get("a")
+    cache.get("b")
+    cache.put("c", _value(0))
+    assert cache.get("a") is None and cache.get("b") is not None
+
+
+@pytest.mark.parametrize("policy", ["lru", "lfu"])
+def test_budget_is_respected(policy):
+    cache = MemoryCache(250, policy)
+    for key in range(10):
+        cache.put(key, _value(key))
+        assert cache.stats["bytes"] <= 250
+    cache.put("large", np.zeros(300, np.uint8))
+    assert cache.get("large") is None
+    assert cache.stats["items"] == 2
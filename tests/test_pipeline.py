@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from PIL import Image
+from src.centerCrop import CenterCrop
+from src.randomCrop import RandomCrop
+from src.fusedCrop import FusedCrop
+from src.pipeline import PreprocessingPipeline
+from src.randomAudioCrop import RandomAudioCrop
+from src.resampling import AudioResampling
+
+CROPS = [CenterCrop(110, 110), RandomCrop(50, 50), CenterCrop(40, 30),
+         RandomCrop(20, 25)]
+
+
+def _inputs():
+    rng = np.random.default_rng(0)
+    array = rng.integers(0, 256, (150, 170, 3), dtype=np.uint8)
+    batch = rng.integers(0, 256, (4, 150, 170, 3), dtype=np.uint8)
+    return [Image.fromarray(array), array, batch]
+
+
+def test_consecutive_crops_are_fused():
+    pipeline = PreprocessingPipeline(*CROPS)
+    assert len(pipeline.plan) == 1
+    assert isinstance(pipeline.plan[0], FusedCrop)
+
+
+@pytest.mark.parametrize("data", _inputs(), ids=["image", "array", "batch"])
+def test_fused_crops_match_sequential_crops(data):
+    pipeline = PreprocessingPipeline(*CROPS)
+    for seed in range(10):
+        np.random.seed(seed)
+        fused = pipeline(data)
+        np.random.seed(seed)
+        sequential = data
+        for crop in CROPS:
+            sequential = crop(sequential)
+        assert type(fused) is type(sequential)
+        assert np.array_equal(np.asarray(fused), np.asarray(sequential))
+
+
+def test_audio_crops_move_before_resampling_when_allowed():
+    steps = [AudioResampling(8000), RandomAudioCrop(1)]
+    kept = PreprocessingPipeline(*steps)
+    reordered = PreprocessingPipeline(*steps, reorder_audio=True)
+    assert [type(step) for step in kept.plan] == [AudioResampling,
+                                                  RandomAudioCrop]
+    assert [type(step) for step in reordered.plan] == [RandomAudioCrop,
+                                                       AudioResampling]
+
+    audio_ts = np.random.default_rng(0).random(16000 * 3, np.float32)
+    cropped, sr = reordered((audio_ts, 16000))
+    assert sr == 8000 and len(cropped) == 8000
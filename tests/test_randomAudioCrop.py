@@ -0,0 +1,57 @@
+import random
+import numpy as np
+import pytest
+from src.joinedDataset import JoinedDataset
+from src.randomAudioCrop import RandomAudioCrop
+from src.resampling import AudioResampling
+from src.pipeline import PreprocessingPipeline
+from src.decoders import decode_audio_soundfile, register_decoder
+
+
+def _no_decoding(filepath):
+    raise AssertionError(f"{filepath} was decoded whole")
+
+
+def decode_audio_scaled(source):
+    audio_ts, sr = decode_audio_soundfile(source)
+    return audio_ts * 2, sr
+
+
+@pytest.mark.parametrize("decoder", ["librosa", "soundfile"])
+def test_windows_match_cropped_files(audio_root, tmp_path, decoder):
+    crop = RandomAudioCrop(0.25)
+    full = JoinedDataset(audio_root, "audio", "lazy", decoder=decoder)
+    windowed = JoinedDataset(audio_root, "audio", "lazy", decoder=decoder,
+                             transform=crop,
+                             metadata_path=str(tmp_path / "meta.json"))
+    windowed._loader = _no_decoding
+    for index in range(len(full)):
+        random.seed(index)
+        expected, expected_sr = crop(full[index])
+        random.seed(index)
+        audio_ts, sr = windowed[index]
+        assert sr == expected_sr
+        assert len(audio_ts) == len(expected) == 2000
+        assert np.allclose(audio_ts, expected, atol=1e-6)
+
+
+def test_steps_after_the_crop_are_applied(audio_root):
+    pipeline = PreprocessingPipeline(RandomAudioCrop(0.25),
+                                     AudioResampling(4000))
+    dataset = JoinedDataset(audio_root, "audio", "lazy",
+                            decoder="soundfile", transform=pipeline)
+    dataset._loader = _no_decoding
+    audio_ts, sr = dataset[0]
+    assert sr == 4000 and len(audio_ts) == 1000
+
+
+def test_other_decoders_decode_whole_files(audio_root):
+    register_decoder("audio", "scaled", "*.wav", decode_audio_scaled)
+    crop = RandomAudioCrop(0.25)
+    full = JoinedDataset(audio_root, "audio", "lazy", decoder="scaled")
+    windowed = JoinedDataset(audio_root, "audio", "lazy", decoder="scaled",
+                             transform=crop)
+    random.seed(0)
+    expected, _ = crop(full[1])
+    random.seed(0)
+    assert np.array_equal(windowed[1][0], expected)
@@ -0,0 +1,88 @@
+import pickle
+import numpy as np
+import pytest
+from src.treeDataset import TreeDataset
+from src.joinedDataset import JoinedDataset
+from src.shardWriter import ShardWriter
+from src.shardedDataset import ShardedDataset
+from src.batchLoader import BatchLoader
+from src.centerCrop import CenterCrop
+
+
+@pytest.fixture(scope="module")
+def image_shards(image_root, tmp_path_factory):
+    output_dir = str(tmp_path_factory.mktemp("image_shards"))
+    dataset = TreeDataset(image_root, "image", "lazy")
+    ShardWriter(output_dir, shard_bytes=8 * 1024).write(dataset)
+    return dataset, output_dir
+
+
+def test_records_match_the_source(image_shards):
+    source, output_dir = image_shards
+    sharded = ShardedDataset(output_dir)
+    assert len(sharded) == len(source)
+    assert len(sharded.shard_paths) > 1
+    assert np.array_equal(sharded.classes, source.classes)
+    for index in range(len(source)):
+        data, label = sharded[index]
+        assert label == source[index][1]
+        assert np.array_equal(np.asarray(data),
+                              np.asarray(source[index][0]))
+
+
+def test_audio_records_match_the_source(audio_root, tmp_path):
+    source = JoinedDataset(audio_root, "audio", "lazy")
+    ShardWriter(str(tmp_path)).write(source)
+    sharded = ShardedDataset(str(tmp_path))
+    audio_ts, sr = sharded[2]
+    assert sr == source[2][1]
+    assert np.allclose(audio_ts, source[2][0])
+
+
+@pytest.mark.parametrize("read_buffer", [1, 4 * 1024, 1 << 24])
+def test_streams_read_every_record_once(image_shards, read_buffer):
+    _, output_dir = image_shards
+    sharded = ShardedDataset(output_dir, read_buffer=read_buffer)
+    ordered = [position for _, position in sharded.items()]
+    assert ordered == list(range(len(sharded)))
+
+    shuffled = [position for _, position in sharded.items(True, seed=1)]
+    assert sorted(shuffled) == ordered
+    assert shuffled != ordered
+    assert shuffled == [position
+                        for _, position in sharded.items(True, seed=1)]
+
+
+def test_streamed_samples_match_random_access(image_shards):
+    _, output_dir = image_shards
+    sharded = ShardedDataset(output_dir)
+    for index, (data, label) in enumerate(sharded):
+        expected, expected_label = sharded[index]
+        assert label == expected_label
+        assert np.array_equal(np.asarray(data), np.asarray(expected))
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_batch_loader_streams_every_record(image_shards, backend):
+    source, output_dir = image_shards
+    sharded = ShardedDataset(output_dir, read_buffer=4 * 1024)
+    loader = BatchLoader(sharded, 5, num_workers=2, backend=backend)
+    labels = [label for batch in loader for _, label in batch]
+    assert sorted(labels) == sorted(int(label) for label in source.labels)
+
+
+def test_pickled_datasets_reopen_their_files(image_shards):
+    _, output_dir = image_shards
+    sharded = ShardedDataset(output_dir)
+    expected = np.asarray(sharded[0][0])
+    sharded.close()
+    restored = pickle.loads(pickle.dumps(sharded))
+    assert np.array_equal(np.asarray(restored[0][0]), expected)
+    assert np.array_equal(np.asarray(sharded[0][0]), expected)
+
+
+def test_transform_cache_is_rejected(image_shards, tmp_path):
+    _, output_dir = image_shards
+    with pytest.raises(ValueError, match="file paths"):
+        ShardedDataset(output_dir, transform=CenterCrop(8, 8),
+                       transform_cache_dir=str(tmp_path))
@@ -0,0 +1,57 @@
+import uuid
+import pickle
+from multiprocessing import shared_memory
+import numpy as np
+import pytest
+from src.sharedArena import SharedArena
+from src.treeDataset import TreeDataset
+
+
+def _name() -> str:
+    return f"dm-test-{uuid.uuid4().hex[:12]}"
+
+
+def test_attached_arenas_read_the_built_samples():
+    rng = np.random.default_rng(0)
+    samples = [rng.integers(0, 256, (4, 5, 3), dtype=np.uint8),
+               rng.integers(0, 256, (2, 7, 3), dtype=np.uint8)]
+    arena = SharedArena.build(_name(), "image",
+                              [sample.shape for sample in samples], samples)
+    try:
+        attached = SharedArena.attach(arena.name)
+        copied = pickle.loads(pickle.dumps(arena))
+        for index, sample in enumerate(samples):
+            assert np.array_equal(attached[index], sample)
+            assert np.array_equal(copied[index], sample)
+            assert not attached[index].flags.writeable
+        attached.close()
+        copied.close()
+    finally:
+        arena.close()
+
+
+def test_attach_gives_up_on_unfilled_arenas():
+    name = _name()
+    memory = shared_memory.SharedMemory(name=name, create=True, size=4096)
+    try:
+        with pytest.raises(TimeoutError, match="not filled"):
+            SharedArena.attach(name, timeout=0.2)
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_shared_datasets_match_lazy_ones(image_root, num_workers):
+    lazy = TreeDataset(image_root, "image", "lazy")
+    shared = TreeDataset(image_root, "image", "shared",
+                         num_workers=num_workers)
+    try:
+        assert len(shared) == len(lazy)
+        for index in [0, 7, len(lazy) - 1]:
+            data, label = shared[index]
+            assert label == lazy[index][1]
+            assert np.array_equal(data, np.asarray(lazy[index][0]))
+    finally:
+        # The next case builds the arena again instead of attaching to it
+        shared._data.close()
@@ -0,0 +1,59 @@
+import collections
+import numpy as np
+import pytest
+from src.treeDataset import TreeDataset
+from src.subsetDataset import SubsetDataset
+
+
+@pytest.fixture(scope="module")
+def dataset(image_root):
+    return TreeDataset(image_root, "image", "lazy")
+
+
+def test_splits_are_disjoint_views(dataset):
+    train, test = dataset.split(0.75, seed=1)
+    assert isinstance(train, SubsetDataset) and train.parent is dataset
+    assert (len(train), len(test)) == (18, 6)
+    assert not set(train.indices) & set(test.indices)
+    assert sorted([*train.indices, *test.indices]) == list(range(24))
+
+    index = int(train.indices[2])
+    assert train[2][1] == dataset[index][1]
+    assert np.array_equal(np.asarray(train[2][0]),
+                          np.asarray(dataset[index][0]))
+    assert set(vars(train)) == {"_parent", "_indices"}
+    assert train.root == dataset.root
+
+
+def test_splits_are_reproducible(dataset):
+    first, _ = dataset.split(0.5, seed=3)
+    second, _ = dataset.split(0.5, seed=3)
+    assert np.array_equal(first.indices, second.indices)
+    unshuffled, _ = dataset.split(0.5, shuffle=False)
+    assert np.array_equal(unshuffled.indices, np.arange(12))
+
+
+def test_stratified_splits_keep_class_proportions(dataset):
+    train, test = dataset.split(0.75, seed=1, stratify=True)
+    assert collections.Counter(train.labels.tolist()) == {0: 6, 1: 6, 2: 6}
+    assert collections.Counter(test.labels.tolist()) == {0: 2, 1: 2, 2: 2}
+
+
+@pytest.mark.parametrize("stratify", [False, True])
+def test_k_fold_validates_every_sample_once(dataset, stratify):
+    validated = []
+    for train, validation in dataset.k_fold(4, seed=0, stratify=stratify):
+        assert len(train) + len(validation) == len(dataset)
+        assert not set(train.indices) & set(validation.indices)
+        if stratify:
+            assert collections.Counter(validation.labels.tolist()) == {
+                0: 2, 1: 2, 2: 2}
+        validated.extend(validation.indices.tolist())
+    assert sorted(validated) == list(range(len(dataset)))
+
+
+def test_subsets_of_subsets_index_the_parent(dataset):
+    train, _ = dataset.split(0.75, seed=1)
+    nested = train.subset([0, 1, -1])
+    assert nested.parent is dataset
+    assert np.array_equal(nested.indices, train.indices[[0, 1, -1]])
@@ -0,0 +1,82 @@
+import os
+import numpy as np
+import pytest
+from src.treeDataset import TreeDataset
+from src.centerCrop import CenterCrop
+from src.randomCrop import RandomCrop
+from src.pipeline import PreprocessingPipeline
+from src.preprocessingABC import PreprocessingTechniqueABC
+from src.transformCache import TransformCache
+
+
+class _Shift(PreprocessingTechniqueABC):
+    deterministic = True
+
+    def __init__(self, offsets, scale=None) -> None:
+        self._offsets = offsets
+        self._scale = scale
+
+    def __call__(self, data):
+        return data
+
+
+def test_configs_describe_every_parameter():
+    configs = [_Shift((1, 2)).config(), _Shift((1, 3)).config(),
+               _Shift(np.arange(3)).config(), _Shift(np.arange(4)).config(),
+               _Shift((1, 2), scale=0.5).config()]
+    assert configs[0]["offsets"] == [1, 2] and configs[0]["scale"] is None
+    assert all(configs[i] != configs[j]
+               for i in range(len(configs)) for j in range(i))
+
+
+def test_signatures_follow_step_parameters(tmp_path):
+    def signature(*steps):
+        return TransformCache(str(tmp_path), steps, "image",
+                              "pil").signature
+
+    assert signature(_Shift((1, 2))) == signature(_Shift((1, 2)))
+    assert signature(_Shift((1, 2))) != signature(_Shift((2, 1)))
+
+
+@pytest.mark.parametrize("identity", ["stat", "content"])
+def test_cached_prefixes_match_uncached_ones(image_root, tmp_path,
+                                             identity):
+    def pipeline():
+        return PreprocessingPipeline(CenterCrop(32, 32), RandomCrop(16, 16))
+
+    plain = TreeDataset(image_root, "image", "lazy", transform=pipeline())
+    cached = TreeDataset(image_root, "image", "lazy", transform=pipeline(),
+                         transform_cache_dir=str(tmp_path),
+                         transform_cache_identity=identity)
+    for _ in range(2):
+        for index in range(len(plain)):
+            np.random.seed(index)
+            expected = np.asarray(plain[index][0])
+            np.random.seed(index)
+            assert np.array_equal(np.asarray(cached[index][0]), expected)
+
+
+def test_content_digests_are_memoized(image_copy, tmp_path):
+    dataset = TreeDataset(image_copy, "image", "lazy")
+    cache = TransformCache(str(tmp_path / "cache"), [CenterCrop(8, 8)],
+                           "image", "pil", identity="content")
+    filepath = dataset.data[0]
+    key = cache.key(filepath)
+
+    # Same size and mtime: the memoized digest is used, the file is not
+    # read again
+    stat = os.stat(filepath)
+    with open(filepath, "r+b") as file:
+        file.write(b"\0")
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.key(filepath) == key
+
+    with open(filepath, "ab") as file:
+        file.write(b"\0")
+    assert cache.key(filepath) != key
+
+
+def test_keys_require_paths(tmp_path):
+    cache = TransformCache(str(tmp_path), [CenterCrop(8, 8)], "image", "pil")
+    with pytest.raises(TypeError, match="path"):
+        cache.key(np.zeros(3))